@@ -11,26 +11,91 @@ MAX_REP_SMALL=100   # Number of repetitions for small block sizes
 MAX_REP_BIG=100     # Number of repetitions for big block sizes
 MAX_REP=10          # General number of repetitions for unspecified cases
 
-# Capture mode (read/write), access pattern (sequential/random), and storage type (HDD/SSD) from command-line arguments
-mode=$1
+# Capture mode (read/write), access pattern (sequential/random), and storage type (HDD/SSD) from command-line arguments.
+# The mode is upper-cased: it names the mode directory and prefixes the configuration directories (READ_<sz_bloc>, WRITE_<sz_bloc>)
+mode=${1^^}
 access_pattern=$2
 storage_type=$3
 
-# Define the number of blocks to be read or written based on the access pattern
-if [ "$access_pattern" == "SEQ" ]; then
+# Define the number of blocks to be read or written and the IO program based on the access pattern.
+# SEQ and RAND are run by iotest; the other patterns of script/workload/patterns.py (STRIDED, ZIPF, HOTSET,
+# REPLAY, with optional parameters such as ZIPF:theta=1.2) are run by the Python workload engine.
+access_type="${access_pattern%%:*}"  # Pattern name without its parameters
+# Campaign directory of the pattern, parameters included (ZIPF:theta=1.2 -> ZIPF-theta1.2), so that campaigns with
+# different parameters do not overwrite each other. An unknown pattern or parameter stops here, before any measurement.
+pattern_dir=$(python3 script/workload/patterns.py "$access_pattern") || exit 1
+io_program="./a.out"
+if [ "$access_type" == "SEQ" ]; then
     nb_bloc=16           # Sequential access will use 16 blocks
-    access_type="SEQ"    # Label the access type as SEQ (sequential)
-else
+elif [ "$access_type" == "RAND" ]; then
     nb_bloc=1            # Random access will use 1 block
-    access_type="RAND"   # Label the access type as RAND (random)
+else
+    nb_bloc=1            # One request per draw of the pattern
+    io_program="python3 script/workload/engine.py --pattern $access_pattern"
+fi
+
+# IO path of the campaign: direct (default) is iotest with O_DIRECT|O_SYNC and the caches dropped after each IO;
+# buffered (page cache) and mmap are run by the Python workload engine, with the readahead hint ADVICE
+# (none, normal, sequential, random, willneed) given to posix_fadvise or madvise. They are recorded as a mode of
+# their own, <mode>-<IO_PATH>[-<ADVICE>]: READ-BUFFERED, READ-MMAP-SEQUENTIAL...
+IO_PATH=${IO_PATH:-direct}
+ADVICE=${ADVICE:-none}
+mode_dir="${mode}"
+if [ "$IO_PATH" != "direct" ]; then
+    io_program="python3 script/workload/engine.py --pattern $access_pattern --io-path $IO_PATH --advice $ADVICE"
+    mode_dir="${mode}-${IO_PATH^^}"
+    if [ "$ADVICE" != "none" ]; then
+        mode_dir="${mode_dir}-${ADVICE^^}"
+    fi
 fi
 
 # Define block sizes for small and big blocks
 small_blocks=("1s" "8k" "16k" "128k" "512k")  # Block sizes for small IO operations
 big_blocks=("1M" "2M" "4M" "8M")              # Block sizes for big IO operations
+file_sizes=("256M" "1G" "4G")                 # File sizes (small, medium, large)
+
+# Node running the campaign. When several nodes run the protocol at the same time in the same logs/ tree
+# (shared home), MULTI_NODE=1 suffixes the run directory with the node name: logs/<storage>@<node>/...
+node=$(hostname -s)
+run_name="${storage_type}"
+if [ "${MULTI_NODE:-0}" == "1" ]; then
+    run_name="${storage_type}@${node}"
+fi
 
-# Define the path to store logs based on storage type, mode, and access pattern
-path="logs/${storage_type}/${mode}/${access_pattern}"
+# Define the path to store logs based on storage type (and node), mode (and IO path), and access pattern
+path="logs/${run_name}/${mode_dir}/${pattern_dir}"
+
+# Adaptive repetitions (ADAPTIVE=1): after each iteration, script/workload/repetition.py updates the confidence
+# intervals of the latency and energy per IO of the configuration and stops its iterations once both are within
+# ADAPTIVE_TARGET of their mean, after at least MIN_REP and at most MAX_REP iterations
+ADAPTIVE=${ADAPTIVE:-0}
+ADAPTIVE_TARGET=${ADAPTIVE_TARGET:-0.05}
+MIN_REP=${MIN_REP:-3}
+converged() {  # sz_bloc filesize rep iteration_start iteration_end
+    local power="$path/io_timestamp/power_${1}_${2}_iteration_${3}.json"
+    curl -s "https://api.grid5000.fr/stable/sites/lyon/metrics?nodes=${node}&metrics=wattmetre_power_watt&start_time=$4&end_time=$5" > "$power"
+    python3 script/workload/repetition.py "$path/io_timestamp/controller_${1}_${2}.json" \
+        "$path/io_timestamp/io_begin_${1}_${2}_iteration_${3}.json" "$path/io_timestamp/io_end_${1}_${2}_iteration_${3}.json" \
+        --power "$power" --target "$ADAPTIVE_TARGET" --min-iterations "$MIN_REP" --max-iterations "$MAX_REP"
+}
+
+# Local counters (RAPL, /proc/diskstats, /proc/stat) sampled during the IO runs, next to the wattmeter,
+# into <mode>_<sz_bloc>/counters_<filesize>.trace, with the overhead of the sampler in counters_<filesize>_overhead.json.
+# SAMPLER_RATE is in samples per second (up to 1000), 0 disables the sampler.
+SAMPLER_RATE=${SAMPLER_RATE:-10}
+start_sampler() {
+    sampler_pid=""
+    if [ "$SAMPLER_RATE" != "0" ]; then
+        sudo-g5k python3 script/workload/sampler.py --output "$1" --rate "$SAMPLER_RATE" --node "$node" --report "${1%.trace}_overhead.json" &
+        sampler_pid=$!
+    fi
+}
+stop_sampler() {
+    if [ -n "$sampler_pid" ]; then
+        sudo-g5k kill -INT "$sampler_pid" 2>/dev/null
+        wait "$sampler_pid"
+    fi
+}
 
 # Base options for running the IO program with small and big blocks
 base_option_small="--mode ${mode,,} --nb_run $MAX_REP_SMALL --nb_bloc $nb_bloc --skip 0"
@@ -51,9 +116,17 @@ mkdir -p $path/io_timestamp
 # Create directories for each block size within the path
 for sz_bloc in "${small_blocks[@]}" "${big_blocks[@]}"
 do
-    mkdir -p $path/{small_size_io,big_size_io}/READ_${sz_bloc}
+    mkdir -p $path/{small_size_io,big_size_io}/${mode_dir}_${sz_bloc}
 done
 
+# Manifest of the campaign (script/common/manifest.py): parameters and environment of the measurements, then every
+# configuration once it is measured. The formatting and analysis scripts list the configurations from it.
+python3 script/common/manifest.py create "$path" --set storage=$storage_type --set node=$node --set run=$run_name \
+    --set mode=$mode_dir --set operation=$mode --set io_path=$IO_PATH --set advice=$ADVICE --set "pattern=$access_pattern" \
+    --set "io_program=$io_program" --set nb_bloc=$nb_bloc --set max_rep=$MAX_REP --set nb_run_small=$MAX_REP_SMALL \
+    --set nb_run_big=$MAX_REP_BIG --set adaptive=$ADAPTIVE --set adaptive_target=$ADAPTIVE_TARGET --set min_rep=$MIN_REP \
+    --set sampler_rate=$SAMPLER_RATE --block-sizes "${small_blocks[@]}" "${big_blocks[@]}" --file-sizes "${file_sizes[@]}"
+
 ## Measure baseline energy consumption without IO operations for 15 minutes
 
 echo -e "\033[1;33mMesure énergie à vide... 15 minutes\033[00m"
@@ -68,19 +141,19 @@ sleep 900
 endtime=$(date +%s.%6N)
 
 # Fetch energy consumption data from the Grid5000 API for the recorded time period and save it in a JSON file
-curl "https://api.grid5000.fr/stable/sites/lyon/metrics?nodes=$(hostname -s)&metrics=wattmetre_power_watt&start_time=$starttime&end_time=$endtime" > $path/baseline/baseline.json
+curl "https://api.grid5000.fr/stable/sites/lyon/metrics?nodes=${node}&metrics=wattmetre_power_watt&start_time=$starttime&end_time=$endtime" > $path/baseline/baseline.json
 
 # Perform a dry run to validate the parameters by running the compiled program without actual IO operations
 sudo-g5k ./a.out $base_option_small --dry
 
 # Print the mode, path, and hostname for reference
-echo "$mode -- $path -- $(hostname -s)"
+echo "$mode_dir -- $path -- ${node}"
 
 # ------- Begin IO Operations for Small Blocks -------- #
 for sz_bloc in "${small_blocks[@]}"
 do
     block_category="small_size_io"
-    for filesize in 256M 1G 4G  # Iterate through different file sizes (small, medium, large)
+    for filesize in "${file_sizes[@]}"  # Iterate through different file sizes (small, medium, large)
     do
         # Set options for small block sizes
         option="$base_option_small --sz_bloc $sz_bloc --filesize $filesize"
@@ -88,17 +161,20 @@ do
 
         echo -e "\033[1;34mfilesize: $filesize -- sz_bloc: $sz_bloc\033[00m"
 
-        # Record start time
+        # Start the local counters, then record start time
+        start_sampler "$path/${block_category}/${mode_dir}_${sz_bloc}/counters_${filesize}.trace"
         starttime=$(date +%s.%6N)
 
         # Perform IO operations multiple times (MAX_REP_SMALL)
         for rep in `seq -f "%02g" 1 $MAX_REP`
         do
             # Run the IO operation and save the result
-            result=$(sudo-g5k ./a.out $option | tee /dev/tty)
+            iteration_start=$(date +%s.%6N)
+            result=$(sudo-g5k $io_program $option | tee /dev/tty)
+            iteration_end=$(date +%s.%6N)
             
             # Create directory for storing performance results
-            perf_dir="$path/${block_category}/READ_${sz_bloc}/${filesize}/perf"
+            perf_dir="$path/${block_category}/${mode_dir}_${sz_bloc}/${filesize}/perf"
             mkdir -p "$perf_dir"
 
             # Save the result in a CSV file
@@ -110,13 +186,23 @@ do
 
             # Pause for 90 seconds before the next iteration
             sleep 90
+
+            # Stop the iterations of the configuration once its confidence intervals are narrow enough
+            if [ "$ADAPTIVE" == "1" ] && converged "$sz_bloc" "$filesize" "$rep" "$iteration_start" "$iteration_end"; then
+                break
+            fi
         done
 
-        # Record end time
+        # Record end time and stop the local counters
         endtime=$(date +%s.%6N)
+        stop_sampler
 
         # Fetch energy consumption data from the Grid5000 API for the recorded time period and save it in a JSON file (change 'lyon' by the site you will use (do that for every curl request)
-        curl "https://api.grid5000.fr/stable/sites/lyon/metrics?nodes=$(hostname -s)&metrics=wattmetre_power_watt&start_time=$starttime&end_time=$endtime" > $path/${block_category}/READ_${sz_bloc}/READ_${filesize}.json
+        curl "https://api.grid5000.fr/stable/sites/lyon/metrics?nodes=${node}&metrics=wattmetre_power_watt&start_time=$starttime&end_time=$endtime" > $path/${block_category}/${mode_dir}_${sz_bloc}/${mode_dir}_${filesize}.json
+
+        # Add the configuration to the manifest, with the number of iterations it ran
+        python3 script/common/manifest.py record "$path" --sz-bloc $sz_bloc --filesize $filesize --category $block_category \
+            --iterations $((10#$rep)) --start $starttime --end $endtime
     done
 done
 
@@ -124,7 +210,7 @@ done
 for sz_bloc in "${big_blocks[@]}"
 do
     block_category="big_size_io"
-    for filesize in 256M 1G 4G  # Iterate through different file sizes (small, medium, large)
+    for filesize in "${file_sizes[@]}"  # Iterate through different file sizes (small, medium, large)
     do
         # Set options for big block sizes
         option="$base_option_big --sz_bloc $sz_bloc --filesize $filesize"
@@ -132,17 +218,20 @@ do
 
         echo -e "\033[1;34mfilesize: $filesize -- sz_bloc: $sz_bloc\033[00m"
 
-        # Record start time
+        # Start the local counters, then record start time
+        start_sampler "$path/${block_category}/${mode_dir}_${sz_bloc}/counters_${filesize}.trace"
         starttime=$(date +%s.%6N)
 
         # Perform IO operations multiple times (MAX_REP_BIG)
         for rep in `seq -f "%02g" 1 $MAX_REP`
         do
             # Run the IO operation and save the result
-            result=$(sudo-g5k ./a.out $option | tee /dev/tty)
+            iteration_start=$(date +%s.%6N)
+            result=$(sudo-g5k $io_program $option | tee /dev/tty)
+            iteration_end=$(date +%s.%6N)
             
             # Create directory for storing performance results
-            perf_dir="$path/${block_category}/READ_${sz_bloc}/${filesize}/perf"
+            perf_dir="$path/${block_category}/${mode_dir}_${sz_bloc}/${filesize}/perf"
             mkdir -p "$perf_dir"
 
             # Save the result in a CSV file
@@ -154,20 +243,33 @@ do
 
             # Pause for 90 seconds before the next iteration
             sleep 90
+
+            # Stop the iterations of the configuration once its confidence intervals are narrow enough
+            if [ "$ADAPTIVE" == "1" ] && converged "$sz_bloc" "$filesize" "$rep" "$iteration_start" "$iteration_end"; then
+                break
+            fi
         done
 
-        # Record end time
+        # Record end time and stop the local counters
         endtime=$(date +%s.%6N)
+        stop_sampler
 
         # Fetch energy consumption data from the Grid5000 API for the recorded time period and save it in a JSON file
-        curl "https://api.grid5000.fr/stable/sites/lyon/metrics?nodes=$(hostname -s)&metrics=wattmetre_power_watt&start_time=$starttime&end_time=$endtime" > $path/${block_category}/READ_${sz_bloc}/READ_${filesize}.json
+        curl "https://api.grid5000.fr/stable/sites/lyon/metrics?nodes=${node}&metrics=wattmetre_power_watt&start_time=$starttime&end_time=$endtime" > $path/${block_category}/${mode_dir}_${sz_bloc}/${mode_dir}_${filesize}.json
+
+        # Add the configuration to the manifest, with the number of iterations it ran
+        python3 script/common/manifest.py record "$path" --sz-bloc $sz_bloc --filesize $filesize --category $block_category \
+            --iterations $((10#$rep)) --start $starttime --end $endtime
     done
 done
 
 # Clean up unnecessary directories
 # Remove directories that do not match the current block size categories
-rm -r $path/big_size_io/READ_1s/ $path/big_size_io/READ_16k/ $path/big_size_io/READ_8k/ $path/big_size_io/READ_512k/ $path/big_size_io/READ_128k/
-rm -r $path/small_size_io/READ_1M/ $path/small_size_io/READ_2M/ $path/small_size_io/READ_4M/ $path/small_size_io/READ_8M/
+rm -r $path/big_size_io/${mode_dir}_1s/ $path/big_size_io/${mode_dir}_16k/ $path/big_size_io/${mode_dir}_8k/ $path/big_size_io/${mode_dir}_512k/ $path/big_size_io/${mode_dir}_128k/
+rm -r $path/small_size_io/${mode_dir}_1M/ $path/small_size_io/${mode_dir}_2M/ $path/small_size_io/${mode_dir}_4M/ $path/small_size_io/${mode_dir}_8M/
+
+# Record the end of the campaign in the manifest
+python3 script/common/manifest.py finish "$path"
 
 # Print a completion message
 echo -e "\033[1;33mDone.. Exit\033[00m"
@@ -23,7 +23,8 @@ DIRECTORY_TO_MOVE=$1
 LOG_DIR="logs"                            # The main logs directory.
 FORMATTED_DIR="${LOG_DIR}/formatted_data" # The directory where formatted data will be stored.
 BRUTE_DIR="${LOG_DIR}/brute_data"         # The directory where raw data will be moved.
-PYTHON_SCRIPT="script/format/wattmeter_format.py" # Python script to format the data.
+IOPROTOCOL="script/ioprotocol.py" # Command-line entry point of the Python scripts.
+WATTMETER_ARGS=()                 # Pairs of <input_json> <output_csv> converted in one Python process.
 
 # Check if the logs directory exists.
 if [ ! -d "$LOG_DIR" ]; then
@@ -46,37 +47,17 @@ if [ ! -d "${DEST_DIR}" ]; then
     mkdir -p "${DEST_DIR}" ## || error_exit
 fi
 
-# Function to create directory structure in formatted_data.
+# Function to create the directory structure of a configuration in formatted_data.
 create_directory_structure() {
     local base_dir=$1
     local access_pattern=$2
+    local category=$3
+    local size=$4
+    local file_size=$5
 
-    # Create small_size_io and big_size_io directories.
-    mkdir -p "${base_dir}/small_size_io" # || error_exit
-    mkdir -p "${base_dir}/big_size_io" # || error_exit
-
-    # Add directories for different file sizes under small_size_io.
-    for size in 1s 128k 16k 512k 8k; do
-        local pattern_dir="${base_dir}/small_size_io/${size}/${access_pattern}"
-        mkdir -p "${pattern_dir}" # || error_exit
-        create_size_directories "${pattern_dir}"
-    done
-
-    # Add directories for different file sizes under big_size_io.
-    for size in 1M 4M 2M 8M; do
-        local pattern_dir="${base_dir}/big_size_io/${size}/${access_pattern}"
-        mkdir -p "${pattern_dir}" # || error_exit
-        create_size_directories "${pattern_dir}"
-    done
-}
-
-# Function to create subdirectories for each file size.
-create_size_directories() {
-    local pattern_dir=$1
-    for file_size in 256M 1G 4G; do
-        mkdir -p "${pattern_dir}/${file_size}/energy" # Directory for energy data.
-        mkdir -p "${pattern_dir}/${file_size}/perf" # Directory for performance data.
-    done
+    local pattern_dir="${base_dir}/${category}/${size}/${access_pattern}"
+    mkdir -p "${pattern_dir}/${file_size}/energy" # Directory for energy data.
+    mkdir -p "${pattern_dir}/${file_size}/perf" # Directory for performance data.
     # Create the baseline directory for baseline data.
     mkdir -p "${pattern_dir}/baseline" # || error_exit
 }
@@ -87,9 +68,10 @@ copy_plots() {
     local access_pattern=$2
     local io_size=$3
     local file_size=$4
+    local read_write=$5
 
     # Define the source and destination paths for plot images.
-    local plot_src="${BRUTE_DIR}/${DIRECTORY_TO_MOVE}/READ/${access_pattern}/plot/${io_size}/plot_io_${io_size}_${file_size}.png"
+    local plot_src="${BRUTE_DIR}/${DIRECTORY_TO_MOVE}/${read_write}/${access_pattern}/plot/${io_size}/plot_io_${io_size}_${file_size}.png"
     local plot_dest="${base_dir}/${io_size}/${access_pattern}/${file_size}/plot_io_${io_size}_${file_size}.png"
 
     # If the source plot exists, copy it to the destination.
@@ -98,7 +80,7 @@ copy_plots() {
     fi
 
     # Copy the baseline plot to the appropriate baseline directories.
-    local baseline_src="${BRUTE_DIR}/${DIRECTORY_TO_MOVE}/READ/${access_pattern}/plot/baseline/plot_baseline.png"
+    local baseline_src="${BRUTE_DIR}/${DIRECTORY_TO_MOVE}/${read_write}/${access_pattern}/plot/baseline/plot_baseline.png"
     local baseline_dest="${base_dir}/${io_size}/${access_pattern}/baseline/plot_baseline.png"
 
     if [ -f "${baseline_src}" ]; then
@@ -112,9 +94,10 @@ copy_boxplots() {
     local access_pattern=$2
     local io_size=$3
     local boxplot_name=$4
+    local read_write=$5
 
     # Define the source and destination paths for boxplot images.
-    local boxplot_src="${BRUTE_DIR}/${DIRECTORY_TO_MOVE}/READ/${access_pattern}/box_plot/${boxplot_name}"
+    local boxplot_src="${BRUTE_DIR}/${DIRECTORY_TO_MOVE}/${read_write}/${access_pattern}/box_plot/${boxplot_name}"
     local boxplot_dest="${base_dir}/${io_size}/${access_pattern}/${boxplot_name}"
 
     # If the source boxplot exists, copy it to the destination.
@@ -127,37 +110,47 @@ copy_boxplots() {
 copy_baseline_boxplot() {
     local base_dir=$1
     local access_pattern=$2
+    local read_write=$3
 
     # Define the source path for the baseline boxplot.
-    local boxplot_src="${BRUTE_DIR}/${DIRECTORY_TO_MOVE}/READ/${access_pattern}/box_plot/boxplot_baseline.png"
+    local boxplot_src="${BRUTE_DIR}/${DIRECTORY_TO_MOVE}/${read_write}/${access_pattern}/box_plot/boxplot_baseline.png"
 
     if [ -f "${boxplot_src}" ]; then
-        # Copy the baseline boxplot to the small_size_io directories.
-        for size in 1s 128k 16k 512k 8k; do
-            local baseline_dest="${base_dir}/small_size_io/${size}/${access_pattern}/baseline/boxplot_baseline.png"
-            if [ ! -d "$(dirname "${baseline_dest}")" ]; then
-                mkdir -p "$(dirname "${baseline_dest}")"
-            fi
-            cp "${boxplot_src}" "${baseline_dest}"
+        # Copy the baseline boxplot to the baseline directory of every block size of the pattern.
+        for pattern_dir in "${base_dir}"/*_size_io/*/"${access_pattern}"; do
+            [ -d "${pattern_dir}" ] || continue
+            mkdir -p "${pattern_dir}/baseline"
+            cp "${boxplot_src}" "${pattern_dir}/baseline/boxplot_baseline.png"
         done
+    fi
+}
 
-        # Copy the baseline boxplot to the big_size_io directories.
-        for size in 1M 4M 2M 8M; do
-            local baseline_dest="${base_dir}/big_size_io/${size}/${access_pattern}/baseline/boxplot_baseline.png"
-            if [ ! -d "$(dirname "${baseline_dest}")" ]; then
-                mkdir -p "$(dirname "${baseline_dest}")"
-            fi
-            cp "${boxplot_src}" "${baseline_dest}"
-        done
+# Function to print the raw directory of a configuration: <mode>_<size>, or READ_<size> in the campaigns recorded
+# before the configuration directories were named after their mode.
+raw_config_dir() {
+    local category_dir=$1
+    local read_write=$2
+    local size=$3
+    if [ -d "${category_dir}/${read_write}_${size}" ]; then
+        echo "${category_dir}/${read_write}_${size}"
+    else
+        echo "${category_dir}/READ_${size}"
     fi
 }
 
-# Function to generate CSV files from JSON data.
+# Function to queue the generation of a CSV file from JSON data.
 generate_csv() {
     local json_file=$1
     local csv_file=$2
-    # Use a Python script to convert the JSON data to CSV format.
-    python3 ${PYTHON_SCRIPT} "${json_file}" "${csv_file}" # || error_exit
+    # The conversions are run together by flush_csv, a single Python process for the whole tree.
+    WATTMETER_ARGS+=("${json_file}" "${csv_file}")
+}
+
+# Function to convert all the queued JSON files to CSV format.
+flush_csv() {
+    if [ "${#WATTMETER_ARGS[@]}" -gt 0 ]; then
+        python3 ${IOPROTOCOL} format wattmeter "${WATTMETER_ARGS[@]}" # || error_exit
+    fi
 }
 
 # Function to recursively format subdirectories.
@@ -166,41 +159,42 @@ format_subdirectories() {
     for read_write in $(ls "${current_dir}"); do
         for access_pattern in $(ls "${current_dir}/${read_write}"); do
             base_dir="${DEST_DIR}/${read_write}"
-            create_directory_structure("${base_dir}" "${access_pattern}")
-
-            # Copy plots and generate CSVs for small_size_io.
-            for size in 1s 128k 16k 512k 8k; do
-                for file_size in 256M 1G 4G; do
-                    copy_plots("${base_dir}/small_size_io" "${access_pattern}" "${size}" "${file_size}")
-                    copy_boxplots("${base_dir}/small_size_io" "${access_pattern}" "${size}" "boxplot_${size}.png")
-                    json_src="${current_dir}/${read_write}/${access_pattern}/small_size_io/READ_${size}/READ_${file_size}.json"
-                    csv_dest="${base_dir}/small_size_io/${size}/${access_pattern}/${file_size}/energy/data.csv"
-                    if [ -f "${json_src}" ]; then
-                        generate_csv("${json_src}" "${csv_dest}")
-                    fi
-                done
-            done
-
-            # Copy plots and generate CSVs for big_size_io.
-            for size in 1M 4M 2M 8M; do
-                for file_size in 256M 1G 4G; do
-                    copy_plots("${base_dir}/big_size_io" "${access_pattern}" "${size}" "${file_size}")
-                    copy_boxplots("${base_dir}/big_size_io" "${access_pattern}" "${size}" "boxplot_${size}.png")
-                    json_src="${current_dir}/${read_write}/${access_pattern}/big_size_io/READ_${size}/READ_${file_size}.json"
-                    csv_dest="${base_dir}/big_size_io/${size}/${access_pattern}/${file_size}/energy/data.csv"
-                    if [ -f "${json_src}" ]; then
-                        generate_csv("${json_src}" "${csv_dest}")
-                    fi
-                done
-            done
+            raw_dir="${current_dir}/${read_write}/${access_pattern}"
+
+            # Copy the manifest of the campaign next to its formatted tree (rebuilt from the raw files of the
+            # campaigns recorded without one): the configurations formatted below are the ones it lists.
+            manifest="${base_dir}/manifest_${access_pattern}.json"
+            mkdir -p "${base_dir}"
+            python3 ${IOPROTOCOL} manifest export "${raw_dir}" "${manifest}"
+
+            # Create the directories, copy plots and generate CSVs for every measured configuration.
+            while read -r category size file_size iterations; do
+                create_directory_structure "${base_dir}" "${access_pattern}" "${category}" "${size}" "${file_size}"
+                copy_plots "${base_dir}/${category}" "${access_pattern}" "${size}" "${file_size}" "${read_write}"
+                copy_boxplots "${base_dir}/${category}" "${access_pattern}" "${size}" "boxplot_${size}.png" "${read_write}"
+                config_dir=$(raw_config_dir "${raw_dir}/${category}" "${read_write}" "${size}")
+                config_name=$(basename "${config_dir}")
+                json_src="${config_dir}/${config_name%%_*}_${file_size}.json"
+                csv_dest="${base_dir}/${category}/${size}/${access_pattern}/${file_size}/energy/data.csv"
+                if [ -f "${json_src}" ]; then
+                    generate_csv "${json_src}" "${csv_dest}"
+                fi
+                # Counters of the local sampler, projected on the IOs by the calcul scripts
+                counters_src="${config_dir}/counters_${file_size}.trace"
+                if [ -f "${counters_src}" ]; then
+                    cp "${counters_src}" "$(dirname "${csv_dest}")/counters.trace"
+                fi
+            done < <(python3 ${IOPROTOCOL} manifest configs "${manifest}")
+
             # Copy the baseline boxplot to all directories.
-            copy_baseline_boxplot("${base_dir}" "${access_pattern}")
+            copy_baseline_boxplot "${base_dir}" "${access_pattern}" "${read_write}"
         done
     done
 }
 
 # Call the function to format the subdirectories.
-format_subdirectories("${BRUTE_DIR}/${DIRECTORY_TO_MOVE}")
+format_subdirectories "${BRUTE_DIR}/${DIRECTORY_TO_MOVE}"
+flush_csv
 
 # Call the generate_perf.sh script to generate performance CSV files.
 script/format/generate_perf.sh "${DIRECTORY_TO_MOVE}" # || error_exit
@@ -217,6 +211,12 @@ script/format/rename_csv_files.sh "${DIRECTORY_TO_MOVE}" # || error_exit
 # Call the copy_result_csv.sh script to copy the final result CSVs.
 script/format/copy_result_csv.sh "${DIRECTORY_TO_MOVE}"
 
+# Add the new tables to the SQLite index of formatted_data (only new or modified files are read).
+# Skipped when several runs are formatted in parallel (ioprotocol nodes format), which updates it once at the end.
+if [ "${IOPROTOCOL_SKIP_INDEX:-0}" != "1" ]; then
+    python3 ${IOPROTOCOL} index update "${FORMATTED_DIR}"
+fi
+
 # Print a completion message indicating that the process is complete.
 echo "The directory ${DIRECTORY_TO_MOVE} has been moved to 'brute_data'. The directory structure has been created in 'formatted_data', plots have been copied, and CSV files have been generated."
 
@@ -14,95 +14,46 @@ LOG_DIR=$1          # The directory containing the log files.
 TYPE=$2             # The type of plot to generate (e.g., baseline or block size).
 OPTIONAL_ARG=$3     # An optional argument for additional plotting options.
 
-# Define the directory containing the plotting scripts.
-SCRIPT_DIR=$(dirname "$0")/script/plot
-BOXPLOT_DIR=$SCRIPT_DIR
+# Define the command-line entry point of the Python scripts.
+# Each branch runs a single process, which imports pandas/matplotlib once for all the plots.
+IOPROTOCOL="python3 $(dirname "$0")/script/ioprotocol.py"
 
 # Check if the optional argument is provided and equals "nb_run".
 if [ -n "$OPTIONAL_ARG" ] && [ "$OPTIONAL_ARG" == "nb_run" ]; then
-    # If the optional argument is "nb_run", run the plot_io_all_run.py script.
+    # If the optional argument is "nb_run", plot all runs of each iteration in interactive mode.
     echo "Optional argument given, plotting in interactive mode all runs from each iteration (1000 to 1600 IO) : $OPTIONAL_ARG"
-    python3 $SCRIPT_DIR/plot_io_all_run.py $LOG_DIR $TYPE
+    $IOPROTOCOL plot io-all-run $LOG_DIR --sz-bloc $TYPE --interactive
 
 # If the optional argument is provided but not "nb_run", show an error message and exit.
 elif [ -n "$OPTIONAL_ARG" ] && [ "$OPTIONAL_ARG" != "nb_run" ]; then
     echo "Wrong optional argument given: $OPTIONAL_ARG. Try: nb_run (WARNING: THIS ARGUMENT USES INTERACTIVE BACKEND MODE FOR PLOTTING)"
     exit 1
     
-# If the TYPE argument is "baseline", run the plot_baseline.py script.
+# If the TYPE argument is "baseline", plot the baseline in interactive mode.
 elif [ "$TYPE" == "baseline" ]; then
-    python3 $SCRIPT_DIR/plot_baseline.py $LOG_DIR
+    $IOPROTOCOL plot baseline $LOG_DIR --interactive
 
-# If the TYPE argument is "plot_all", run several plotting scripts for different block sizes.
+# If the TYPE argument is "plot_all", plot the baseline and every block size.
 elif [ "$TYPE" == "plot_all" ]; then
-    python3 $SCRIPT_DIR/plot_baseline_passive.py $LOG_DIR
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 1s
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 8k
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 16k
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 128k
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 512k
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 1M
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 2M
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 4M
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 8M
+    $IOPROTOCOL plot baseline,io $LOG_DIR
 
-# If the TYPE argument is "box_baseline", run the box_plot_baseline.py script.
+# If the TYPE argument is "box_baseline", draw the baseline boxplot.
 elif [ "$TYPE" == "box_baseline" ]; then
-    python3 $SCRIPT_DIR/box_plot_baseline.py $LOG_DIR
+    $IOPROTOCOL plot box-baseline $LOG_DIR
 
-# If the TYPE argument is "box_all", run several box plot scripts for different block sizes.
+# If the TYPE argument is "box_all", draw the idle-window boxplots of all block sizes at once.
 elif [ "$TYPE" == "box_all" ]; then
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 1s
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 8k
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 16k
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 128k
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 512k
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 1M
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 2M
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 4M
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 8M
+    $IOPROTOCOL plot box-io $LOG_DIR
 
-# If the TYPE argument is "all", run a combination of baseline and IO plotting scripts.
+# If the TYPE argument is "all", run a combination of baseline and IO plots and boxplots.
 elif [ "$TYPE" == "all" ]; then
-    python3 $SCRIPT_DIR/plot_baseline_passive.py $LOG_DIR
+    $IOPROTOCOL plot baseline,io,box-baseline,box-io $LOG_DIR
 
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 1s
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 8k
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 16k
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 128k
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 512k
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 1M
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 2M
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 4M
-    python3 $SCRIPT_DIR/plot_io_passive.py $LOG_DIR 8M
-
-    python3 $SCRIPT_DIR/box_plot_baseline.py $LOG_DIR
-
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 1s
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 8k
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 16k
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 128k
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 512k
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 1M
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 2M
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 4M
-    python3 $SCRIPT_DIR/box_plot_io.py $LOG_DIR 8M
-
-# If the TYPE argument is "all_run", run several scripts for plotting all runs in passive mode.
+# If the TYPE argument is "all_run", plot all runs of every block size in passive mode.
 elif [ "$TYPE" == "all_run" ]; then
-    python3 $SCRIPT_DIR/plot_baseline_passive.py $LOG_DIR
-    python3 $SCRIPT_DIR/plot_io_all_run_passive.py $LOG_DIR 1s
-    python3 $SCRIPT_DIR/plot_io_all_run_passive.py $LOG_DIR 8k
-    python3 $SCRIPT_DIR/plot_io_all_run_passive.py $LOG_DIR 16k
-    python3 $SCRIPT_DIR/plot_io_all_run_passive.py $LOG_DIR 128k
-    python3 $SCRIPT_DIR/plot_io_all_run_passive.py $LOG_DIR 512k
-    python3 $SCRIPT_DIR/plot_io_all_run_passive.py $LOG_DIR 1M
-    python3 $SCRIPT_DIR/plot_io_all_run_passive.py $LOG_DIR 2M
-    python3 $SCRIPT_DIR/plot_io_all_run_passive.py $LOG_DIR 4M
-    python3 $SCRIPT_DIR/plot_io_all_run_passive.py $LOG_DIR 8M
+    $IOPROTOCOL plot baseline,io-all-run $LOG_DIR
 
-# If none of the specific conditions match, default to running the plot_io.py script with the provided type.
+# If none of the specific conditions match, default to plotting the given block size in interactive mode.
 else
-    python3 $SCRIPT_DIR/plot_io.py $LOG_DIR $TYPE
+    $IOPROTOCOL plot io $LOG_DIR --sz-bloc $TYPE --interactive
 fi
-
@@ -0,0 +1,215 @@
+import os  # Import os for paths and wait4
+import sys  # Import sys for the interpreter path and exit codes
+import json  # Import json for the results history
+import glob  # Import glob to list the generated files
+import time  # Import time for the wall-clock timers
+import shutil  # Import shutil to copy files and clean the work directory
+import argparse  # Import argparse for the optional arguments
+import platform  # Import platform to record the host in the history
+import tempfile  # Import tempfile for the default work directory
+import subprocess  # Import subprocess to run the pipeline scripts as the shell drivers do
+from datetime import datetime  # Import datetime to timestamp the history entries
+
+from synth_campaign import SCALES, generate_campaign  # Synthetic campaign generator
+
+# Directory containing format/, maths/ and plot/
+SCRIPT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Function to run one script and return its wall time, CPU time and peak RSS (MB)
+def run_script(cmd, cwd):
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable] + cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=stderr)
+        # wait4 returns the resource usage of this child only
+        _, status, usage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - start
+
+        if os.waitstatus_to_exitcode(status) != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"{' '.join(cmd)} failed:\n{stderr.read().decode(errors='replace')}")
+
+    return wall, usage.ru_utime + usage.ru_stime, usage.ru_maxrss / 1024
+
+# Accumulate the invocations of one pipeline step
+class StepResult:
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.peak_rss_mb = 0.0
+        self.rows = 0
+
+    def add(self, timing, rows=0):
+        wall, cpu, rss = timing
+        self.calls += 1
+        self.wall_s += wall
+        self.cpu_s += cpu
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        self.rows += rows
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'wall_s': self.wall_s,
+            'cpu_s': self.cpu_s,
+            'peak_rss_mb': self.peak_rss_mb,
+            'rows': self.rows,
+            'rows_per_s': self.rows / self.wall_s if self.wall_s > 0 else None,
+        }
+
+# Function to count the data lines of a text file
+def count_lines(path):
+    with open(path, 'r') as f:
+        return sum(1 for line in f if line.strip())
+
+# Function to run the format, maths and plot scripts on a synthetic campaign, as format.sh and plotting.sh do
+def run_pipeline(workdir, campaign_path, storage, pattern):
+    script = lambda *parts: os.path.join(SCRIPT_ROOT, *parts)
+    mode = os.path.basename(os.path.dirname(campaign_path))  # logs/<storage>/<mode>/<pattern>
+    formatted = os.path.join(workdir, 'formatted', storage, mode)
+    steps = {name: StepResult(name) for name in (
+        'wattmeter_format', 'generate_perf_csv', 'merge_csv_files', 'calcul_hdd', 'calcul_ssd',
+        'compute_mean', 'plot_baseline_passive', 'plot_io_passive', 'box_plot_io')}
+
+    configs = []
+    for trace in sorted(glob.glob(os.path.join(campaign_path, '*_size_io', f'{mode}_*', f'{mode}_*.json'))):
+        category = os.path.basename(os.path.dirname(os.path.dirname(trace)))
+        sz_bloc = os.path.basename(os.path.dirname(trace))[len(mode) + 1:]
+        filesize = os.path.basename(trace)[len(mode) + 1:-len('.json')]
+        configs.append((category, sz_bloc, filesize, trace))
+
+    # Format: power traces to energy CSV, timestamps to per-iteration perf CSV, then merge
+    for category, sz_bloc, filesize, trace in configs:
+        config_dir = os.path.join(formatted, category, sz_bloc, pattern, filesize)
+        os.makedirs(os.path.join(config_dir, 'energy'), exist_ok=True)
+        os.makedirs(os.path.join(config_dir, 'perf'), exist_ok=True)
+
+        energy_csv = os.path.join(config_dir, 'energy', 'data.csv')
+        steps['wattmeter_format'].add(run_script([script('format', 'wattmeter_format.py'), trace, energy_csv], workdir),
+                                      rows=count_lines(energy_csv) - 1 if os.path.exists(energy_csv) else 0)
+        # calcul_hdd.py reads the renamed energy file, calcul_ssd.py the raw data.csv
+        shutil.copy(energy_csv, os.path.join(config_dir, 'energy', f'energy_{pattern}_buffer{filesize}_io{sz_bloc}.csv'))
+
+        for begin in sorted(glob.glob(os.path.join(campaign_path, 'io_timestamp', f'io_begin_{sz_bloc}_{filesize}_iteration_*.json'))):
+            rep = begin[-len('01.json'):-len('.json')]
+            end = begin.replace('io_begin_', 'io_end_')
+            steps['generate_perf_csv'].add(run_script([script('format', 'generate_perf_csv.py'), begin, end,
+                                                       os.path.join(config_dir, 'perf', f'data_{rep}.csv'), str(int(rep))], workdir),
+                                           rows=count_lines(begin))
+
+    steps['merge_csv_files'].add(run_script([script('format', 'merge_csv_files.py'), formatted], workdir))
+    perf_files = []
+    for category, sz_bloc, filesize, _ in configs:
+        perf_dir = os.path.join(formatted, category, sz_bloc, pattern, filesize, 'perf')
+        perf_file = os.path.join(perf_dir, f'perf_{pattern}_buffer{filesize}_io{sz_bloc}.csv')
+        os.rename(os.path.join(perf_dir, 'data_merged.csv'), perf_file)
+        perf_files.append(perf_file)
+    nb_ios = sum(count_lines(f) - 1 for f in perf_files)
+    steps['merge_csv_files'].rows = nb_ios
+
+    # calcul_*.py walk both block size categories
+    for category in ('small_size_io', 'big_size_io'):
+        os.makedirs(os.path.join(formatted, category), exist_ok=True)
+
+    # Maths: projection of the power on each IO, then the mean
+    steps['calcul_hdd'].add(run_script([script('maths', 'calcul_hdd.py'), formatted], workdir), rows=nb_ios)
+    steps['calcul_ssd'].add(run_script([script('maths', 'calcul_ssd.py'), formatted], workdir), rows=nb_ios)
+    for perf_file in perf_files:
+        steps['compute_mean'].add(run_script([script('maths', 'compute_mean.py'), perf_file], workdir), rows=count_lines(perf_file) - 1)
+
+    # Plots on the raw campaign tree
+    steps['plot_baseline_passive'].add(run_script([script('plot', 'plot_baseline_passive.py'), campaign_path], workdir))
+    for sz_bloc in sorted({sz_bloc for _, sz_bloc, _, _ in configs}):
+        steps['plot_io_passive'].add(run_script([script('plot', 'plot_io_passive.py'), campaign_path, sz_bloc], workdir))
+    steps['box_plot_io'].add(run_script([script('plot', 'box_plot_io.py'), campaign_path], workdir), rows=nb_ios)
+
+    return steps
+
+# Function to return the git revision of the tree being measured, if any
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Function to load the previous history entries with the same scale
+def load_history(history_file, scale):
+    if not os.path.exists(history_file):
+        return []
+    with open(history_file, 'r') as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    return [entry for entry in entries if entry['scale'] == scale]
+
+# Function to compare a run with the median of the previous runs of the same scale
+def find_regressions(entry, previous, threshold):
+    regressions = []
+    for name, step in entry['steps'].items():
+        history = sorted(p['steps'][name]['wall_s'] for p in previous if name in p['steps'])
+        if not history:
+            continue
+        reference = history[len(history) // 2]
+        if reference > 0 and step['wall_s'] > reference * (1 + threshold):
+            regressions.append((name, reference, step['wall_s']))
+    return regressions
+
+# Main function: generate the campaign, time the pipeline, record and compare the results
+def main(args):
+    workdir = args.workdir or tempfile.mkdtemp(prefix='ioprotocol_bench_')
+    os.makedirs(workdir, exist_ok=True)
+
+    try:
+        generation_start = time.perf_counter()
+        campaign_path, counts = generate_campaign(workdir, storage=args.storage, pattern=args.pattern, seed=args.seed, **SCALES[args.scale])
+        print(f"Synthetic campaign ({args.scale}): {counts['configs']} configurations, {counts['ios']} IOs, "
+              f"{counts['power_samples']} power samples in {time.perf_counter() - generation_start:.1f} s")
+
+        steps = run_pipeline(workdir, campaign_path, args.storage, args.pattern)
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    entry = {
+        'date': datetime.now().astimezone().isoformat(),
+        'revision': git_revision(),
+        'scale': args.scale,
+        'seed': args.seed,
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'campaign': counts,
+        'steps': {name: step.as_dict() for name, step in steps.items()},
+    }
+    entry['total_wall_s'] = sum(step['wall_s'] for step in entry['steps'].values())
+
+    print(f"{'step':<24} {'calls':>6} {'wall (s)':>10} {'cpu (s)':>10} {'rows/s':>10} {'peak RSS (MB)':>14}")
+    for name, step in entry['steps'].items():
+        rate = f"{step['rows_per_s']:.0f}" if step['rows_per_s'] else '-'
+        print(f"{name:<24} {step['calls']:>6} {step['wall_s']:>10.3f} {step['cpu_s']:>10.3f} {rate:>10} {step['peak_rss_mb']:>14.1f}")
+    print(f"{'total':<24} {'':>6} {entry['total_wall_s']:>10.3f}")
+
+    previous = load_history(args.history, args.scale)
+    regressions = find_regressions(entry, previous, args.threshold)
+
+    with open(args.history, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+    print(f"Results appended to {args.history}")
+
+    for name, reference, wall in regressions:
+        print(f"Regression: {name} took {wall:.3f} s, median of the {len(previous)} previous runs is {reference:.3f} s")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+# Entry point of the script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline on a synthetic campaign")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='tiny', help="Campaign size preset (default: tiny)")
+    parser.add_argument('--storage', default='HDD')
+    parser.add_argument('--pattern', default='RAND', help="Access pattern directory name: RAND, SEQ (16 blocks per run), ZIPF, ... (default: RAND)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--history', default='bench_history.jsonl', help="Results history, one JSON line per run")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Slowdown ratio reported as a regression (default: 0.2)")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Exit with status 1 when a step regressed")
+    parser.add_argument('--workdir', help="Keep the generated and formatted data in this directory")
+    parser.add_argument('--keep', action='store_true', help="Do not delete the temporary work directory")
+    main(parser.parse_args())
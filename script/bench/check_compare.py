@@ -0,0 +1,46 @@
+import os  # Import os for the campaign tree
+import sys  # Import sys to locate the comparison and for the exit code
+import shutil  # Import shutil to remove the work directory
+import argparse  # Import argparse for the optional arguments
+import tempfile  # Import tempfile for the default work directory
+
+from synth_campaign import SCALES, generate_campaign  # Synthetic campaign generator
+from bench_pipeline import run_pipeline  # Format and maths steps of format.sh
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'maths'))
+from compare import compare  # Campaign comparison under test
+
+# Two identical campaigns recorded under different run names in one formatted_data tree, as two runs of the same
+# disk before and after a change would be: every configuration must be found on both sides, and none may differ.
+RUNS = ['hddk5', 'hddk6']
+
+# Function to format the same synthetic campaign under each run name and compare the two runs.
+# Returns (configurations in common, configurations on one side only, regressions)
+def replay(workdir, scale):
+    for run in RUNS:
+        campaign_path, _ = generate_campaign(os.path.join(workdir, run), storage=run, **SCALES[scale])
+        run_pipeline(workdir, campaign_path, run, 'RAND')
+
+    formatted = os.path.join(workdir, 'formatted')
+    report, only = compare(*(os.path.join(formatted, run) for run in RUNS), workers=1)
+    common = 0 if report.empty else len(report[['mode', 'pattern', 'sz_bloc', 'filesize']].drop_duplicates())
+    regressions = 0 if report.empty else int((report['verdict'] == 'regression').sum())
+    return common, sum(len(keys) for keys in only.values()), regressions
+
+# Entry point of the script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that two runs with different names are compared configuration by configuration")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='tiny', help="Campaign size preset (default: tiny)")
+    parser.add_argument('--workdir', help="Work directory (default: a temporary directory, removed afterwards)")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='check_compare_')
+    try:
+        common, alone, regressions = replay(workdir, args.scale)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{common} configuration(s) in common, {alone} on one side only, {regressions} regression(s)")
+    if not common or alone or regressions:
+        sys.exit(1)
@@ -0,0 +1,71 @@
+import os  # Import os for the campaign tree
+import sys  # Import sys to locate the monitor and for the exit code
+import glob  # Import glob to list the power traces and timestamp files
+import json  # Import json to read the traces and write the power feed
+import shutil  # Import shutil to move the timestamp files
+import argparse  # Import argparse for the optional arguments
+import tempfile  # Import tempfile for the default work directory
+
+from synth_campaign import SCALES, generate_campaign  # Synthetic campaign generator
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'maths'))
+from live_monitor import LiveMonitor  # Streaming monitor under test
+
+# Replay of a campaign in the order benchmark.sh produces its files: the power feed grows during the IOs, and the
+# timestamp files of an iteration only appear in io_timestamp/ once it has ended. The whole power trace is fed
+# first, then the iterations one by one; every IO must still find its power samples.
+
+# Function to write every power sample of the campaign, in chronological order, as a JSON lines feed
+def write_power_feed(campaign_path, feed):
+    samples = []
+    for trace in glob.glob(os.path.join(campaign_path, '*_size_io', '*', '*.json')) + [os.path.join(campaign_path, 'baseline', 'baseline.json')]:
+        with open(trace) as f:
+            samples.extend(json.load(f))
+    samples.sort(key=lambda sample: sample['timestamp'])
+    with open(feed, 'w') as f:
+        for sample in samples:
+            f.write(json.dumps({'timestamp': sample['timestamp'], 'value': sample['value']}) + '\n')
+
+# Function to replay a campaign into the monitor and return (IOs written, IOs summarized, IOs dropped)
+def replay(campaign_path, workdir):
+    feed = os.path.join(workdir, 'power_feed.jsonl')
+    write_power_feed(campaign_path, feed)
+
+    # Hide the timestamp files, they are moved back one iteration at a time
+    timestamp_dir = os.path.join(campaign_path, 'io_timestamp')
+    staging = os.path.join(workdir, 'staging')
+    shutil.move(timestamp_dir, staging)
+    os.makedirs(timestamp_dir)
+
+    monitor = LiveMonitor(campaign_path, feed)
+    monitor.poll()
+    written = 0
+    for begin in sorted(glob.glob(os.path.join(staging, 'io_begin_*.json'))):
+        end = begin.replace('io_begin_', 'io_end_')
+        with open(begin) as f:
+            written += sum(1 for line in f if line.strip())
+        shutil.move(end, timestamp_dir)
+        shutil.move(begin, timestamp_dir)
+        monitor.poll()
+
+    summarized = sum(stats.latency.stats.count for stats in monitor.configs.values())
+    return written, summarized, monitor.dropped
+
+# Entry point of the script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that the live monitor keeps the power of the IOs read after their iteration")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='tiny', help="Campaign size preset (default: tiny)")
+    parser.add_argument('--workdir', help="Work directory (default: a temporary directory, removed afterwards)")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='check_live_monitor_')
+    try:
+        campaign_path, _ = generate_campaign(workdir, **SCALES[args.scale])
+        written, summarized, dropped = replay(campaign_path, workdir)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{written} IO(s) written, {summarized} summarized, {dropped} dropped")
+    if dropped or summarized != written:
+        sys.exit(1)
@@ -0,0 +1,131 @@
+import os  # Import os for the directory tree
+import sys  # Import sys to locate the shared modules
+import json  # Import json to write the wattmeter traces
+import argparse  # Import argparse for the optional arguments
+import numpy as np  # Import numpy to generate the timestamps and power values in bulk
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common import manifest  # Manifest of the campaign, as written by benchmark.sh
+from common.layout import block_category  # small_size_io / big_size_io directory of a block size
+
+# Block sizes of benchmark.sh
+SMALL_BLOCKS = ['1s', '8k', '16k', '128k', '512k']
+BIG_BLOCKS = ['1M', '2M', '4M', '8M']
+
+# Campaign sizes: block sizes, file sizes, iterations, IOs per iteration, power rate (Hz), pause between iterations (s)
+SCALES = {
+    'tiny': dict(block_sizes=['8k', '1M'], file_sizes=['256M'], iterations=3, nb_run=20, rate_hz=20, gap_s=2),
+    'small': dict(block_sizes=['1s', '128k', '1M', '8M'], file_sizes=['256M', '1G'], iterations=5, nb_run=100, rate_hz=50, gap_s=10),
+    'full': dict(block_sizes=SMALL_BLOCKS + BIG_BLOCKS, file_sizes=['256M', '1G', '4G'], iterations=10, nb_run=100, rate_hz=50, gap_s=90),
+}
+
+# Local time offset written by iotest (format_timestamp prints the hour offset as +HH:00)
+UTC_OFFSET_H = 2
+NS = 1_000_000_000
+
+# Function to format int64 nanoseconds (UTC) the way iotest and the Grid5000 API do
+def format_ns(timestamps_ns):
+    local = (np.asarray(timestamps_ns, dtype=np.int64) + UTC_OFFSET_H * 3600 * NS).astype('datetime64[ns]')
+    strings = np.datetime_as_string(local, unit='us')
+    return [f'{s}+{UTC_OFFSET_H:02d}:00' for s in strings]
+
+# Function to generate a wattmeter trace between two instants, in the API JSON format
+def power_trace(rng, start_ns, end_ns, rate_hz, node, idle_watt=95.0):
+    period_ns = NS // rate_hz
+    timestamps = np.arange(start_ns, end_ns + period_ns, period_ns, dtype=np.int64)
+    values = np.round(idle_watt + rng.normal(0.0, 1.5, len(timestamps)), 2)
+    return [
+        {'timestamp': ts, 'device_id': node, 'metric_id': 'wattmetre_power_watt', 'value': float(value), 'labels': {}}
+        for ts, value in zip(format_ns(timestamps), values)
+    ]
+
+# Function to generate the IO timestamps of one iteration: nb_run * nb_bloc back-to-back IOs
+def io_timestamps(rng, start_ns, nb_io, mean_latency_s):
+    latencies = rng.gamma(4.0, mean_latency_s / 4.0, nb_io)
+    gaps = rng.exponential(mean_latency_s / 10.0, nb_io)  # sync() and drop_caches between two IOs
+    begins = start_ns + np.concatenate(([0], np.cumsum((latencies + gaps)[:-1] * NS))).astype(np.int64)
+    ends = begins + (latencies * NS).astype(np.int64)
+    return begins, ends
+
+# Function to give a plausible latency to a block size (HDD seek plus transfer)
+def mean_latency(sz_bloc):
+    units = {'s': 512, 'k': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    size = int(sz_bloc[:-1]) * units[sz_bloc[-1]]
+    return 0.005 + size / 150e6
+
+# Function to write a campaign tree laid out like benchmark.sh output
+def generate_campaign(output_dir, storage='HDD', mode='READ', pattern='RAND', block_sizes=None, file_sizes=None,
+                      iterations=3, nb_run=20, rate_hz=20, gap_s=2, seed=0, node='synth-1'):
+    rng = np.random.default_rng(seed)
+    block_sizes = block_sizes or SMALL_BLOCKS + BIG_BLOCKS
+    file_sizes = file_sizes or ['256M', '1G', '4G']
+    nb_bloc = 16 if pattern == 'SEQ' else 1
+
+    path = os.path.join(output_dir, 'logs', storage, mode, pattern)
+    os.makedirs(os.path.join(path, 'baseline'), exist_ok=True)
+    os.makedirs(os.path.join(path, 'io_timestamp'), exist_ok=True)
+    manifest.create(path, {'storage': storage, 'node': node, 'run': storage, 'mode': mode, 'pattern': pattern,
+                           'nb_bloc': nb_bloc, 'max_rep': iterations, 'nb_run_small': nb_run, 'nb_run_big': nb_run},
+                    block_sizes, file_sizes, source='synthetic')
+
+    # Fixed start so that two runs with the same seed produce the same tree
+    clock = np.int64(1717228800) * NS
+    counts = {'power_samples': 0, 'ios': 0, 'configs': 0}
+
+    # Baseline, a tenth of the 15 minutes of benchmark.sh
+    baseline = power_trace(rng, clock, clock + 90 * NS, rate_hz, node)
+    with open(os.path.join(path, 'baseline', 'baseline.json'), 'w') as f:
+        json.dump(baseline, f)
+    counts['power_samples'] += len(baseline)
+    clock += 91 * NS
+
+    for sz_bloc in block_sizes:
+        category = block_category(sz_bloc)
+        for filesize in file_sizes:
+            block_start = clock
+            perf_dir = os.path.join(path, category, f'{mode}_{sz_bloc}', filesize, 'perf')
+            os.makedirs(perf_dir, exist_ok=True)
+
+            for rep in range(1, iterations + 1):
+                begins, ends = io_timestamps(rng, clock, nb_run * nb_bloc, mean_latency(sz_bloc))
+                name = f'{sz_bloc}_{filesize}_iteration_{rep:02d}.json'
+                with open(os.path.join(path, 'io_timestamp', f'io_begin_{name}'), 'w') as f:
+                    f.write('\n'.join(format_ns(begins)) + '\n')
+                with open(os.path.join(path, 'io_timestamp', f'io_end_{name}'), 'w') as f:
+                    f.write('\n'.join(format_ns(ends)) + '\n')
+
+                # Same summary line as iotest's print_mean_stdev
+                latencies_ms = (ends - begins) / 1e6
+                q1, median, q3 = np.percentile(latencies_ms, [25, 50, 75])
+                with open(os.path.join(perf_dir, 'results.csv'), 'a') as f:
+                    f.write(f"Mean: {latencies_ms.mean():.7f} ms     95% CI: ±{2 * latencies_ms.std() / np.sqrt(len(latencies_ms)):.7f} ms     "
+                            f"Q1: {q1:.7f} ms     Median: {median:.7f} ms     Q3: {q3:.7f} ms\n")
+
+                counts['ios'] += len(begins)
+                clock = ends[-1] + gap_s * NS
+
+            # One power file per (sz_bloc, filesize), fetched after the last iteration
+            trace = power_trace(rng, block_start - NS, clock, rate_hz, node)
+            with open(os.path.join(path, category, f'{mode}_{sz_bloc}', f'{mode}_{filesize}.json'), 'w') as f:
+                json.dump(trace, f)
+            counts['power_samples'] += len(trace)
+            counts['configs'] += 1
+            manifest.record(path, sz_bloc, filesize, iterations, int(block_start) / NS, int(clock) / NS, category)
+
+    manifest.finish(path)
+    return path, counts
+
+# Entry point of the script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic campaign tree with the layout of benchmark.sh")
+    parser.add_argument('output_dir', help="Directory where logs/<storage>/<mode>/<pattern> is created")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='tiny', help="Campaign size preset (default: tiny)")
+    parser.add_argument('--storage', default='HDD')
+    parser.add_argument('--mode', choices=['READ', 'WRITE'], default='READ', help="Mode directory and prefix of the configurations (default: READ)")
+    parser.add_argument('--pattern', default='RAND', help="Access pattern directory name: RAND, SEQ (16 blocks per run), ZIPF, ... (default: RAND)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    path, counts = generate_campaign(args.output_dir, storage=args.storage, mode=args.mode, pattern=args.pattern, seed=args.seed, **SCALES[args.scale])
+    print(f"Synthetic campaign written to {path}: {counts['configs']} configurations, "
+          f"{counts['ios']} IOs, {counts['power_samples']} power samples")
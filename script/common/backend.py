@@ -0,0 +1,15 @@
+import os  # Import os to look for a display
+import importlib.util  # Import importlib.util to check for a Qt binding without importing it
+
+# Function to select the matplotlib backend before pyplot is imported.
+# Interactive scripts get Qt5Agg only when a display and a Qt binding are available,
+# otherwise (headless nodes, batch runs) they fall back to Agg and just write the files.
+def use_backend(interactive=False):
+    import matplotlib
+
+    has_display = bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+    has_qt = any(importlib.util.find_spec(binding) for binding in ('PyQt5', 'PySide2'))
+    backend = 'Qt5Agg' if interactive and has_display and has_qt else 'Agg'
+
+    matplotlib.use(backend)
+    return backend
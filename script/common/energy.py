@@ -0,0 +1,55 @@
+import numpy as np  # Import numpy for the vectorized projection and integration
+import pandas as pd  # Import pandas to parse the ISO8601 timestamps
+
+# Vectorized energy engine: every function works on whole arrays of IOs at once,
+# with timestamps as int64 nanoseconds since epoch (UTC) and a power trace sorted by time (common.trace.Trace).
+
+NS_PER_S = 1e9
+
+# Function to convert ISO8601 strings (any offset) to int64 nanoseconds since epoch (UTC)
+def to_epoch_ns(timestamps):
+    return pd.DatetimeIndex(pd.to_datetime(timestamps, format='ISO8601', utc=True)).as_unit('ns').asi8
+
+# Function to project the power on the begin and end of each IO.
+# As in calcul_*.py, A is the last sample at or before the begin, B the first sample at or after the end,
+# and the power is read on the line (A, B). IOs not bracketed by the trace get NaN.
+def project_power(timestamps, watts, begins, ends):
+    begins = np.asarray(begins, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+
+    a = np.searchsorted(timestamps, begins, side='right') - 1
+    b = np.searchsorted(timestamps, ends, side='left')
+    valid = (a >= 0) & (b < len(timestamps))
+    a_idx = np.clip(a, 0, len(timestamps) - 1)
+    b_idx = np.clip(b, 0, len(timestamps) - 1)
+
+    ta, tb = timestamps[a_idx], timestamps[b_idx]
+    wa, wb = watts[a_idx], watts[b_idx]
+    span = (tb - ta).astype(np.float64)
+    slope = np.divide(wb - wa, span, out=np.zeros_like(span), where=span > 0)
+
+    begin_power = wa + slope * (begins - ta)
+    end_power = wa + slope * (ends - ta)
+    begin_power[~valid] = np.nan
+    end_power[~valid] = np.nan
+    return begin_power, end_power
+
+# Function to precompute the energy (J) from the first sample to every sample, trapezoids between samples.
+# Returns the relative sample times (s) and the cumulative energy, to be passed to energy_until.
+def cumulative_energy(timestamps, watts):
+    t = (timestamps - timestamps[0]) / NS_PER_S  # Relative seconds keep the float precision
+    return t, np.concatenate(([0.0], np.cumsum((watts[1:] + watts[:-1]) / 2 * np.diff(t))))
+
+# Function to return the energy (J) from the first sample to each instant x (ns), clipped to the trace
+def energy_until(timestamps, watts, cumulative, x):
+    t, energy = cumulative
+    x = np.clip((np.asarray(x, dtype=np.int64) - timestamps[0]) / NS_PER_S, t[0], t[-1])
+    j = np.clip(np.searchsorted(t, x, side='right') - 1, 0, len(t) - 1)
+    w = np.interp(x, t, watts)
+    return energy[j] + (watts[j] + w) / 2 * (x - t[j])
+
+# Function to integrate the power (J) over many [begin, end] windows, linear interpolation between samples.
+# Windows are clipped to the trace; a window fully outside of it gets 0.
+def window_energy(timestamps, watts, begins, ends):
+    cumulative = cumulative_energy(timestamps, watts)
+    return energy_until(timestamps, watts, cumulative, ends) - energy_until(timestamps, watts, cumulative, begins)
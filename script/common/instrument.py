@@ -0,0 +1,110 @@
+import os  # Import os for the environment variables and process id
+import sys  # Import sys to name the running script
+import json  # Import json to write the machine-readable report
+import time  # Import time for the wall-clock and CPU timers
+import resource  # Import resource to read the peak resident memory
+import cProfile  # Import cProfile for the optional per-stage profile dump
+from contextlib import contextmanager  # Import contextmanager to build the stage timer
+from datetime import datetime  # Import datetime to timestamp the report entries
+
+# Instrumentation is off unless one of these variables is set, so the scripts keep their usual output:
+#   IOPROTOCOL_PROFILE=<report.jsonl>  append one JSON line per stage (time, rows/s, peak RSS)
+#   IOPROTOCOL_CPROFILE=<directory>    also dump a cProfile file per stage in this directory
+PROFILE_ENV = 'IOPROTOCOL_PROFILE'
+CPROFILE_ENV = 'IOPROTOCOL_CPROFILE'
+
+# Function to tell whether the stage report is enabled
+def enabled():
+    return bool(os.environ.get(PROFILE_ENV) or os.environ.get(CPROFILE_ENV))
+
+# Function to return the peak resident memory of the process in MB
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+# Mutable record yielded by stage(), the caller adds the number of processed rows to it
+class StageRecord:
+    def __init__(self, name, rows=0):
+        self.name = name
+        self.rows = rows
+
+# Context manager timing a stage of a script and appending the result to the report
+@contextmanager
+def stage(name, rows=0):
+    record = StageRecord(name, rows)
+    if not enabled():
+        yield record
+        return
+
+    script = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    profile_dir = os.environ.get(CPROFILE_ENV)
+    profiler = cProfile.Profile() if profile_dir else None
+
+    started = datetime.now().astimezone()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    if profiler:
+        profiler.enable()
+    try:
+        yield record
+    finally:
+        if profiler:
+            profiler.disable()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+        entry = {
+            'script': script,
+            'stage': name,
+            'pid': os.getpid(),
+            'start': started.isoformat(),
+            'wall_s': wall,
+            'cpu_s': cpu,
+            'rows': record.rows,
+            'rows_per_s': record.rows / wall if wall > 0 else None,
+            'peak_rss_mb': peak_rss_mb(),
+            'argv': sys.argv[1:],
+        }
+
+        if profiler:
+            os.makedirs(profile_dir, exist_ok=True)
+            profile_file = os.path.join(profile_dir, f'{script}_{name}_{os.getpid()}.prof')
+            profiler.dump_stats(profile_file)
+            entry['profile'] = profile_file
+
+        report = os.environ.get(PROFILE_ENV)
+        if report:
+            # One line per stage, appended so that every script of a pipeline shares the same report
+            with open(report, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+
+# Function to summarize a report: total time, rows and peak memory per (script, stage)
+def summarize(report):
+    totals = {}
+    with open(report, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            key = (entry['script'], entry['stage'])
+            total = totals.setdefault(key, {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0, 'peak_rss_mb': 0.0})
+            total['calls'] += 1
+            total['wall_s'] += entry['wall_s']
+            total['cpu_s'] += entry['cpu_s']
+            total['rows'] += entry['rows'] or 0
+            total['peak_rss_mb'] = max(total['peak_rss_mb'], entry['peak_rss_mb'])
+    return totals
+
+# Entry point: print the summary of a report, slowest stages first
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python instrument.py <report.jsonl>")
+        sys.exit(1)
+
+    totals = summarize(sys.argv[1])
+    print(f"{'script':<28} {'stage':<26} {'calls':>6} {'wall (s)':>10} {'cpu (s)':>10} {'rows':>10} {'rows/s':>10} {'peak RSS (MB)':>14}")
+    for (script, name), total in sorted(totals.items(), key=lambda item: -item[1]['wall_s']):
+        rate = total['rows'] / total['wall_s'] if total['wall_s'] > 0 else 0.0
+        print(f"{script:<28} {name:<26} {total['calls']:>6} {total['wall_s']:>10.3f} {total['cpu_s']:>10.3f} "
+              f"{total['rows']:>10} {rate:>10.0f} {total['peak_rss_mb']:>14.1f}")
@@ -0,0 +1,58 @@
+import os  # Import os for the paths of the raw campaign tree
+
+# Campaign layout shared by the scripts: directory names and size parsing, as in benchmark.sh and iotest.c.
+# The block and file sizes of a campaign are read from its manifest (common/manifest.py).
+
+SECTOR_SIZE = 512
+
+# Modes of iotest (--mode r|w): the directory of a campaign under its run, logs/<run>/<mode>/<pattern>, and the
+# prefix of its configuration directories and power traces, <category>/<MODE>_<sz_bloc>/<MODE>_<filesize>.json.
+# Campaigns recorded before the prefix followed the mode name every configuration READ_*, whatever their mode.
+MODES = ['READ', 'WRITE']
+LEGACY_PREFIX = 'READ'
+
+# Separator of the IO path and readahead hint of the campaigns run through the page cache or mmap (IO_PATH and
+# ADVICE of benchmark.sh), recorded in the mode: READ-BUFFERED, READ-MMAP-SEQUENTIAL. A plain mode is O_DIRECT.
+MODE_SEPARATOR = '-'
+
+# Separator between the storage and the node in the run directory of a multi-node campaign (HDD@taurus-3)
+NODE_SEPARATOR = '@'
+
+# Function to convert a size argument to bytes, same suffixes as get_val_arg in tools.h ('s' = 512 bytes)
+def parse_size(size):
+    units = {'s': SECTOR_SIZE, 'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30}
+    size = str(size).strip()
+    if size and size[-1].lower() in units:
+        return int(size[:-1]) * units[size[-1].lower()]
+    return int(size)
+
+# Function to return the directory category of a block size
+def block_category(sz_bloc):
+    return 'small_size_io' if parse_size(sz_bloc) < (1 << 20) else 'big_size_io'
+
+# Function to split a mode into its operation, IO path and readahead hint: READ-MMAP-WILLNEED -> READ, mmap, willneed
+def split_mode(mode):
+    operation, *variant = mode.upper().split(MODE_SEPARATOR)
+    io_path = variant[0].lower() if variant else 'direct'
+    advice = variant[1].lower() if len(variant) > 1 else 'none'
+    return operation, io_path, advice
+
+# Function to return the mode of a raw logs/<run>/<mode>/<pattern> directory
+def log_mode(log_dir):
+    return os.path.basename(os.path.dirname(os.path.normpath(log_dir))).upper()
+
+# Function to return the power trace of a configuration of a raw logs/<run>/<mode>/<pattern> directory, or None.
+# Both categories are looked at, and the READ_ names of the campaigns recorded before the mode prefix.
+def power_file(log_dir, sz_bloc, filesize):
+    for prefix in dict.fromkeys([log_mode(log_dir), LEGACY_PREFIX]):
+        for category in (block_category(sz_bloc), 'small_size_io', 'big_size_io'):
+            path = os.path.join(log_dir, category, f'{prefix}_{sz_bloc}', f'{prefix}_{filesize}.json')
+            if os.path.exists(path):
+                return path
+    return None
+
+
+# Function to split a run directory name into its storage and node (None for a single-node run)
+def split_run(run):
+    storage, _, node = run.partition(NODE_SEPARATOR)
+    return storage, node or None
@@ -0,0 +1,276 @@
+import os  # Import os for the campaign paths and the block device of the campaign
+import re  # Import re to parse the names of the IO timestamp files
+import sys  # Import sys for the command-line output
+import json  # Import json for the manifest files
+import time  # Import time for the timestamps of the run
+import socket  # Import socket for the node name
+import argparse  # Import argparse for the commands called by benchmark.sh and format.sh
+import platform  # Import platform for the kernel and the Python version
+import subprocess  # Import subprocess for the versions of gcc and of the protocol
+from importlib import metadata  # Versions of the installed Python packages
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.layout import block_category, log_mode, parse_size, split_mode, split_run  # Campaign layout
+
+# Manifest of a campaign, logs/<run>/<mode>/<pattern>/manifest.json, written by benchmark.sh while it measures:
+#   parameters:     options of benchmark.sh (storage, node, mode, IO path, pattern, sizes, repetitions...)
+#   environment:    node, kernel, CPU, memory, block device under the working directory, tool versions
+#   started, finished: wall-clock time of the campaign (ISO 8601, UTC)
+#   configurations: one entry per measured (sz_bloc, filesize): category, iterations run, start and end (epoch s)
+# format.sh copies it to formatted_data/<run>/<mode>/manifest_<pattern>.json. The scripts list the configurations of
+# a campaign from it; the campaigns recorded before the manifest get one rebuilt from the files of their tree.
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+TIMESTAMP_FILE = re.compile(r'io_begin_(?P<sz_bloc>[^_]+)_(?P<filesize>[^_]+)_iteration_(?P<iteration>\d+)\.json$')
+
+# Function to return the current time as an ISO 8601 UTC string
+def now():
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+# Function to read the first line of a file, None when it is missing or unreadable
+def read_first_line(path):
+    try:
+        with open(path) as f:
+            return f.readline().strip() or None
+    except OSError:
+        return None
+
+# Function to run a command and return the first line of its output, None when it fails
+def command_line(args):
+    try:
+        result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.splitlines()[0].strip() if result.returncode == 0 and result.stdout else None
+
+# Function to describe the block device holding a path (the whole disk of a partition), from /sys/dev/block
+def block_device(path):
+    st_dev = os.stat(path).st_dev
+    sys_dir = os.path.realpath(f'/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}')
+    if not os.path.isdir(sys_dir):
+        return {}
+    if os.path.exists(os.path.join(sys_dir, 'partition')):
+        sys_dir = os.path.dirname(sys_dir)
+    sectors = read_first_line(os.path.join(sys_dir, 'size'))
+    scheduler = read_first_line(os.path.join(sys_dir, 'queue', 'scheduler'))
+    return {'name': os.path.basename(sys_dir),
+            'model': read_first_line(os.path.join(sys_dir, 'device', 'model')),
+            'vendor': read_first_line(os.path.join(sys_dir, 'device', 'vendor')),
+            'rotational': read_first_line(os.path.join(sys_dir, 'queue', 'rotational')) == '1',
+            'scheduler': re.search(r'\[(\w[\w-]*)\]', scheduler).group(1) if scheduler and '[' in scheduler else scheduler,
+            'size_bytes': int(sectors) * 512 if sectors and sectors.isdigit() else None}
+
+# Function to read a field of /proc/cpuinfo or /proc/meminfo
+def proc_field(path, field):
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name.strip() == field:
+                    return value.strip()
+    except OSError:
+        pass
+    return None
+
+# Function to return the version of an installed Python package, None when it is not installed
+def package_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+# Function to capture the environment of the measurements: node, kernel, CPU, memory, device and tool versions
+def environment(path='.'):
+    repo = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+    memory = proc_field('/proc/meminfo', 'MemTotal')
+    return {'node': socket.gethostname().split('.')[0],
+            'kernel': platform.release(),
+            'kernel_version': platform.version(),
+            'machine': platform.machine(),
+            'cpu': proc_field('/proc/cpuinfo', 'model name'),
+            'cpus': os.cpu_count(),
+            'memory_bytes': int(memory.split()[0]) * 1024 if memory else None,
+            'device': block_device(path),
+            'tools': {'python': platform.python_version(),
+                      'numpy': package_version('numpy'),
+                      'pandas': package_version('pandas'),
+                      'gcc': command_line(['gcc', '--version']),
+                      'protocol': command_line(['git', '-C', repo, 'describe', '--always', '--dirty'])}}
+
+# Function to return the manifest file of a raw logs/<run>/<mode>/<pattern> directory, or the file itself
+def manifest_path(path):
+    return os.path.join(path, MANIFEST_NAME) if os.path.isdir(path) else path
+
+# Function to read a manifest (raw directory or manifest file), None when there is none
+def load(path):
+    path = manifest_path(path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+# Function to write a manifest atomically, so that a reader never sees a partial file
+def save(path, manifest):
+    path = manifest_path(path)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temporary, path)
+
+# Function to create the manifest of a campaign at the start of benchmark.sh
+def create(log_dir, parameters, block_sizes=(), file_sizes=(), source='benchmark'):
+    manifest = {'version': MANIFEST_VERSION, 'source': source,
+                'parameters': dict(parameters, block_sizes=list(block_sizes), file_sizes=list(file_sizes)),
+                'environment': environment(), 'started': now(), 'finished': None, 'configurations': []}
+    save(log_dir, manifest)
+    return manifest
+
+# Function to add a measured configuration to the manifest, once its power trace is saved
+def record(log_dir, sz_bloc, filesize, iterations, start=None, end=None, category=None):
+    manifest = load(log_dir)
+    manifest['configurations'].append({'sz_bloc': sz_bloc, 'filesize': filesize, 'category': category or block_category(sz_bloc),
+                                       'iterations': iterations, 'start': start, 'end': end})
+    save(log_dir, manifest)
+
+# Function to mark the campaign as finished
+def finish(log_dir):
+    manifest = load(log_dir)
+    manifest['finished'] = now()
+    save(log_dir, manifest)
+
+# Function to rebuild the manifest of a campaign recorded without one, from its IO timestamp files and power traces
+def discover(log_dir):
+    iterations = {}
+    timestamp_dir = os.path.join(log_dir, 'io_timestamp')
+    for name in sorted(os.listdir(timestamp_dir)) if os.path.isdir(timestamp_dir) else []:
+        match = TIMESTAMP_FILE.match(name)
+        if match:
+            key = (match.group('sz_bloc'), match.group('filesize'))
+            iterations[key] = max(iterations.get(key, 0), int(match.group('iteration')))
+
+    # Power traces <category>/<MODE>_<sz_bloc>/<MODE>_<filesize>.json, whatever their prefix
+    categories = {}
+    for category in ('small_size_io', 'big_size_io'):
+        category_dir = os.path.join(log_dir, category)
+        for config in sorted(os.listdir(category_dir)) if os.path.isdir(category_dir) else []:
+            prefix, _, sz_bloc = config.rpartition('_')
+            for name in os.listdir(os.path.join(category_dir, config)):
+                if name.startswith(f'{prefix}_') and name.endswith('.json'):
+                    key = (sz_bloc, name[len(prefix) + 1:-len('.json')])
+                    categories[key] = category
+                    iterations.setdefault(key, 0)
+
+    run = os.path.basename(os.path.dirname(os.path.dirname(os.path.normpath(log_dir))))
+    storage, node = split_run(run)
+    operation, io_path, advice = split_mode(log_mode(log_dir))
+    configurations = [{'sz_bloc': sz_bloc, 'filesize': filesize, 'category': categories.get((sz_bloc, filesize), block_category(sz_bloc)),
+                       'iterations': count, 'start': None, 'end': None}
+                      for (sz_bloc, filesize), count in sort_configurations(iterations)]
+    parameters = {'storage': storage, 'node': node, 'mode': log_mode(log_dir), 'operation': operation, 'io_path': io_path,
+                  'advice': advice, 'pattern': os.path.basename(os.path.normpath(log_dir)),
+                  'block_sizes': unique(config['sz_bloc'] for config in configurations),
+                  'file_sizes': unique(config['filesize'] for config in configurations)}
+    return {'version': MANIFEST_VERSION, 'source': 'discovered', 'parameters': parameters, 'environment': None,
+            'started': None, 'finished': None, 'configurations': configurations}
+
+# Function to sort {(sz_bloc, filesize): value} items by block size, then file size
+def sort_configurations(items):
+    return sorted(items.items(), key=lambda item: (parse_size(item[0][0]), parse_size(item[0][1])))
+
+# Function to return the distinct values of an iterable, in order, sorted by size
+def unique(values):
+    return sorted(dict.fromkeys(values), key=parse_size)
+
+# Function to return the manifest of a raw directory, rebuilt from its files when it has none
+def read(log_dir):
+    return load(log_dir) or discover(log_dir)
+
+# Function to list the measured configurations of a raw logs/<run>/<mode>/<pattern> directory
+def configurations(log_dir):
+    return read(log_dir)['configurations']
+
+# Function to list the block sizes measured in a raw directory
+def block_sizes(log_dir):
+    return unique(config['sz_bloc'] for config in configurations(log_dir))
+
+# Function to list the file sizes measured in a raw directory, for one block size or for all of them
+def file_sizes(log_dir, sz_bloc=None):
+    return unique(config['filesize'] for config in configurations(log_dir) if sz_bloc is None or config['sz_bloc'] == sz_bloc)
+
+# Function to return the manifest file of a pattern in a formatted formatted_data/<run>/<mode> directory
+def formatted_path(mode_dir, pattern):
+    return os.path.join(mode_dir, f'manifest_{pattern}.json')
+
+# Function to list the file sizes of a (sz_bloc, pattern) of a formatted formatted_data/<run>/<mode> directory: from
+# the manifest copied by format.sh, or from the directories of the trees formatted before the manifest
+def formatted_file_sizes(mode_dir, pattern, sz_bloc):
+    manifest = load(formatted_path(mode_dir, pattern))
+    if manifest is not None:
+        return unique(config['filesize'] for config in manifest['configurations'] if config['sz_bloc'] == sz_bloc)
+    found = set()
+    for category in ('small_size_io', 'big_size_io'):
+        access_dir = os.path.join(mode_dir, category, sz_bloc, pattern)
+        if os.path.isdir(access_dir):
+            found.update(name for name in os.listdir(access_dir) if name != 'baseline' and os.path.isdir(os.path.join(access_dir, name)))
+    return unique(found)
+
+# Function to parse the KEY=VALUE parameters of the create command (JSON values, strings otherwise)
+def parse_parameters(pairs):
+    parameters = {}
+    for pair in pairs:
+        key, _, value = pair.partition('=')
+        try:
+            parameters[key] = json.loads(value)
+        except ValueError:
+            parameters[key] = value
+    return parameters
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(description="Manifest of a campaign: parameters, environment and measured configurations")
+    commands = parser.add_subparsers(dest='command', required=True)
+    sub = commands.add_parser('create', help="Create the manifest at the start of a campaign")
+    sub.add_argument('log_dir', help="logs/<run>/<mode>/<pattern> directory")
+    sub.add_argument('--set', dest='parameters', action='append', default=[], metavar='KEY=VALUE', help="Parameter of the campaign (repeatable)")
+    sub.add_argument('--block-sizes', nargs='*', default=[], help="Block sizes of the campaign")
+    sub.add_argument('--file-sizes', nargs='*', default=[], help="File sizes of the campaign")
+    sub = commands.add_parser('record', help="Add a measured configuration")
+    sub.add_argument('log_dir')
+    sub.add_argument('--sz-bloc', required=True)
+    sub.add_argument('--filesize', required=True)
+    sub.add_argument('--iterations', type=int, required=True, help="Iterations run")
+    sub.add_argument('--category', choices=['small_size_io', 'big_size_io'])
+    sub.add_argument('--start', type=float, help="Start of the configuration (epoch s)")
+    sub.add_argument('--end', type=float, help="End of the configuration (epoch s)")
+    sub = commands.add_parser('finish', help="Mark the campaign as finished")
+    sub.add_argument('log_dir')
+    sub = commands.add_parser('configs', help="Print the measured configurations: category sz_bloc filesize iterations")
+    sub.add_argument('log_dir')
+    sub = commands.add_parser('show', help="Print the manifest, or the one rebuilt from the files")
+    sub.add_argument('log_dir')
+    sub = commands.add_parser('export', help="Write the manifest, or the one rebuilt from the files, to a file")
+    sub.add_argument('log_dir')
+    sub.add_argument('output')
+    return parser
+
+# Function to run a parsed command line
+def main(args):
+    if args.command == 'create':
+        create(args.log_dir, parse_parameters(args.parameters), args.block_sizes, args.file_sizes)
+    elif args.command == 'record':
+        record(args.log_dir, args.sz_bloc, args.filesize, args.iterations, args.start, args.end, args.category)
+    elif args.command == 'finish':
+        finish(args.log_dir)
+    elif args.command == 'configs':
+        for config in configurations(args.log_dir):
+            print(config['category'], config['sz_bloc'], config['filesize'], config['iterations'])
+    elif args.command == 'show':
+        json.dump(read(args.log_dir), sys.stdout, indent=2)
+        print()
+    else:
+        save(args.output, read(args.log_dir))
+
+# Entry point of the script
+if __name__ == "__main__":
+    main(build_parser().parse_args())
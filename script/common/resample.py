@@ -0,0 +1,134 @@
+import os  # Import os for the cache paths
+import sys  # Import sys for the command-line entry point
+import hashlib  # Import hashlib to name the cache entries
+import argparse  # Import argparse for the command-line options
+import numpy as np  # Import numpy for the grid and the interpolation
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.energy import NS_PER_S, cumulative_energy, energy_until  # Interpolated integral of the power
+from common.trace import Trace  # Array-backed power trace
+
+# Resampling of power traces to a uniform time grid. The grid points are multiples of the step since the epoch,
+# so traces of different nodes or metrics resampled with the same step share their timestamps.
+#   linear:   power interpolated on the line between the samples around each grid point
+#   previous: last sample at or before each grid point (the wattmeter value being displayed)
+#   area:     mean power over [t, t + step), so the energy of the trace is preserved bin by bin
+METHODS = ['linear', 'previous', 'area']
+
+# Grid points computed at once, bounds the temporary arrays of long traces
+CHUNK_SIZE = 1 << 20
+
+# Cache of the resampled traces, keyed on the source file, its mtime and size, the step and the method
+CACHE_DIR = os.environ.get('IOPROTOCOL_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'ioprotocol', 'resample'))
+
+# Function to convert a duration argument to nanoseconds ('20ms', '1s', '500us', '100ns', or seconds)
+def parse_duration(duration):
+    units = {'ns': 1, 'us': 1_000, 'ms': 1_000_000, 's': 1_000_000_000, 'min': 60_000_000_000}
+    duration = str(duration).strip().lower()
+    for suffix in sorted(units, key=len, reverse=True):
+        if duration.endswith(suffix):
+            return int(round(float(duration[:-len(suffix)]) * units[suffix]))
+    return int(round(float(duration) * NS_PER_S))
+
+# Function to return the grid points between start and end (ns), aligned on multiples of step
+def make_grid(start, end, step):
+    first = -(-int(start) // step) * step
+    return first, max(0, (int(end) - first) // step + 1)
+
+# Function to resample a trace to a uniform grid of step nanoseconds, by chunks of CHUNK_SIZE points.
+# The grid covers [start, end] (default: the trace), restricted to where the method is defined.
+def resample(trace, step, method='linear', start=None, end=None, chunk_size=CHUNK_SIZE):
+    if method not in METHODS:
+        raise ValueError(f"Unknown resampling method {method} (choose from {', '.join(METHODS)})")
+    step = int(step)
+    timestamps, watts = trace.timestamps, trace.watts
+    if len(trace) < 2:
+        return Trace(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), trace.node, trace.metric, NS_PER_S / step)
+
+    start = timestamps[0] if start is None else max(int(start), timestamps[0])
+    end = timestamps[-1] if end is None else min(int(end), timestamps[-1])
+    if method == 'area':
+        end -= step  # The last bin [t, t + step) must end inside the trace
+    first, count = make_grid(start, end, step)
+
+    grid = first + step * np.arange(count, dtype=np.int64)
+    values = np.empty(count, dtype=np.float32)
+    cumulative = cumulative_energy(timestamps, watts) if method == 'area' else None
+    relative = (timestamps - timestamps[0]) / NS_PER_S if method == 'linear' else None
+
+    for lo in range(0, count, chunk_size):
+        points = grid[lo:lo + chunk_size]
+        if method == 'linear':
+            values[lo:lo + len(points)] = np.interp((points - timestamps[0]) / NS_PER_S, relative, watts)
+        elif method == 'previous':
+            values[lo:lo + len(points)] = watts[np.searchsorted(timestamps, points, side='right') - 1]
+        else:
+            edges = energy_until(timestamps, watts, cumulative, np.append(points, points[-1] + step))
+            values[lo:lo + len(points)] = np.diff(edges) / (step / NS_PER_S)
+
+    return Trace(grid, values, trace.node, trace.metric, NS_PER_S / step)
+
+# Function to resample several traces (nodes, metrics) on the grid of their common time range.
+# Returns the grid (ns) and one row of values per trace.
+def align(traces, step, method='linear'):
+    start = max(trace.timestamps[0] for trace in traces)
+    end = min(trace.timestamps[-1] for trace in traces)
+    resampled = [resample(trace, step, method, start, end) for trace in traces]
+    count = min(len(trace) for trace in resampled)
+    return resampled[0].timestamps[:count], np.vstack([trace.watts[:count] for trace in resampled])
+
+# Function to load a wattmeter file (JSON or CSV) and resample it, reusing the cached result when the file is unchanged
+def load_resampled(path, step, method='linear', cache_dir=CACHE_DIR):
+    stat = os.stat(path)
+    key = hashlib.sha1(f'{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{step}|{method}'.encode()).hexdigest()
+    cache_file = os.path.join(cache_dir, f'{key}.npz') if cache_dir else None
+
+    if cache_file and os.path.exists(cache_file):
+        with np.load(cache_file, allow_pickle=False) as cached:
+            start, values = int(cached['start']), cached['watts']
+            node = str(cached['node']) or None
+        return Trace(start + step * np.arange(len(values), dtype=np.int64), values, node, rate=NS_PER_S / step)
+
+    trace = Trace.from_json(path) if path.endswith('.json') else Trace.from_csv(path)
+    resampled = resample(trace, step, method)
+    if cache_file:
+        os.makedirs(cache_dir, exist_ok=True)
+        # The grid is uniform: only its first point is stored. Written under a temporary name, then renamed.
+        # np.savez appends .npz to names without it, so the temporary name keeps the suffix
+        temporary = f'{cache_file[:-len(".npz")]}.{os.getpid()}.npz'
+        np.savez(temporary, start=resampled.timestamps[0] if len(resampled) else 0, watts=resampled.watts, node=trace.node or '')
+        os.replace(temporary, cache_file)
+    return resampled
+
+# Function to write a resampled trace as an energy CSV (same columns as wattmeter_format.py, UTC timestamps)
+def write_csv(trace, csv_file):
+    timestamps = np.datetime_as_string(trace.datetimes(), unit='us', timezone='UTC')
+    with open(csv_file, 'w') as f:
+        f.write('timestamp,value (Watt)\n')
+        f.writelines(f'{timestamp},{value:.6g}\n' for timestamp, value in zip(timestamps, trace.watts.tolist()))
+    return len(trace)
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(description="Resample wattmeter traces to a uniform time grid")
+    parser.add_argument('files', nargs='+', metavar='IN OUT', help="Pairs of input trace (JSON or CSV) and output CSV")
+    parser.add_argument('--step', default='20ms', help="Grid step: 20ms, 1s, 500us... (default: 20ms, the 50 Hz of the wattmeters)")
+    parser.add_argument('--method', choices=METHODS, default='linear', help="Interpolation (default: linear)")
+    parser.add_argument('--no-cache', action='store_true', help=f"Do not read or write the cache ({CACHE_DIR}, IOPROTOCOL_CACHE)")
+    return parser
+
+# Function to resample IN OUT pairs of files
+def main(files, step, method='linear', use_cache=True):
+    step = parse_duration(step)
+    if len(files) % 2:
+        raise ValueError("expected pairs of input and output files")
+    rows = 0
+    for path, csv_file in zip(files[::2], files[1::2]):
+        rows += write_csv(load_resampled(path, step, method, CACHE_DIR if use_cache else None), csv_file)
+        print(f"{path} -> {csv_file}")
+    return rows
+
+# Entry point of the script
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    main(args.files, args.step, args.method, not args.no_cache)
@@ -0,0 +1,73 @@
+import json  # Import json to read the wattmeter API files
+import numpy as np  # Import numpy for the contiguous sample arrays
+import pandas as pd  # Import pandas to read the energy CSV files
+
+from common.energy import NS_PER_S, to_epoch_ns  # Timestamp convention of the energy engine
+
+# Metric of the Grid5000 wattmeters
+POWER_METRIC = 'wattmetre_power_watt'
+
+# Power trace of one node held as two contiguous arrays: int64 nanoseconds since epoch (UTC), sorted,
+# and float32 watts, i.e. 12 bytes per sample (a week at 50 Hz is about 360 MB).
+# Time-range slices share the arrays of the trace they are taken from.
+# The channels of the local sampler (common.tracefile) use the same class, with their metric in place of watts.
+class Trace:
+    __slots__ = ('timestamps', 'watts', 'node', 'metric', 'rate')
+
+    def __init__(self, timestamps, watts, node=None, metric=POWER_METRIC, rate=None):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.watts = np.asarray(watts, dtype=np.float32)
+        self.node = node
+        self.metric = metric
+        # Nominal sample rate (Hz), estimated from the median spacing when not given. Left unknown when most
+        # timestamps are repeated (several devices in one file)
+        if rate is None and len(self.timestamps) > 1:
+            spacing = float(np.median(np.diff(self.timestamps)))
+            rate = NS_PER_S / spacing if spacing > 0 else None
+        self.rate = rate
+
+    # Function to build a trace from unsorted samples
+    @classmethod
+    def from_samples(cls, timestamps, watts, **metadata):
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        order = np.argsort(timestamps, kind='stable')
+        return cls(timestamps[order], np.asarray(watts)[order], **metadata)
+
+    # Function to load a wattmeter JSON file returned by the Grid5000 API, keeping one metric
+    @classmethod
+    def from_json(cls, json_file, metric=POWER_METRIC):
+        with open(json_file, 'r') as f:
+            records = [entry for entry in json.load(f) if entry.get('metric_id', metric) == metric]
+        node = records[0].get('device_id') if records else None
+        return cls.from_samples(to_epoch_ns([entry['timestamp'] for entry in records]),
+                                np.fromiter((entry['value'] for entry in records), dtype=np.float32, count=len(records)),
+                                node=node, metric=metric)
+
+    # Function to load an energy CSV written by wattmeter_format.py ('value (Watt)' or 'value' column)
+    @classmethod
+    def from_csv(cls, csv_file, node=None):
+        df = pd.read_csv(csv_file)
+        column = 'value (Watt)' if 'value (Watt)' in df.columns else 'value'
+        return cls.from_samples(to_epoch_ns(df['timestamp']), df[column].to_numpy(dtype=np.float32), node=node)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __repr__(self):
+        span = (self.timestamps[-1] - self.timestamps[0]) / NS_PER_S if len(self) else 0.0
+        return f"Trace(node={self.node!r}, metric={self.metric!r}, samples={len(self)}, span={span:.1f}s, rate={self.rate})"
+
+    # Memory held by the samples (bytes)
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + self.watts.nbytes
+
+    # Function to return the samples with begin <= t <= end (ns) as a trace sharing the arrays of this one
+    def between(self, begin, end):
+        lo = np.searchsorted(self.timestamps, begin, side='left')
+        hi = np.searchsorted(self.timestamps, end, side='right')
+        return Trace(self.timestamps[lo:hi], self.watts[lo:hi], self.node, self.metric, self.rate)
+
+    # Function to view the timestamps as numpy datetimes (UTC) for plotting, without a copy
+    def datetimes(self):
+        return self.timestamps.view('datetime64[ns]')
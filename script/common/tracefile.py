@@ -0,0 +1,110 @@
+import json  # Import json for the header of the trace files
+import struct  # Import struct for the header length
+import numpy as np  # Import numpy for the fixed-size records
+
+from common.energy import NS_PER_S  # Timestamp convention of the energy engine
+from common.trace import Trace  # Array-backed trace, one per channel
+
+# Binary trace file of the local samplers: a header, then fixed-size records appended in batches.
+#   b'IOPTRACE' | uint32 header length | JSON header {node, rate, channels: [{name, kind, wrap}]}
+#   records: int64 timestamp (ns since epoch, UTC) + one float64 per channel, little-endian
+# The channels hold the raw values read from the system (mostly cumulative counters); load_channels turns
+# them into rates and utilizations.
+MAGIC = b'IOPTRACE'
+
+# Kinds of channels and the unit of the derived trace
+#   energy_uj: cumulative RAPL energy (µJ, wraps at 'wrap')  -> power (W)
+#   sectors:   cumulative 512-byte sectors                   -> throughput (bytes/s)
+#   ticks_ms:  cumulative time with IOs in flight (ms)       -> busy ratio (0-1)
+#   cpu_ticks: cumulative CPU time (jiffies), ratio of the cpu_total channel -> utilization (0-1)
+#   gauge:     instantaneous value                           -> unchanged
+KINDS = ['energy_uj', 'sectors', 'ticks_ms', 'cpu_ticks', 'gauge']
+
+# Function to return the record dtype of a number of channels
+def record_dtype(nb_channels):
+    return np.dtype([('timestamp', '<i8'), ('values', '<f8', (nb_channels,))])
+
+# Appender of a trace file: the header is written once, then every append is one write of whole records
+class TraceWriter:
+    def __init__(self, path, channels, node=None, rate=None):
+        self.channels = channels
+        self.dtype = record_dtype(len(channels))
+        self.file = open(path, 'wb')
+        header = json.dumps({'node': node, 'rate': rate, 'channels': channels}).encode()
+        self.file.write(MAGIC + struct.pack('<I', len(header)) + header)
+        self.count = 0
+
+    # Function to append records (timestamps: n int64, values: n x channels float64) in a single write
+    def append(self, timestamps, values):
+        records = np.empty(len(timestamps), dtype=self.dtype)
+        records['timestamp'] = timestamps
+        records['values'] = values
+        self.write_records(records)
+
+    # Function to write a contiguous array of records of self.dtype as is, without copying it
+    def write_records(self, records):
+        self.file.write(memoryview(records).cast('B'))
+        self.count += len(records)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+# Function to read a trace file: header and records (memory-mapped, a partially written last record is ignored)
+def read_trace_file(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a sampler trace file")
+        length, = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(length))
+        offset = f.tell()
+        f.seek(0, 2)
+        size = f.tell()
+
+    dtype = record_dtype(len(header['channels']))
+    count = (size - offset) // dtype.itemsize
+    if count == 0:
+        return header, np.empty(0, dtype=dtype)
+    return header, np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+
+# Function to derive the rate of a cumulative counter between consecutive samples (per second), with wrap-around
+def counter_rate(timestamps, counter, wrap=None):
+    delta = np.diff(counter)
+    if wrap:
+        delta = np.where(delta < 0, delta + wrap, delta)
+    seconds = np.diff(timestamps) / NS_PER_S
+    return np.divide(delta, seconds, out=np.full(len(delta), np.nan), where=seconds > 0)
+
+# Function to load the channels of a trace file as Traces of derived values, keyed by metric name.
+# Counters give one value per interval, stamped at the end of the interval.
+def load_channels(path):
+    header, records = read_trace_file(path)
+    node, rate = header.get('node'), header.get('rate')
+    timestamps = np.asarray(records['timestamp'])
+    if len(timestamps) < 2:
+        return {}
+    values = np.asarray(records['values'])
+    names = [channel['name'] for channel in header['channels']]
+    cpu_total = values[:, names.index('cpu_total')] if 'cpu_total' in names else None
+
+    traces = {}
+    for i, channel in enumerate(header['channels']):
+        name, kind, column = channel['name'], channel['kind'], values[:, i]
+        if kind == 'gauge':
+            traces[name] = Trace(timestamps, column, node, name, rate)
+            continue
+        if kind == 'energy_uj':
+            metric, derived = name, counter_rate(timestamps, column, channel.get('wrap')) / 1e6
+        elif kind == 'sectors':
+            metric, derived = name.replace('_sectors', ''), counter_rate(timestamps, column) * 512
+        elif kind == 'ticks_ms':
+            metric, derived = name.replace('_io_ticks', '_busy'), counter_rate(timestamps, column) / 1000
+        elif kind == 'cpu_ticks' and name != 'cpu_total' and cpu_total is not None:
+            total = np.diff(cpu_total)
+            metric, derived = name, np.divide(np.diff(column), total, out=np.full(len(total), np.nan), where=total > 0)
+        else:
+            continue
+        traces[metric] = Trace(timestamps[1:], derived, node, metric, rate)
+    return traces
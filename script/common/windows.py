@@ -0,0 +1,72 @@
+import numpy as np  # Import numpy for the binary searches and the per-window reductions
+
+from common.energy import window_energy  # Interpolated integral of the power
+from common.trace import Trace  # Array-backed power trace
+
+# Many [begin, end] windows (int64 ns) over one sorted trace. The bounds of all windows are found with one
+# binary search each (O(k log n)), every window is a contiguous slice lo:hi of the trace, and the reductions
+# are computed for all windows at once from the samples inside the windows, without masking the trace.
+class Windows:
+    __slots__ = ('trace', 'begins', 'ends', 'lo', 'hi')
+
+    # inclusive=True keeps the samples with begin <= t <= end, inclusive=False those with begin < t < end
+    def __init__(self, trace, begins, ends, inclusive=True):
+        self.trace = trace
+        self.begins = np.atleast_1d(np.asarray(begins, dtype=np.int64))
+        self.ends = np.atleast_1d(np.asarray(ends, dtype=np.int64))
+        self.lo = np.searchsorted(trace.timestamps, self.begins, side='left' if inclusive else 'right')
+        self.hi = np.maximum(np.searchsorted(trace.timestamps, self.ends, side='right' if inclusive else 'left'), self.lo)
+
+    def __len__(self):
+        return len(self.lo)
+
+    # Function to return window i as a trace sharing the arrays of the full trace
+    def __getitem__(self, i):
+        trace = self.trace
+        return Trace(trace.timestamps[self.lo[i]:self.hi[i]], trace.watts[self.lo[i]:self.hi[i]], trace.node, trace.metric, trace.rate)
+
+    # Number of samples in each window
+    def count(self):
+        return self.hi - self.lo
+
+    # Function to gather the samples of all windows in one array, with the index of the window of each sample
+    def samples(self):
+        counts = self.count()
+        window_ids = np.repeat(np.arange(len(counts)), counts)
+        starts = np.repeat(self.lo - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+        return self.trace.watts[starts + np.arange(counts.sum())], window_ids
+
+    # Function to reduce the samples of each window with a numpy ufunc (NaN for empty windows)
+    def _reduce(self, ufunc):
+        counts = self.count()
+        result = np.full(len(counts), np.nan)
+        values, _ = self.samples()
+        filled = counts > 0
+        if filled.any():
+            offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+            result[filled] = ufunc.reduceat(values.astype(np.float64), offsets)
+        return result
+
+    # Sum of the samples of each window (0 for empty windows)
+    def sum(self):
+        return np.nan_to_num(self._reduce(np.add), nan=0.0)
+
+    # Mean of the samples of each window (NaN for empty windows)
+    def mean(self):
+        counts = self.count()
+        return np.divide(self.sum(), counts, out=np.full(len(counts), np.nan), where=counts > 0)
+
+    # Maximum of the samples of each window (NaN for empty windows)
+    def max(self):
+        return self._reduce(np.maximum)
+
+    # Minimum of the samples of each window (NaN for empty windows)
+    def min(self):
+        return self._reduce(np.minimum)
+
+    # Integral of the power over each [begin, end] (J), interpolated between the samples around the bounds.
+    # Unlike the other reductions it reads the whole trace once (cumulative trapezoids).
+    def integral(self):
+        if len(self.trace) < 2:
+            return np.full(len(self), np.nan)
+        return window_energy(self.trace.timestamps, self.trace.watts, self.begins, self.ends)
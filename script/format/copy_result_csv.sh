@@ -18,6 +18,7 @@ DIRECTORY_TO_PROCESS=$1
 LOG_DIR="logs"                            # The main logs directory.
 FORMATTED_DIR="${LOG_DIR}/formatted_data" # The directory where formatted data will be stored.
 BRUTE_DIR="${LOG_DIR}/brute_data"         # The directory where raw data is stored.
+IOPROTOCOL="script/ioprotocol.py"         # Command-line entry point of the Python scripts.
 
 # Function to copy the results.csv file from the brute_data directory to the formatted_data directory.
 copy_result_csv() {
@@ -28,7 +29,11 @@ copy_result_csv() {
     local block_category=$5      # Block size category (small_size_io or big_size_io).
 
     # Define the source file path and destination directory path.
-    local src_file="${BRUTE_DIR}/${DIRECTORY_TO_PROCESS}/${read_write}/${access_pattern}/${block_category}/READ_${io_size}/${file_size}/perf/results.csv"
+    local src_file="${BRUTE_DIR}/${DIRECTORY_TO_PROCESS}/${read_write}/${access_pattern}/${block_category}/${read_write}_${io_size}/${file_size}/perf/results.csv"
+    # READ_<size> in the campaigns recorded before the configuration directories were named after their mode
+    if [ ! -f "${src_file}" ]; then
+        src_file="${BRUTE_DIR}/${DIRECTORY_TO_PROCESS}/${read_write}/${access_pattern}/${block_category}/READ_${io_size}/${file_size}/perf/results.csv"
+    fi
     local dest_dir="${FORMATTED_DIR}/${DIRECTORY_TO_PROCESS}/${read_write}/${block_category}/${io_size}/${access_pattern}/${file_size}/perf"
     local dest_file="${dest_dir}/results.csv"
 
@@ -43,25 +48,12 @@ copy_result_csv() {
     fi
 }
 
-# Iterate through the directories and copy the results.csv files for small block sizes.
-for read_write in $(ls "${BRUTE_DIR}/${DIRECTORY_TO_PROCESS}"); do
-    for access_pattern in $(ls "${BRUTE_DIR}/${DIRECTORY_TO_PROCESS}/${read_write}"); do
-        for size in 1s 128k 16k 512k 8k; do
-            for file_size in 256M 1G 4G; do
-                copy_result_csv "${size}" "${access_pattern}" "${file_size}" "${read_write}" "small_size_io"
-            done
-        done
-    done
-done
-
-# Iterate through the directories and copy the results.csv files for large block sizes.
+# Iterate through the configurations listed in the manifest of every campaign and copy their results.csv files.
 for read_write in $(ls "${BRUTE_DIR}/${DIRECTORY_TO_PROCESS}"); do
     for access_pattern in $(ls "${BRUTE_DIR}/${DIRECTORY_TO_PROCESS}/${read_write}"); do
-        for size in 1M 4M 2M 8M; do
-            for file_size in 256M 1G 4G; do
-                copy_result_csv "${size}" "${access_pattern}" "${file_size}" "${read_write}" "big_size_io"
-            done
-        done
+        while read -r category size file_size iterations; do
+            copy_result_csv "${size}" "${access_pattern}" "${file_size}" "${read_write}" "${category}"
+        done < <(python3 ${IOPROTOCOL} manifest configs "${BRUTE_DIR}/${DIRECTORY_TO_PROCESS}/${read_write}/${access_pattern}")
     done
 done
 
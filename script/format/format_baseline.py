@@ -1,7 +1,11 @@
 import os
+import sys
 import json
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+
 def convert_json_to_csv(json_file, csv_file):
     # Open the JSON file and load its contents into a Python dictionary
     with open(json_file, 'r') as f:
@@ -19,8 +23,10 @@ def convert_json_to_csv(json_file, csv_file):
     # Save the DataFrame as a CSV file without the index column
     df.to_csv(csv_file, index=False)
 
+    # Return the number of samples for the stage report
+    return len(df)
+
 if __name__ == "__main__":
-    import sys
     # Check if the correct number of arguments is passed
     if len(sys.argv) != 3:
         print("Usage: python format_baseline.py <input_json_file> <output_csv_file>")
@@ -31,5 +37,6 @@ if __name__ == "__main__":
     output_csv_file = sys.argv[2]
     
     # Call the function to convert JSON to CSV
-    convert_json_to_csv(input_json_file, output_csv_file)
+    with stage('convert_json_to_csv') as timer:
+        timer.rows = convert_json_to_csv(input_json_file, output_csv_file)
 
@@ -18,8 +18,9 @@ LOG_DIR="logs"
 FORMATTED_DIR="${LOG_DIR}/formatted_data"
 BRUTE_DIR="${LOG_DIR}/brute_data"
 
-# Path to the Python script responsible for generating performance CSV files
-PYTHON_SCRIPT="script/format/generate_perf_csv.py"
+# Command-line entry point of the Python scripts, called once with every iteration
+IOPROTOCOL="script/ioprotocol.py"
+PERF_ARGS=()  # Groups of <io_begin> <io_end> <output_csv> <iteration>
 
 # Function to generate performance CSV files
 generate_perf_csv() {
@@ -40,8 +41,8 @@ generate_perf_csv() {
         if [ -f "${io_begin_src}" ] && [ -f "${io_end_src}" ]; then
             # Create the destination directory if it doesn't exist
             mkdir -p "$(dirname "${csv_dest}")" || error_exit
-            # Run the Python script to generate the CSV file
-            python3 ${PYTHON_SCRIPT} "${io_begin_src}" "${io_end_src}" "${csv_dest}" "${iteration}" || error_exit
+            # Queue the iteration, all CSV files are generated by a single Python process below
+            PERF_ARGS+=("${io_begin_src}" "${io_end_src}" "${csv_dest}" "${iteration}")
             iteration=$((iteration + 1))  # Increment the iteration counter
         else
             break  # Exit the loop if the files for the current iteration are not found
@@ -49,27 +50,19 @@ generate_perf_csv() {
     done
 }
 
-# Loop through the directories to generate performance CSV files for small block sizes
+# Loop through the configurations listed in the manifest of every campaign to generate performance CSV files
 for read_write in $(ls "${BRUTE_DIR}/${DIRECTORY_TO_PROCESS}"); do
     for access_pattern in $(ls "${BRUTE_DIR}/${DIRECTORY_TO_PROCESS}/${read_write}"); do
-        for size in 1s 128k 16k 512k 8k; do
-            for file_size in 256M 1G 4G; do
-                generate_perf_csv "${size}" "${access_pattern}" "${file_size}" "${read_write}" "small_size_io"
-            done
-        done
+        while read -r category size file_size iterations; do
+            generate_perf_csv "${size}" "${access_pattern}" "${file_size}" "${read_write}" "${category}"
+        done < <(python3 ${IOPROTOCOL} manifest configs "${BRUTE_DIR}/${DIRECTORY_TO_PROCESS}/${read_write}/${access_pattern}")
     done
 done
 
-# Loop through the directories to generate performance CSV files for large block sizes
-for read_write in $(ls "${BRUTE_DIR}/${DIRECTORY_TO_PROCESS}"); do
-    for access_pattern in $(ls "${BRUTE_DIR}/${DIRECTORY_TO_PROCESS}/${read_write}"); do
-        for size in 1M 4M 2M 8M; do
-            for file_size in 256M 1G 4G; do
-                generate_perf_csv "${size}" "${access_pattern}" "${file_size}" "${read_write}" "big_size_io"
-            done
-        done
-    done
-done
+# Generate all the performance CSV files at once
+if [ "${#PERF_ARGS[@]}" -gt 0 ]; then
+    python3 ${IOPROTOCOL} format perf "${PERF_ARGS[@]}" || error_exit
+fi
 
 # Print a message indicating that the performance CSV files have been generated
 echo "Les fichiers CSV de performance ont été générés."
@@ -1,8 +1,12 @@
 import os
+import sys
 import json
 import pandas as pd  # Importing pandas for handling data in DataFrame
 from datetime import datetime  # Importing datetime for handling and converting timestamps
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+
 def convert_timestamps_to_csv(io_begin_json, io_end_json, output_csv_file, iteration):
     # Read the start timestamps from the JSON file
     with open(io_begin_json, 'r') as f:
@@ -15,7 +19,7 @@ def convert_timestamps_to_csv(io_begin_json, io_end_json, output_csv_file, itera
     # Check if the number of start and end timestamps match
     if len(begin_data) != len(end_data):
         print(f"Error: Mismatch in number of begin and end timestamps in iteration {iteration}")
-        return  # Exit the function if there is a mismatch
+        return 0  # Exit the function if there is a mismatch
 
     # Create a DataFrame to store the data
     data = []
@@ -38,8 +42,10 @@ def convert_timestamps_to_csv(io_begin_json, io_end_json, output_csv_file, itera
         df.to_csv(f, header=f.tell()==0, index=False)
         f.write('\n\n')  # Add blank lines between iterations for readability
 
+    # Return the number of IOs for the stage report
+    return len(df)
+
 if __name__ == "__main__":
-    import sys  # Importing sys for handling command-line arguments
     # Check if the correct number of arguments is provided
     if len(sys.argv) != 5:
         print("Usage: python generate_perf_csv.py <io_begin_json> <io_end_json> <output_csv_file> <iteration>")
@@ -52,5 +58,6 @@ if __name__ == "__main__":
     iteration = int(sys.argv[4])
 
     # Call the function to convert timestamps to CSV
-    convert_timestamps_to_csv(io_begin_json, io_end_json, output_csv_file, iteration)
+    with stage('convert_timestamps_to_csv') as timer:
+        timer.rows = convert_timestamps_to_csv(io_begin_json, io_end_json, output_csv_file, iteration)
 
@@ -1,34 +1,30 @@
 import os  # Importing the os module for file and directory management
 import sys  # Importing the sys module for handling command-line arguments
-import json  # Importing the json module to work with JSON data
 import pandas as pd  # Importing pandas for data manipulation and analysis
 import matplotlib.pyplot as plt  # Importing matplotlib for plotting
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.energy import to_epoch_ns  # Timestamps to int64 nanoseconds
+from common.trace import Trace  # Array-backed power trace
+from common.windows import Windows  # Binary-search windows over a trace
+from common.layout import power_file  # Power trace of a configuration, named after the mode of the log directory
+from common.manifest import file_sizes as measured_file_sizes  # Configurations of the campaign
+
 # Function to read a file containing a single timestamp
 def read_single_timestamp(filepath):
     with open(filepath, 'r') as f:  # Open the file in read mode
         line = f.readline().strip()  # Read the first line and strip any whitespace
     return line  # Return the timestamp as a string
 
-# Function to load JSON data and filter based on provided timestamps
+# Function to load the power trace and keep the samples strictly between the end of IO1 and the beginning of IO2
 def load_and_filter_data(read_file, end_file, begin_file):
-    # Load the JSON data from the read file
-    with open(read_file, 'r') as f:
-        data_read = json.load(f)
-
-    # Read the timestamps from the end and begin files
-    end_io1_timestamp = read_single_timestamp(end_file)
-    begin_io2_timestamp = read_single_timestamp(begin_file)
-
-    # Normalize JSON data into a pandas DataFrame
-    df = pd.json_normalize(data_read)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])  # Convert the timestamp column to datetime objects
-    end_io1_timestamp = pd.to_datetime(end_io1_timestamp)  # Convert end timestamp to datetime
-    begin_io2_timestamp = pd.to_datetime(begin_io2_timestamp)  # Convert begin timestamp to datetime
+    trace = Trace.from_json(read_file)
+    end_io1_timestamp = to_epoch_ns([read_single_timestamp(end_file)])
+    begin_io2_timestamp = to_epoch_ns([read_single_timestamp(begin_file)])
 
-    # Filter the DataFrame to include only rows between the end of IO1 and the beginning of IO2
-    df_filtered = df[(df['timestamp'] > end_io1_timestamp) & (df['timestamp'] < begin_io2_timestamp)]
-    return df_filtered  # Return the filtered DataFrame
+    # One binary search per bound, only the samples of the idle window are copied
+    window = Windows(trace, end_io1_timestamp, begin_io2_timestamp, inclusive=False)[0]
+    return pd.DataFrame({'value': window.watts})
 
 # Verify the number of command-line arguments
 if len(sys.argv) != 3:
@@ -43,27 +39,24 @@ io_size = sys.argv[2]  # The size of the IO to be processed
 boxplot_dir = os.path.join(log_dir, 'box_plot')
 os.makedirs(boxplot_dir, exist_ok=True)  # Create the directory if it doesn't exist
 
-# Define the file sizes to be processed
-file_sizes = ['256M', '1G', '4G']
+# File sizes measured for this block size, from the manifest of the campaign
+file_sizes = measured_file_sizes(log_dir, io_size)
 dataframes = []  # Initialize an empty list to store DataFrames
 
 # Load and filter data for each file size
 for size in file_sizes:
-    # Define paths for small and big read files
-    read_file_small = os.path.join(log_dir, 'small_size_io', f'READ_{io_size}', f'READ_{size}.json')
-    read_file_big = os.path.join(log_dir, 'big_size_io', f'READ_{io_size}', f'READ_{size}.json')
+    # Power trace of the configuration, named after the mode of log_dir
+    read_file = power_file(log_dir, io_size, size)
 
     # Define paths for the end and begin timestamp files
     end_file = os.path.join(log_dir, 'io_timestamp', f'io_end_{io_size}_{size}_iteration_01.json')
     begin_file = os.path.join(log_dir, 'io_timestamp', f'io_begin_{io_size}_{size}_iteration_02.json')
 
-    # Check if the small read file exists and load it, else load the big read file
-    if os.path.exists(read_file_small):
-        df_filtered = load_and_filter_data(read_file_small, end_file, begin_file)
-    elif os.path.exists(read_file_big):
-        df_filtered = load_and_filter_data(read_file_big, end_file, begin_file)
+    # Load the power trace of the configuration if it exists
+    if read_file is not None:
+        df_filtered = load_and_filter_data(read_file, end_file, begin_file)
     else:
-        print(f"Warning: No read file found for size {size}")
+        print(f"Warning: No power trace found for size {size}")
         continue  # Skip to the next iteration if no file is found
 
     # Add a column indicating the file size to the filtered DataFrame
@@ -2,8 +2,12 @@ import os  # Importing the os module for interacting with the file system
 import pandas as pd  # Importing pandas for data manipulation and analysis
 import sys  # Importing sys to handle command-line arguments
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+
 # Function to merge CSV files within a specified directory
 def merge_csv_files(directory):
+    total_rows = 0  # Number of merged rows, for the stage report
     # Walk through the directory tree starting from the specified directory
     for root, dirs, files in os.walk(directory):
         # Check if the current directory contains performance data (indicated by 'perf' in the path)
@@ -16,6 +20,7 @@ def merge_csv_files(directory):
                 
                 # Remove any duplicate rows from the merged DataFrame
                 merged_df.drop_duplicates(inplace=True)
+                total_rows += len(merged_df)
                 
                 # Save the merged DataFrame to a new CSV file called 'data_merged.csv'
                 merged_df.to_csv(os.path.join(root, 'data_merged.csv'), index=False)
@@ -24,13 +29,16 @@ def merge_csv_files(directory):
                 for file in csv_files:
                     os.remove(file)
 
+    return total_rows
+
 # Main script execution starts here
 if __name__ == "__main__":
     # The first command-line argument is expected to be the directory to process
     directory_to_move = sys.argv[1]
     
     # Call the function to merge CSV files in the specified directory
-    merge_csv_files(directory_to_move)
+    with stage('merge_csv_files') as timer:
+        timer.rows = merge_csv_files(directory_to_move)
     
     # Print a message indicating that the CSV files have been merged and filtered
     print("Les fichiers CSV de performance ont été fusionnés et filtrés.")
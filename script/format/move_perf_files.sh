@@ -10,13 +10,21 @@ fi
 DIRECTORY_TO_MOVE=$1
 FORMATTED_DIR="logs/formatted_data/${DIRECTORY_TO_MOVE}"
 
+# Access patterns present in the formatted tree (<mode>/<size_io>/<size>/<pattern>): RAND, SEQ, ZIPF, ...
+ACCESS_PATTERNS=$(find "${FORMATTED_DIR}" -mindepth 4 -maxdepth 4 -type d -path "*_size_io/*" -printf '%f\n' | sort -u)
+
+# Modes present in the formatted tree (READ, WRITE)
+MODES=$(find "${FORMATTED_DIR}" -mindepth 1 -maxdepth 1 -type d -printf '%f\n' | sort)
+
 # Function to move performance files from small_size_io to big_size_io
 move_perf_files() {
     # Loop through different combinations of access patterns, read/write modes, block sizes, and file sizes
-    for access_pattern in RAND SEQ; do  # Iterate over access patterns: Random (RAND) and Sequential (SEQ)
-        for read_write in READ WRITE; do  # Iterate over read/write modes: READ and WRITE
+    for access_pattern in ${ACCESS_PATTERNS}; do  # Loop through the access patterns of the tree
+        for read_write in ${MODES}; do  # Iterate over the modes of the tree: READ, WRITE
             for size in 1M 2M 4M 8M; do  # Iterate over IO sizes: 1M, 2M, 4M, and 8M
-                for file_size in 256M 1G 4G; do  # Iterate over file sizes: 256M, 1G, and 4G
+                # Iterate over the file sizes formatted for this block size
+                for file_dir in "${FORMATTED_DIR}/${read_write}/small_size_io/${size}/${access_pattern}"/*/; do
+                    local file_size=$(basename "${file_dir}")
 
                     # Define the source and destination directories for the performance data
                     local source_dir="${FORMATTED_DIR}/${read_write}/small_size_io/${size}/${access_pattern}/${file_size}/perf"
@@ -7,73 +7,38 @@ error_exit() {
     exit 1
 }
 
-# Path to the Python script that formats the baseline data
-PYTHON_SCRIPT="script/format/format_baseline.py"
+# Command-line entry point of the Python scripts, called once for every directory
+IOPROTOCOL="script/ioprotocol.py"
 
-# Path to the baseline.json file in the brute_data directory
-baseline_json="logs/brute_data/$1/READ/RAND/baseline/baseline.json"
+# Default baseline.json: the first one found in the brute_data directory
+default_baseline_json=$(find "logs/brute_data/$1" -path "*/baseline/baseline.json" 2>/dev/null | sort | head -n 1)
 
-# Check if the baseline.json file exists
-if [ ! -f "$baseline_json" ]; then
-    echo "The file baseline.json does not exist in $baseline_json."
+# Check if a baseline.json file exists
+if [ -z "$default_baseline_json" ]; then
+    echo "No baseline.json file exists in logs/brute_data/$1."
     exit 1
 fi
 
-# List of directories where the formatted CSV file should be placed
-directories=(
-    # Small IO size, random access, read mode
-    "logs/formatted_data/$1/READ/small_size_io/1s/RAND/baseline"
-    "logs/formatted_data/$1/READ/small_size_io/128k/RAND/baseline"
-    "logs/formatted_data/$1/READ/small_size_io/16k/RAND/baseline"
-    "logs/formatted_data/$1/READ/small_size_io/512k/RAND/baseline"
-    "logs/formatted_data/$1/READ/small_size_io/8k/RAND/baseline"
-    # Big IO size, random access, read mode
-    "logs/formatted_data/$1/READ/big_size_io/1M/RAND/baseline"
-    "logs/formatted_data/$1/READ/big_size_io/4M/RAND/baseline"
-    "logs/formatted_data/$1/READ/big_size_io/2M/RAND/baseline"
-    "logs/formatted_data/$1/READ/big_size_io/8M/RAND/baseline"
-    # Small IO size, sequential access, read mode
-    "logs/formatted_data/$1/READ/small_size_io/1s/SEQ/baseline"
-    "logs/formatted_data/$1/READ/small_size_io/128k/SEQ/baseline"
-    "logs/formatted_data/$1/READ/small_size_io/16k/SEQ/baseline"
-    "logs/formatted_data/$1/READ/small_size_io/512k/SEQ/baseline"
-    "logs/formatted_data/$1/READ/small_size_io/8k/SEQ/baseline"
-    # Big IO size, sequential access, read mode
-    "logs/formatted_data/$1/READ/big_size_io/1M/SEQ/baseline"
-    "logs/formatted_data/$1/READ/big_size_io/4M/SEQ/baseline"
-    "logs/formatted_data/$1/READ/big_size_io/2M/SEQ/baseline"
-    "logs/formatted_data/$1/READ/big_size_io/8M/SEQ/baseline"
-    # Small IO size, random access, write mode
-    "logs/formatted_data/$1/WRITE/small_size_io/1s/RAND/baseline"
-    "logs/formatted_data/$1/WRITE/small_size_io/128k/RAND/baseline"
-    "logs/formatted_data/$1/WRITE/small_size_io/16k/RAND/baseline"
-    "logs/formatted_data/$1/WRITE/small_size_io/512k/RAND/baseline"
-    "logs/formatted_data/$1/WRITE/small_size_io/8k/RAND/baseline"
-    # Big IO size, random access, write mode
-    "logs/formatted_data/$1/WRITE/big_size_io/1M/RAND/baseline"
-    "logs/formatted_data/$1/WRITE/big_size_io/4M/RAND/baseline"
-    "logs/formatted_data/$1/WRITE/big_size_io/2M/RAND/baseline"
-    "logs/formatted_data/$1/WRITE/big_size_io/8M/RAND/baseline"
-    # Small IO size, sequential access, write mode
-    "logs/formatted_data/$1/WRITE/small_size_io/1s/SEQ/baseline"
-    "logs/formatted_data/$1/WRITE/small_size_io/128k/SEQ/baseline"
-    "logs/formatted_data/$1/WRITE/small_size_io/16k/SEQ/baseline"
-    "logs/formatted_data/$1/WRITE/small_size_io/512k/SEQ/baseline"
-    "logs/formatted_data/$1/WRITE/small_size_io/8k/SEQ/baseline"
-    # Big IO size, sequential access, write mode
-    "logs/formatted_data/$1/WRITE/big_size_io/1M/SEQ/baseline"
-    "logs/formatted_data/$1/WRITE/big_size_io/4M/SEQ/baseline"
-    "logs/formatted_data/$1/WRITE/big_size_io/2M/SEQ/baseline"
-    "logs/formatted_data/$1/WRITE/big_size_io/8M/SEQ/baseline"
-)
-
-# Loop through each directory, create it, and place the formatted CSV file in it
-for dir in "${directories[@]}"; do
+# Loop through each access pattern directory of the formatted tree (<mode>/<size_io>/<size>/<pattern>),
+# create its baseline directory and queue the formatted CSV file to place in it
+baseline_args=()
+for pattern_dir in logs/formatted_data/$1/*/*_size_io/*/*/; do
+    [ -d "$pattern_dir" ] || continue
+    dir="${pattern_dir%/}/baseline"
     mkdir -p "$dir" || error_exit  # Create the directory if it doesn't exist
     output_csv_file="${dir}/data.csv"  # Define the path for the output CSV file
-    # Run the Python script to format the baseline.json and generate the CSV
-    python3 "$PYTHON_SCRIPT" "$baseline_json" "$output_csv_file" || error_exit
+
+    # Use the baseline measured before the campaign of this mode and pattern when there is one
+    read_write=$(basename "$(dirname "$(dirname "$(dirname "${pattern_dir%/}")")")")
+    access_pattern=$(basename "${pattern_dir%/}")
+    baseline_json="logs/brute_data/$1/${read_write}/${access_pattern}/baseline/baseline.json"
+    [ -f "$baseline_json" ] || baseline_json="$default_baseline_json"
+
+    baseline_args+=("$baseline_json" "$output_csv_file")
 done
 
+# Format the baseline.json into every CSV file with a single Python process
+python3 "$IOPROTOCOL" format baseline "${baseline_args[@]}" || error_exit
+
 echo "The baseline.json file has been formatted and placed in the appropriate directories."
 
@@ -12,47 +12,24 @@ FORMATTED_DIR="logs/formatted_data/${DIRECTORY_TO_RENAME}"
 
 # Function to rename CSV files in the specified directory structure
 rename_csv_files() {
-    for access_pattern in RAND SEQ; do  # Loop through access patterns: Random (RAND) and Sequential (SEQ)
-        for read_write in READ WRITE; do  # Loop through operations: Read and Write
-            for size in 1M 2M 4M 8M 1s 128k 16k 512k 8k; do  # Loop through different IO sizes
-                for file_size in 256M 1G 4G; do  # Loop through file sizes: 256MB, 1GB, 4GB
-                    for type in energy perf; do  # Loop through file types: energy and performance (perf)
-                        # Define the base directory path for small_size_io
-                        local base_dir="${FORMATTED_DIR}/${read_write}/small_size_io/${size}/${access_pattern}/${file_size}/${type}"
-                        # Check if the directory exists
-                        if [ -d "${base_dir}" ]; then
-                            # Define the path to the merged CSV file
-                            local csv_file="${base_dir}/data_merged.csv"
-                            # If the merged CSV file exists, rename it
-                            if [ -f "${csv_file}" ]; then
-                                # Define the new name for the CSV file
-                                local new_csv_file="${type}_${access_pattern}_buffer${file_size}_io${size}.csv"
-                                # Rename the CSV file
-                                mv "${csv_file}" "${base_dir}/${new_csv_file}"
-                            fi
-                        fi
-
-                        # Repeat the process for big_size_io
-                        base_dir="${FORMATTED_DIR}/${read_write}/big_size_io/${size}/${access_pattern}/${file_size}/${type}"
-                        if [ -d "${base_dir}" ]; then
-                            csv_file="${base_dir}/data_merged.csv"
-                            if [ -f "${csv_file}" ]; then
-                                new_csv_file="${type}_${access_pattern}_buffer${file_size}_io${size}.csv"
-                                mv "${csv_file}" "${base_dir}/${new_csv_file}"
-                            fi
-                        fi
-                    done
-                done
-            done
+    # Merged tables of the configurations present in the tree: <mode>/<size_io>/<size>/<pattern>/<file_size>/<type>
+    for csv_file in "${FORMATTED_DIR}"/*/*_size_io/*/*/*/{energy,perf}/data_merged.csv; do
+        [ -f "${csv_file}" ] || continue
+        local base_dir=$(dirname "${csv_file}")
+        local type=$(basename "${base_dir}")  # energy or perf
+        local file_size=$(basename "$(dirname "${base_dir}")")
+        local access_pattern=$(basename "$(dirname "$(dirname "${base_dir}")")")
+        local size=$(basename "$(dirname "$(dirname "$(dirname "${base_dir}")")")")
+        # Rename the merged CSV file after its configuration
+        mv "${csv_file}" "${base_dir}/${type}_${access_pattern}_buffer${file_size}_io${size}.csv"
+    done
 
-            # Rename CSV files in the baseline directories
-            find "${FORMATTED_DIR}" -type d -name "baseline" | while read -r baseline_dir; do
-                local csv_file="${baseline_dir}/data_merged.csv"
-                if [ -f "${csv_file}" ]; then
-                    mv "${csv_file}" "${baseline_dir}/baseline.csv"
-                fi
-            done
-        done
+    # Rename CSV files in the baseline directories
+    find "${FORMATTED_DIR}" -type d -name "baseline" | while read -r baseline_dir; do
+        local csv_file="${baseline_dir}/data_merged.csv"
+        if [ -f "${csv_file}" ]; then
+            mv "${csv_file}" "${baseline_dir}/baseline.csv"
+        fi
     done
 }
 
@@ -1,7 +1,11 @@
 import os
+import sys
 import json
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+
 # Function to convert a JSON file to a CSV file
 def convert_json_to_csv(json_file, csv_file):
     # Open and read the JSON file
@@ -21,9 +25,11 @@ def convert_json_to_csv(json_file, csv_file):
     # Save the DataFrame as a CSV file
     df.to_csv(csv_file, index=False)
 
+    # Return the number of samples for the stage report
+    return len(df)
+
 # Main function to handle command-line arguments
 if __name__ == "__main__":
-    import sys
     # Check if the correct number of arguments are provided
     if len(sys.argv) != 3:
         print("Usage: python wattmeter_format.py <input_json_file> <output_csv_file>")
@@ -34,5 +40,6 @@ if __name__ == "__main__":
     output_csv_file = sys.argv[2]
     
     # Call the function to convert the JSON file to a CSV file
-    convert_json_to_csv(input_json_file, output_csv_file)
+    with stage('convert_json_to_csv') as timer:
+        timer.rows = convert_json_to_csv(input_json_file, output_csv_file)
 
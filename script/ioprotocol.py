@@ -0,0 +1,341 @@
+import os  # Import os for the script paths
+import sys  # Import sys for the module cache and exit codes
+import argparse  # Import argparse for the subcommands
+import importlib.util  # Import importlib.util to load the scripts of format/, maths/ and plot/ on demand
+
+# Only the standard library is imported here: pandas and matplotlib are loaded with the script
+# that needs them, so a usage error or a small job does not pay for them.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+from common.manifest import block_sizes  # Block sizes measured in a campaign, used when a plot command is given none
+
+# Function to import a script of format/, maths/ or plot/ as a module (its __main__ block is not run)
+def load_script(group, name):
+    if name in sys.modules:
+        return sys.modules[name]
+
+    group_dir = os.path.join(SCRIPT_DIR, group)
+    if group_dir not in sys.path:
+        sys.path.insert(0, group_dir)  # The scripts import their neighbours by name
+
+    spec = importlib.util.spec_from_file_location(name, os.path.join(group_dir, f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+# Function to split a flat list of arguments into groups of n (IN OUT IN OUT ...)
+def grouped(values, n, parser, names):
+    if not values or len(values) % n != 0:
+        parser.error(f"expected groups of {n} arguments: {' '.join(names)} [...]")
+    return [values[i:i + n] for i in range(0, len(values), n)]
+
+# format wattmeter|baseline IN OUT [IN OUT ...]
+def cmd_format_json(args, parser):
+    module = load_script('format', 'wattmeter_format' if args.command == 'wattmeter' else 'format_baseline')
+    for json_file, csv_file in grouped(args.files, 2, parser, ['<input_json>', '<output_csv>']):
+        with stage(f'format_{args.command}') as timer:
+            timer.rows = module.convert_json_to_csv(json_file, csv_file)
+        print(f"{json_file} -> {csv_file}")
+
+# format perf BEGIN END OUT ITERATION [...]
+def cmd_format_perf(args, parser):
+    module = load_script('format', 'generate_perf_csv')
+    for io_begin, io_end, csv_file, iteration in grouped(args.files, 4, parser, ['<io_begin>', '<io_end>', '<output_csv>', '<iteration>']):
+        with stage('format_perf') as timer:
+            timer.rows = module.convert_timestamps_to_csv(io_begin, io_end, csv_file, int(iteration))
+
+# format merge DIR [DIR ...]
+def cmd_format_merge(args, parser):
+    module = load_script('format', 'merge_csv_files')
+    for directory in args.directories:
+        with stage('format_merge') as timer:
+            timer.rows = module.merge_csv_files(directory)
+        print(f"Performance CSV files merged in {directory}")
+
+# format resample IN OUT [IN OUT ...] --step STEP --method METHOD
+def cmd_format_resample(args, parser):
+    from common import resample
+    grouped(args.files, 2, parser, ['<input_trace>', '<output_csv>'])
+    with stage('format_resample') as timer:
+        timer.rows = resample.main(args.files, args.step, args.method, not args.no_cache)
+
+# maths calcul --device hdd|ssd DIR [DIR ...]
+def cmd_maths_calcul(args, parser):
+    module = load_script('maths', f'calcul_{args.device}')
+    for base_dir in args.directories:
+        module.main(base_dir)
+
+# maths mean PERF [PERF ...]
+def cmd_maths_mean(args, parser):
+    module = load_script('maths', 'compute_mean')
+    for perf_file in args.files:
+        with stage('maths_mean') as timer:
+            timer.rows = module.calculate_energy_mean(perf_file)
+
+# maths anomaly DIR [DIR ...]
+def cmd_maths_anomaly(args, parser):
+    load_script('maths', 'anomaly').main(args.directories, args.threshold, args.window, args.workers)
+
+# maths ior IOR_DIR [--iotest DIR]
+def cmd_maths_ior(args, parser):
+    load_script('maths', 'ior_analysis').main(args.ior_dir, args.iotest_dir, args.pattern, args.baseline_file, args.output, args.workers)
+
+# maths iopath [filters]
+def cmd_maths_iopath(args, parser):
+    load_script('maths', 'io_paths').main(args)
+
+# index update FORMATTED_DIR | index query [filters]
+def cmd_index(args, parser):
+    load_script('maths', 'campaign_index').main(args, parser)
+
+# model fit [filters] | model predict MODEL [configuration]
+def cmd_model(args, parser):
+    load_script('maths', 'energy_model').main(args, parser)
+
+# compare CAMPAIGN_A CAMPAIGN_B [filters]
+def cmd_compare(args, parser):
+    load_script('maths', 'compare').main(args, parser)
+
+# nodes format|calcul|report|power
+def cmd_nodes(args, parser):
+    result = load_script('maths', 'node_report').main(args)
+    if args.command == 'format' and result:
+        sys.exit(result)  # Exit code of the format.sh runs
+
+# dashboard FORMATTED_DIR [--output FILE]
+def cmd_dashboard(args, parser):
+    load_script('plot', 'dashboard').main(args.formatted_dir, args.output, args.min_step, args.tile_bins, args.workers)
+
+# manifest configs|show|export LOG_DIR
+def cmd_manifest(args, parser):
+    from common.manifest import main
+    main(args)
+
+# plot KIND[,KIND...] LOG_DIR [SZ_BLOC ...]
+def cmd_plot(args, parser):
+    kinds = args.kinds.split(',')
+    unknown = set(kinds) - set(PLOT_KINDS)
+    if unknown:
+        parser.error(f"unknown plot kind(s): {', '.join(sorted(unknown))} (choose from {', '.join(PLOT_KINDS)})")
+
+    # The backend is chosen once, before any pyplot import: Agg unless --interactive and a display exist
+    from common.backend import use_backend
+    backend = use_backend(interactive=args.interactive)
+    interactive = backend != 'Agg'
+
+    # Box plots are written with Agg, they run last so they cannot switch the backend of the others
+    for kind in PLOT_KINDS:
+        if kind not in kinds:
+            continue
+        for log_dir in args.log_dirs:
+            sizes = args.block_sizes or block_sizes(log_dir)
+            with stage(f'plot_{kind}'):
+                if kind == 'baseline':
+                    load_script('plot', 'plot_baseline' if interactive else 'plot_baseline_passive').main(log_dir)
+                elif kind == 'io':
+                    module = load_script('plot', 'plot_io' if interactive else 'plot_io_passive')
+                    for sz_bloc in sizes:
+                        module.main(log_dir, sz_bloc)
+                elif kind == 'io-all-run':
+                    module = load_script('plot', 'plot_io_all_run' if interactive else 'plot_io_all_run_passive')
+                    for sz_bloc in sizes:
+                        module.main(log_dir, sz_bloc)
+                elif kind == 'box-baseline':
+                    load_script('plot', 'box_plot_baseline').main(log_dir)
+                elif kind == 'box-io':
+                    load_script('plot', 'box_plot_io').main(log_dir, sizes)
+
+PLOT_KINDS = ['baseline', 'io', 'io-all-run', 'box-baseline', 'box-io']
+
+# Dimensions of the campaign index (DIMENSIONS in maths/campaign_index.py)
+INDEX_DIMENSIONS = ['storage', 'node', 'mode', 'pattern', 'sz_bloc', 'filesize']
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(prog='ioprotocol', description="Format, compute and plot IO energy campaigns")
+    groups = parser.add_subparsers(dest='group', required=True)
+
+    # format
+    format_parser = groups.add_parser('format', help="Convert raw campaign files to CSV")
+    format_commands = format_parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('wattmeter', "Wattmeter JSON to energy CSV"), ('baseline', "Baseline JSON to CSV")):
+        sub = format_commands.add_parser(name, help=help_text)
+        sub.add_argument('files', nargs='+', metavar='IN OUT', help="Pairs of input JSON and output CSV")
+        sub.set_defaults(func=cmd_format_json, parser=sub)
+    sub = format_commands.add_parser('perf', help="IO begin/end timestamps to perf CSV")
+    sub.add_argument('files', nargs='+', metavar='BEGIN END OUT ITERATION', help="Groups of four arguments")
+    sub.set_defaults(func=cmd_format_perf, parser=sub)
+    sub = format_commands.add_parser('merge', help="Merge the per-iteration perf CSV files")
+    sub.add_argument('directories', nargs='+')
+    sub.set_defaults(func=cmd_format_merge, parser=sub)
+    sub = format_commands.add_parser('resample', help="Resample wattmeter traces to a uniform time grid")
+    sub.add_argument('files', nargs='+', metavar='IN OUT', help="Pairs of input trace (JSON or CSV) and output CSV")
+    sub.add_argument('--step', default='20ms', help="Grid step: 20ms, 1s, 500us... (default: 20ms)")
+    sub.add_argument('--method', choices=['linear', 'previous', 'area'], default='linear', help="Interpolation (default: linear)")
+    sub.add_argument('--no-cache', action='store_true', help="Do not read or write the resampling cache")
+    sub.set_defaults(func=cmd_format_resample, parser=sub)
+
+    # maths
+    maths_parser = groups.add_parser('maths', help="Attribute energy to the IOs")
+    maths_commands = maths_parser.add_subparsers(dest='command', required=True)
+    sub = maths_commands.add_parser('calcul', help="Project the wattmeter measurements on each IO")
+    sub.add_argument('--device', choices=['hdd', 'ssd'], required=True, help="File naming of the formatted tree")
+    sub.add_argument('directories', nargs='+', help="formatted_data/<run>/<mode> directories")
+    sub.set_defaults(func=cmd_maths_calcul, parser=sub)
+    sub = maths_commands.add_parser('mean', help="Add the energy mean column to perf files")
+    sub.add_argument('files', nargs='+')
+    sub.set_defaults(func=cmd_maths_mean, parser=sub)
+    sub = maths_commands.add_parser('anomaly', help="Flag the outlier IOs and iterations of the perf files")
+    sub.add_argument('directories', nargs='+', help="formatted_data, formatted_data/<run> or formatted_data/<run>/<mode> directories")
+    sub.add_argument('--threshold', type=float, default=3.5, help="Robust z-score above which a value is flagged (default: 3.5)")
+    sub.add_argument('--window', type=int, default=51, help="IOs of the rolling window (default: 51)")
+    sub.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    sub.set_defaults(func=cmd_maths_anomaly, parser=sub)
+    sub = maths_commands.add_parser('ior', help="Energy per byte and per operation of the ior_bench.sh runs")
+    sub.add_argument('ior_dir', help="logs/<storage>/IOR directory")
+    sub.add_argument('--iotest', dest='iotest_dir', help="formatted_data/<run> directory with the READ and WRITE campaigns to compare with")
+    sub.add_argument('--pattern', default='SEQ', help="Access pattern of the iotest reference (default: SEQ)")
+    sub.add_argument('--baseline', dest='baseline_file', help="baseline.json giving the idle power")
+    sub.add_argument('--output', help="Summary CSV (default: <ior_dir>/ior_summary.csv)")
+    sub.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    sub.set_defaults(func=cmd_maths_ior, parser=sub)
+    sub = maths_commands.add_parser('iopath', help="Energy per byte of the direct, buffered and mmap IO paths")
+    sub.add_argument('--db', default=os.path.join('logs', 'formatted_data', 'index.sqlite'), help="Index file (default: logs/formatted_data/index.sqlite)")
+    for dimension in INDEX_DIMENSIONS:
+        sub.add_argument(f"--{dimension.replace('_', '-')}", dest=dimension, action='append', help=f"Keep this {dimension} (repeatable)")
+    sub.add_argument('--exclude-outliers', action='store_true', help="Leave out the IOs flagged by maths anomaly")
+    sub.add_argument('--level', type=float, default=0.95, help="Confidence level of the energy per byte (default: 0.95)")
+    sub.add_argument('--summary', action='store_true', help="Print the saving of every IO path over the configurations instead")
+    sub.add_argument('--csv', action='store_true', help="Print CSV instead of a table")
+    sub.set_defaults(func=cmd_maths_iopath, parser=sub)
+
+    # index
+    index_parser = groups.add_parser('index', help="SQLite index of the formatted perf and energy tables")
+    index_commands = index_parser.add_subparsers(dest='command', required=True)
+    sub = index_commands.add_parser('update', help="Load the new and modified tables of a formatted tree")
+    sub.add_argument('formatted_dir', help="logs/formatted_data directory")
+    sub.add_argument('--db', help="Index file (default: <formatted_dir>/index.sqlite)")
+    sub.add_argument('--workers', type=int, help="Worker processes parsing the CSV files (default: one per CPU)")
+    sub.set_defaults(func=cmd_index, parser=sub)
+    sub = index_commands.add_parser('query', help="Summarize the indexed perf or energy rows")
+    sub.add_argument('--db', default=os.path.join('logs', 'formatted_data', 'index.sqlite'), help="Index file (default: logs/formatted_data/index.sqlite)")
+    sub.add_argument('--table', choices=['perf', 'energy'], default='perf', help="perf: per-IO rows, energy: wattmeter samples (default: perf)")
+    for dimension in INDEX_DIMENSIONS:
+        sub.add_argument(f"--{dimension.replace('_', '-')}", dest=dimension, action='append', help=f"Keep this {dimension} (repeatable)")
+    sub.add_argument('--by', default=','.join(INDEX_DIMENSIONS), help="Comma-separated grouping dimensions, empty for a single row")
+    sub.add_argument('--exclude-outliers', action='store_true', help="Leave out the IOs flagged by maths anomaly (perf table)")
+    sub.add_argument('--sql', help="Run this SQL statement instead (tables: files, perf, energy)")
+    sub.add_argument('--csv', action='store_true', help="Print CSV instead of a table")
+    sub.set_defaults(func=cmd_index, parser=sub)
+
+    # model
+    model_parser = groups.add_parser('model', help="Energy models of the IOs fitted on the campaign index")
+    model_commands = model_parser.add_subparsers(dest='command', required=True)
+    sub = model_commands.add_parser('fit', help="Fit a model per group of configurations")
+    sub.add_argument('--db', default=os.path.join('logs', 'formatted_data', 'index.sqlite'), help="Index file (default: logs/formatted_data/index.sqlite)")
+    for dimension in INDEX_DIMENSIONS:
+        sub.add_argument(f"--{dimension.replace('_', '-')}", dest=dimension, action='append', help=f"Keep this {dimension} (repeatable)")
+    sub.add_argument('--by', default='storage,mode,pattern', help="Comma-separated dimensions, one model per group (default: storage,mode,pattern)")
+    sub.add_argument('--terms', default='bytes,filesize', help="Comma-separated regressors besides the per-IO constant (default: bytes,filesize)")
+    sub.add_argument('--level', type=float, default=0.95, help="Confidence level of the intervals (default: 0.95)")
+    sub.add_argument('--exclude-outliers', action='store_true', help="Leave out the IOs flagged by maths anomaly")
+    sub.add_argument('--output', help="Save the models to this JSON file, for the predict command")
+    sub.add_argument('--csv', action='store_true', help="Print CSV instead of tables")
+    sub.set_defaults(func=cmd_model, parser=sub)
+    sub = model_commands.add_parser('predict', help="Predict the energy of an IO for configurations")
+    sub.add_argument('model', help="JSON file written by model fit --output")
+    for dimension in ('storage', 'node', 'mode', 'pattern'):
+        sub.add_argument(f'--{dimension}', action='append', help=f"{dimension.capitalize()} (repeatable)")
+    sub.add_argument('--sz-bloc', dest='sz_bloc', action='append', required=True, help="Block size, e.g. 64k (repeatable)")
+    sub.add_argument('--filesize', action='append', required=True, help="File size, e.g. 2G (repeatable)")
+    sub.add_argument('--level', type=float, default=0.95, help="Level of the confidence and prediction intervals (default: 0.95)")
+    sub.add_argument('--csv', action='store_true', help="Print CSV instead of a table")
+    sub.set_defaults(func=cmd_model, parser=sub)
+
+    # compare
+    sub = groups.add_parser('compare', help="Compare two campaigns configuration by configuration and rank the regressions")
+    sub.add_argument('campaign_a', help="Reference: formatted_data or formatted_data/<run> directory")
+    sub.add_argument('campaign_b', help="Compared campaign: formatted_data or formatted_data/<run> directory")
+    for dimension in INDEX_DIMENSIONS:
+        if dimension != 'node':
+            sub.add_argument(f"--{dimension.replace('_', '-')}", dest=dimension, action='append', help=f"Keep this {dimension} (repeatable)")
+    sub.add_argument('--test', choices=['mannwhitney', 'permutation'], default='mannwhitney', help="Significance test of the per-IO values (default: mannwhitney)")
+    sub.add_argument('--permutations', type=int, default=2000, help="Permutations of the permutation test (default: 2000)")
+    sub.add_argument('--alpha', type=float, default=0.05, help="False discovery rate of the reported changes (default: 0.05)")
+    sub.add_argument('--min-change', type=float, default=0.02, help="Relative change below which a difference is ignored (default: 0.02)")
+    sub.add_argument('--exclude-outliers', action='store_true', help="Leave out the IOs flagged by maths anomaly")
+    sub.add_argument('--no-update', dest='refresh', action='store_false', help="Use the indexes as they are, without looking for new tables")
+    sub.add_argument('--top', type=int, help="Rows printed per section (default: all)")
+    sub.add_argument('--output', help="Write the full report to this CSV file")
+    sub.add_argument('--fail-on-regression', action='store_true', help="Exit with status 1 when a configuration regressed")
+    sub.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    sub.add_argument('--seed', type=int, default=0, help="Seed of the permutation test (default: 0)")
+    sub.set_defaults(func=cmd_compare, parser=sub)
+
+    # nodes
+    nodes_parser = groups.add_parser('nodes', help="Process the <storage>@<node> runs of a multi-node campaign in parallel")
+    nodes_commands = nodes_parser.add_subparsers(dest='command', required=True)
+    sub = nodes_commands.add_parser('format', help="Run format.sh on every <storage>@<node> run of logs/")
+    sub.add_argument('storage')
+    sub.add_argument('--jobs', type=int, help="Runs formatted at the same time (default: one per CPU)")
+    sub.set_defaults(func=cmd_nodes, parser=sub)
+    sub = nodes_commands.add_parser('calcul', help="Project the power on the IOs of every node")
+    sub.add_argument('--device', choices=['hdd', 'ssd'], required=True, help="File naming of the formatted tree")
+    sub.add_argument('formatted_dir', help="logs/formatted_data directory")
+    sub.add_argument('storage')
+    sub.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    sub.set_defaults(func=cmd_nodes, parser=sub)
+    sub = nodes_commands.add_parser('report', help="Cross-node aggregate and variance reports")
+    sub.add_argument('formatted_dir', help="logs/formatted_data directory")
+    sub.add_argument('--storage', help="Only the runs of this storage")
+    sub.add_argument('--output-dir', help="Where nodes_summary.csv and nodes_per_node.csv are written (default: formatted_dir)")
+    sub.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    sub.add_argument('--exclude-outliers', action='store_true', help="Leave out the IOs flagged by maths anomaly")
+    sub.set_defaults(func=cmd_nodes, parser=sub)
+    sub = nodes_commands.add_parser('power', help="Align the baseline power of the nodes on a common time grid")
+    sub.add_argument('log_dir', help="logs or logs/brute_data directory holding the <storage>@<node> runs")
+    sub.add_argument('--storage', help="Only the runs of this storage")
+    sub.add_argument('--step', default='1s', help="Grid step: 20ms, 1s... (default: 1s)")
+    sub.add_argument('--method', choices=['linear', 'previous', 'area'], default='area', help="Interpolation (default: area, the mean power of each step)")
+    sub.add_argument('--output-dir', help="Where the aligned traces and nodes_power.csv are written (default: log_dir)")
+    sub.set_defaults(func=cmd_nodes, parser=sub)
+
+    # plot
+    sub = groups.add_parser('plot', help="Plot a campaign")
+    sub.add_argument('kinds', help=f"Comma-separated plot kinds: {', '.join(PLOT_KINDS)}")
+    sub.add_argument('log_dirs', nargs='+', metavar='LOG_DIR', help="logs/<storage>/<mode>/<pattern> directories")
+    sub.add_argument('--sz-bloc', dest='block_sizes', action='append', help="Block size to plot (repeatable, default: every block size of the campaign)")
+    sub.add_argument('--interactive', action='store_true', help="Show the figures when a display is available")
+    sub.set_defaults(func=cmd_plot, parser=sub)
+
+    # dashboard
+    sub = groups.add_parser('dashboard', help="Export a formatted campaign as a self-contained HTML dashboard")
+    sub.add_argument('formatted_dir', help="formatted_data, formatted_data/<run> or formatted_data/<run>/<mode> directory")
+    sub.add_argument('--output', help="HTML file (default: <formatted_dir>/dashboard.html)")
+    sub.add_argument('--min-step', default='20ms', help="Bins of the finest level: 20ms, 100ms, 1s... (default: 20ms)")
+    sub.add_argument('--tile-bins', type=int, default=512, help="Bins per tile (default: 512)")
+    sub.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    sub.set_defaults(func=cmd_dashboard, parser=sub)
+
+    # manifest
+    manifest_parser = groups.add_parser('manifest', help="Parameters, environment and configurations of a campaign")
+    manifest_commands = manifest_parser.add_subparsers(dest='command', required=True)
+    sub = manifest_commands.add_parser('configs', help="Print the measured configurations: category sz_bloc filesize iterations")
+    sub.add_argument('log_dir', help="logs/<run>/<mode>/<pattern> directory or manifest file")
+    sub.set_defaults(func=cmd_manifest, parser=sub)
+    sub = manifest_commands.add_parser('show', help="Print the manifest, rebuilt from the files of the campaigns recorded without one")
+    sub.add_argument('log_dir', help="logs/<run>/<mode>/<pattern> directory or manifest file")
+    sub.set_defaults(func=cmd_manifest, parser=sub)
+    sub = manifest_commands.add_parser('export', help="Write the manifest, or the one rebuilt from the files, to a file")
+    sub.add_argument('log_dir', help="logs/<run>/<mode>/<pattern> directory")
+    sub.add_argument('output', help="Manifest file to write")
+    sub.set_defaults(func=cmd_manifest, parser=sub)
+
+    return parser
+
+# Entry point of the script
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    args.func(args, args.parser)
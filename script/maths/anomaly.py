@@ -0,0 +1,160 @@
+import os  # Import os to walk the formatted tree
+import sys  # Import sys to locate the shared modules
+import argparse  # Import argparse for the thresholds
+import numpy as np  # Import numpy for the robust statistics
+import pandas as pd  # Import pandas for the perf tables and the rolling medians
+from concurrent.futures import ProcessPoolExecutor  # Process pool, the perf files are flagged independently
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+from campaign_index import update  # SQLite index of the campaigns, refreshed with the new flags
+
+# Anomaly stage of the perf tables, run after calcul_hdd.py / calcul_ssd.py. Each perf file holds the IOs of one
+# configuration, so the IOs are compared with the other IOs of their file:
+#   robust z-score: 0.6745 * (x - median) / MAD of the file, for the energy and the duration of each IO
+#   rolling:        distance to the median of the neighbouring IOs (in time) in units of their MAD, which catches
+#                   a burst of slow or costly IOs (thermal throttling, background activity) that the file-wide
+#                   statistics absorb
+#   iteration:      distance of the median energy and duration of each iteration to the median of the file, in
+#                   standard errors of a median of that many IOs, and by more than MIN_SHIFT of the median (with
+#                   thousands of IOs, a 1% drift between iterations is significant but harmless)
+# An IO without energy (outside of the wattmeter trace) is flagged as well. The flags are written as columns of
+# the perf file; the index, the models and the node reports can leave the flagged IOs out (--exclude-outliers).
+FLAG_COLUMNS = ['energy_z', 'duration_z', 'outlier_io', 'outlier_iteration', 'outlier']
+
+# Default thresholds (Iglewicz and Hoaglin recommend 3.5 for the modified z-score)
+THRESHOLD = 3.5
+WINDOW = 51  # IOs of the rolling window
+MIN_ITERATIONS = 3  # Fewer iterations than this are not compared with each other
+MIN_SHIFT = 0.05  # Relative shift of an iteration median below which the iteration is kept
+
+# Function to return the median and the robust standard deviation of values (MAD / 0.6745). A zero MAD (more than
+# half of the values equal) falls back on the mean absolute deviation.
+def robust_scale(values):
+    finite = values[np.isfinite(values)]
+    if len(finite) == 0:
+        return np.nan, np.nan
+    median = np.median(finite)
+    mad = np.median(np.abs(finite - median))
+    if mad > 0:
+        return median, mad / 0.6745
+    return median, 1.253314 * np.mean(np.abs(finite - median))
+
+# Function to compute the robust z-score of values (NaN stays NaN, 0 when all the values are equal)
+def robust_z(values):
+    median, scale = robust_scale(values)
+    if not scale > 0:
+        return np.where(np.isfinite(values), 0.0, np.nan)
+    return (values - median) / scale
+
+# Function to compute the rolling robust score of values ordered in time: distance to the median of the window
+# around each value in units of the median absolute distance of the window
+def rolling_z(values, window=WINDOW):
+    series = pd.Series(values)
+    center = series.rolling(window, center=True, min_periods=window // 2 + 1).median()
+    distance = (series - center).abs()
+    mad = distance.rolling(window, center=True, min_periods=window // 2 + 1).median()
+    return (0.6745 * (series - center) / mad.where(mad > 0)).to_numpy()
+
+# Function to flag the IOs and iterations of a perf table. Returns the table with the flag columns.
+def flag(perf_data, threshold=THRESHOLD, window=WINDOW):
+    duration = perf_data['duration (s)'].to_numpy(dtype=np.float64)
+    if 'begin_energy (J)' in perf_data and 'end_energy (J)' in perf_data:
+        power = (perf_data['begin_energy (J)'].to_numpy(dtype=np.float64) + perf_data['end_energy (J)'].to_numpy(dtype=np.float64)) / 2
+    else:
+        power = np.full(len(perf_data), np.nan)
+    energy = power * duration
+
+    energy_z, duration_z = robust_z(energy), robust_z(duration)
+    outlier_io = ~np.isfinite(energy) | (np.abs(energy_z) > threshold) | (np.abs(duration_z) > threshold)
+
+    # Rolling detectors, in the order the IOs ran
+    if len(perf_data) >= window:
+        order = np.argsort(perf_data['timestamp_begin'].to_numpy(dtype=str), kind='stable')
+        for values in (energy, duration):
+            score = np.empty(len(values))
+            score[order] = rolling_z(values[order], window)
+            outlier_io |= np.abs(np.nan_to_num(score)) > threshold
+
+    # Iterations whose median energy or duration is far from the median of the file
+    iterations = perf_data['iteration'].to_numpy()
+    outlier_iteration = np.zeros(len(perf_data), dtype=bool)
+    labels, inverse = np.unique(iterations, return_inverse=True)
+    if len(labels) >= MIN_ITERATIONS:
+        grouped = pd.DataFrame({'iteration': inverse, 'energy': energy, 'duration': duration}).groupby('iteration')
+        medians, counts = grouped.median(), grouped.count()
+        suspect = np.zeros(len(labels), dtype=bool)
+        for column, values in (('energy', energy), ('duration', duration)):
+            median, scale = robust_scale(values)
+            if not scale > 0:
+                continue
+            shift = medians[column].to_numpy() - median
+            standard_error = 1.2533 * scale / np.sqrt(np.maximum(counts[column].to_numpy(), 1))
+            suspect[medians.index] |= (np.abs(np.nan_to_num(shift / standard_error)) > threshold) & (np.abs(np.nan_to_num(shift)) > MIN_SHIFT * abs(median))
+        outlier_iteration = suspect[inverse]
+
+    flagged = perf_data.drop(columns=[column for column in FLAG_COLUMNS if column in perf_data])
+    flagged['energy_z'] = np.round(energy_z, 3)
+    flagged['duration_z'] = np.round(duration_z, 3)
+    flagged['outlier_io'] = outlier_io.astype(int)
+    flagged['outlier_iteration'] = outlier_iteration.astype(int)
+    flagged['outlier'] = (outlier_io | outlier_iteration).astype(int)
+    return flagged
+
+# Function to flag one perf file in place (executed in a worker process). Returns (IOs, flagged IOs, flagged iterations).
+def flag_file(perf_filepath, threshold=THRESHOLD, window=WINDOW):
+    perf_data = pd.read_csv(perf_filepath)
+    if perf_data.empty:
+        return 0, 0, 0
+    flagged = flag(perf_data, threshold, window)
+    flagged.to_csv(perf_filepath, index=False)
+    iterations = flagged.loc[flagged['outlier_iteration'] == 1, 'iteration'].nunique()
+    return len(flagged), int(flagged['outlier'].sum()), int(iterations)
+
+# Function to list the perf files of a formatted tree (any level: formatted_data, a run, a mode)
+def discover_perf_files(root):
+    found = []
+    for directory, dirs, files in os.walk(root):
+        dirs.sort()
+        if os.path.basename(directory) == 'perf':
+            found += [os.path.join(directory, name) for name in sorted(files) if name.startswith('perf_') and name.endswith('.csv')]
+    return found
+
+# Function to return the formatted_data directory of a perf file:
+# formatted_data/<run>/<mode>/<category>/<sz_bloc>/<pattern>/<filesize>/perf/perf_*.csv
+def formatted_root(perf_filepath):
+    for _ in range(8):
+        perf_filepath = os.path.dirname(perf_filepath)
+    return perf_filepath
+
+# Function to flag every perf file under some directories in parallel, then bring their index up to date so that
+# --exclude-outliers sees the new flags
+def main(directories, threshold=THRESHOLD, window=WINDOW, workers=None):
+    files = [path for directory in directories for path in discover_perf_files(directory)]
+    total = flagged = 0
+    with stage('anomaly') as timer, ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(flag_file, files, [threshold] * len(files), [window] * len(files), chunksize=4)
+        for path, (ios, outliers, iterations) in zip(files, results):
+            total += ios
+            flagged += outliers
+            if outliers:
+                print(f"{path}: {outliers}/{ios} IO(s) flagged" + (f", {iterations} iteration(s)" if iterations else ''))
+        timer.rows = total
+    print(f"{len(files)} perf file(s), {flagged}/{total} IO(s) flagged ({100 * flagged / total if total else 0:.2f}%)")
+    for root in sorted({formatted_root(os.path.abspath(path)) for path in files}):
+        update(root, workers=workers)
+    return flagged
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(description="Flag the outlier IOs and iterations of the perf files")
+    parser.add_argument('directories', nargs='+', help="formatted_data, formatted_data/<run> or formatted_data/<run>/<mode> directories")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help=f"Robust z-score above which a value is flagged (default: {THRESHOLD})")
+    parser.add_argument('--window', type=int, default=WINDOW, help=f"IOs of the rolling window (default: {WINDOW})")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    return parser
+
+# Entry point of the script
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    main(args.directories, args.threshold, args.window, args.workers)
@@ -1,81 +1,56 @@
 import os
+import numpy as np
 import pandas as pd
-from datetime import datetime
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timers
+from common.energy import to_epoch_ns, project_power  # Vectorized energy engine
+from common.trace import Trace  # Array-backed power trace
+from common.tracefile import load_channels  # Counters of the local sampler
+from common.manifest import formatted_file_sizes  # Configurations of the formatted campaign
+
 # Function to read a CSV file and return it as a DataFrame
 def read_csv_file(filepath):
     return pd.read_csv(filepath)
 
-# Function to parse a timestamp from a string to a datetime object
-def parse_timestamp(timestamp):
-    try:
-        return datetime.fromisoformat(str(timestamp))
-    except Exception as e:
-        print(f"Error parsing timestamp {timestamp}: {e}")
-        raise
-
-# Function to calculate the energy consumed during an IO operation based on timestamps
-def calculate_energy_for_io(begin, end, energy_data):
-    # Parse the beginning and end timestamps
-    begin_dt = parse_timestamp(begin)
-    end_dt = parse_timestamp(end)
-    
-    # Find the closest energy measurement just before the begin timestamp
-    A = energy_data[energy_data['timestamp'] <= begin_dt].iloc[-1]
-    # Find the closest energy measurement just after the end timestamp
-    B = energy_data[energy_data['timestamp'] >= end_dt].iloc[0]
-    
-    # Calculate the slope (a) and intercept (b) of the line between these two points
-    a = (B['value (Watt)'] - A['value (Watt)']) / (B['timestamp'] - A['timestamp']).total_seconds()
-    b = A['value (Watt)'] - a * A['timestamp'].timestamp()
-    
-    # Calculate the energy at the begin and end timestamps using the linear approximation
-    begin_energy = a * begin_dt.timestamp() + b
-    end_energy = a * end_dt.timestamp() + b
-
-    # Return the energy at the start and end of the IO operation
-    return begin_energy, end_energy
-
 # Function to process both energy and performance data files
-def process_files(energy_filepath, perf_filepath):
-    # Read the energy and performance data files
-    energy_data = read_csv_file(energy_filepath)
+def process_files(energy_filepath, perf_filepath, counters_filepath=None):
+    # Read the energy trace (sorted, ns timestamps) and the performance data file
+    trace = Trace.from_csv(energy_filepath)
     perf_data = read_csv_file(perf_filepath)
 
-    # Convert the timestamp columns in the energy data to datetime objects
-    energy_data['timestamp'] = pd.to_datetime(energy_data['timestamp'], format='ISO8601')
-    # Convert the timestamp columns in the performance data to strings (if necessary)
-    perf_data['timestamp_begin'] = perf_data['timestamp_begin'].astype(str)
-    perf_data['timestamp_end'] = perf_data['timestamp_end'].astype(str)
+    # Project the wattmeter measurements on the begin and end of every IO at once:
+    # A is the closest measurement just before the begin, B the closest just after the end,
+    # and the energy is read on the line between these two points
+    begin_energies, end_energies = project_power(
+        trace.timestamps, trace.watts,
+        to_epoch_ns(perf_data['timestamp_begin'].astype(str)),
+        to_epoch_ns(perf_data['timestamp_end'].astype(str)))
 
-    # Initialize lists to store calculated energy values
-    begin_energies = []
-    end_energies = []
-
-    # Iterate over each row in the performance data
-    for index, row in perf_data.iterrows():
-        try:
-            print(f"Processing row {index} with begin {row['timestamp_begin']} and end {row['timestamp_end']}")
-            # Calculate the energy consumption for this IO operation
-            begin_energy, end_energy = calculate_energy_for_io(row['timestamp_begin'], row['timestamp_end'], energy_data)
-            # Append the calculated values to the lists
-            begin_energies.append(begin_energy)
-            end_energies.append(end_energy)
-        except Exception as e:
-            # Handle any errors and append None to indicate failure
-            print(f"Error processing row {index}: {e}")
-            begin_energies.append(None)
-            end_energies.append(None)
+    # IOs outside of the wattmeter trace are left empty
+    missing = int(np.isnan(begin_energies).sum())
+    if missing:
+        print(f"Warning: {missing} IO(s) of {perf_filepath} are not covered by the energy trace")
 
     # Add the calculated energies to the performance DataFrame
     perf_data['begin_energy (J)'] = begin_energies
     perf_data['end_energy (J)'] = end_energies
 
+    # Project the channels of the local sampler (RAPL power, disk throughput, CPU utilization) the same way
+    if counters_filepath:
+        begins = to_epoch_ns(perf_data['timestamp_begin'].astype(str))
+        ends = to_epoch_ns(perf_data['timestamp_end'].astype(str))
+        for metric, channel in load_channels(counters_filepath).items():
+            perf_data[f'begin_{metric}'], perf_data[f'end_{metric}'] = project_power(channel.timestamps, channel.watts, begins, ends)
+
     # Save the updated performance data back to the file
     perf_data.to_csv(perf_filepath, index=False)
     print(f"Updated perf data saved to {perf_filepath}")
 
+    # Return the number of processed rows for the stage report
+    return len(perf_data)
+
 # Main function to iterate through directories and process files
 def main(base_dir):
     # Loop over the IO types: small and big size IO
@@ -84,14 +59,15 @@ def main(base_dir):
         # Loop over the different IO sizes
         for io_size in os.listdir(io_dir):
             io_size_dir = os.path.join(io_dir, io_size)
-            # Loop over the access patterns: random (RAND) and sequential (SEQ)
-            for access_pattern in ['RAND', 'SEQ']:
+            # Loop over the access patterns present in the tree (RAND, SEQ, ZIPF, ...)
+            for access_pattern in sorted(d for d in os.listdir(io_size_dir) if os.path.isdir(os.path.join(io_size_dir, d))):
                 access_dir = os.path.join(io_size_dir, access_pattern)
-                # Loop over the file sizes
-                for file_size in ['256M', '1G', '4G']:
+                # Loop over the file sizes measured for this block size (manifest of the campaign)
+                for file_size in formatted_file_sizes(base_dir, access_pattern, io_size):
                     # Construct the paths for the energy and performance files
                     energy_dir = os.path.join(access_dir, file_size, 'energy')
                     perf_dir = os.path.join(access_dir, file_size, 'perf')
+                    counters_filepath = os.path.join(energy_dir, 'counters.trace')
 
                     energy_filepath = os.path.join(energy_dir, 'data.csv')
                     perf_filepath_pattern = os.path.join(perf_dir, f'perf_{access_pattern}_buffer{file_size}_io{io_size}.csv')
@@ -100,7 +76,9 @@ def main(base_dir):
                     if os.path.exists(energy_filepath):
                         if os.path.exists(perf_filepath_pattern):
                             print(f"Processing {perf_filepath_pattern} and {energy_filepath}")
-                            process_files(energy_filepath, perf_filepath_pattern)
+                            with stage('process_files') as timer:
+                                timer.rows = process_files(energy_filepath, perf_filepath_pattern,
+                                                           counters_filepath if os.path.exists(counters_filepath) else None)
                         else:
                             print(f"Perf file not found: {perf_filepath_pattern}")
                     else:
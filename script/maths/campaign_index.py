@@ -0,0 +1,298 @@
+import os  # Import os to walk the formatted tree
+import sys  # Import sys to locate the shared modules
+import sqlite3  # Import sqlite3, the embedded database of the index (standard library)
+import argparse  # Import argparse for the update and query subcommands
+import numpy as np  # Import numpy for the typed columns
+import pandas as pd  # Import pandas to read the CSV files and print the query results
+from concurrent.futures import ProcessPoolExecutor  # Process pool, the CSV files are parsed independently
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+from common.energy import to_epoch_ns  # Timestamp parsing of the energy engine
+from common.trace import Trace  # Array-backed power trace
+from common.layout import parse_size, split_run  # Size suffixes of tools.h, <storage>@<node> run names
+
+# Default location of the index, next to the runs it describes
+INDEX_NAME = 'index.sqlite'
+
+# Dimensions of a configuration, in the order of the formatted tree:
+# formatted_data/<storage>[@<node>]/<mode>/<category>/<sz_bloc>/<pattern>/<filesize>/{perf,energy}/<file>.csv
+# The node is empty for single-node runs.
+DIMENSIONS = ['storage', 'node', 'mode', 'pattern', 'sz_bloc', 'filesize']
+
+# Version of the schema, an index written with another version is rebuilt
+SCHEMA_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    storage TEXT NOT NULL,
+    node TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    pattern TEXT NOT NULL,
+    sz_bloc TEXT NOT NULL,
+    sz_bytes INTEGER NOT NULL,
+    filesize TEXT NOT NULL,
+    filesize_bytes INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS perf (
+    file_id INTEGER NOT NULL REFERENCES files(file_id),
+    storage TEXT NOT NULL,
+    node TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    pattern TEXT NOT NULL,
+    sz_bloc TEXT NOT NULL,
+    sz_bytes INTEGER NOT NULL,
+    filesize TEXT NOT NULL,
+    filesize_bytes INTEGER NOT NULL,
+    iteration INTEGER NOT NULL,
+    begin_ns INTEGER NOT NULL,
+    end_ns INTEGER NOT NULL,
+    duration_s REAL NOT NULL,
+    begin_power_w REAL,
+    end_power_w REAL,
+    energy_j REAL,
+    outlier INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS energy (
+    file_id INTEGER NOT NULL REFERENCES files(file_id),
+    storage TEXT NOT NULL,
+    node TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    pattern TEXT NOT NULL,
+    sz_bloc TEXT NOT NULL,
+    sz_bytes INTEGER NOT NULL,
+    filesize TEXT NOT NULL,
+    filesize_bytes INTEGER NOT NULL,
+    ts_ns INTEGER NOT NULL,
+    watts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS perf_config ON perf (storage, node, mode, pattern, sz_bloc, filesize, iteration);
+CREATE INDEX IF NOT EXISTS perf_file ON perf (file_id);
+CREATE INDEX IF NOT EXISTS energy_config ON energy (storage, node, mode, pattern, sz_bloc, filesize, ts_ns);
+CREATE INDEX IF NOT EXISTS energy_file ON energy (file_id);
+"""
+
+# Function to open (and create if needed) the index database
+def connect(db_path):
+    db = sqlite3.connect(db_path)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    if db.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+        with db:
+            for table in ('perf', 'energy', 'files'):
+                db.execute(f'DROP TABLE IF EXISTS {table}')
+        db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    db.executescript(SCHEMA)
+    return db
+
+# Function to list the perf and energy tables of a formatted tree with their configuration
+def discover_files(formatted_dir):
+    found = []
+    for root, dirs, files in os.walk(formatted_dir):
+        dirs.sort()
+        parts = os.path.relpath(root, formatted_dir).split(os.sep)
+        if len(parts) != 7 or parts[6] not in ('perf', 'energy'):
+            continue
+        run, mode, category, sz_bloc, pattern, filesize, kind = parts
+        storage, node = split_run(run)
+        for name in sorted(files):
+            # perf: the merged perf_<pattern>_buffer<fs>_io<sz>.csv (results.csv is the iotest summary)
+            if not name.endswith('.csv') or (kind == 'perf' and not name.startswith('perf_')):
+                continue
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            found.append({'path': os.path.abspath(path), 'kind': kind, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                          'storage': storage, 'node': node or '', 'mode': mode, 'pattern': pattern,
+                          'sz_bloc': sz_bloc, 'sz_bytes': parse_size(sz_bloc),
+                          'filesize': filesize, 'filesize_bytes': parse_size(filesize)})
+    return found
+
+# Function to read a perf table as typed columns. The energy columns hold the power projected on the IO (W)
+# once calcul_hdd.py / calcul_ssd.py has run; the energy of the IO is their mean times the duration.
+def read_perf(path):
+    df = pd.read_csv(path)
+    if df.empty:
+        return {}
+    duration = df['duration (s)'].to_numpy(dtype=np.float64)
+    begin_power = df['begin_energy (J)'].to_numpy(dtype=np.float64) if 'begin_energy (J)' in df else np.full(len(df), np.nan)
+    end_power = df['end_energy (J)'].to_numpy(dtype=np.float64) if 'end_energy (J)' in df else np.full(len(df), np.nan)
+    return {
+        'iteration': df['iteration'].to_numpy(dtype=np.int64),
+        'begin_ns': to_epoch_ns(df['timestamp_begin']),
+        'end_ns': to_epoch_ns(df['timestamp_end']),
+        'duration_s': duration,
+        'begin_power_w': begin_power,
+        'end_power_w': end_power,
+        'energy_j': (begin_power + end_power) / 2 * duration,
+        'outlier': df['outlier'].to_numpy(dtype=np.int64) if 'outlier' in df else np.zeros(len(df), dtype=np.int64),
+    }
+
+# Function to read an energy table as typed columns. The float32 watts go through their shortest decimal form,
+# so the index stores 94.61 and not 94.61000061035156
+def read_energy(path):
+    trace = Trace.from_csv(path)
+    return {'ts_ns': trace.timestamps, 'watts': trace.watts.astype(str).astype(np.float64)}
+
+# Function to parse one file of discover_files, run in the worker processes
+def parse_file(entry):
+    return (read_perf if entry['kind'] == 'perf' else read_energy)(entry['path'])
+
+# Function to convert typed columns to rows for executemany (NaN stored as NULL)
+def to_rows(entry, file_id, columns):
+    config = [file_id] + [entry[key] for key in ('storage', 'node', 'mode', 'pattern', 'sz_bloc', 'sz_bytes', 'filesize', 'filesize_bytes')]
+    values = [np.where(np.isnan(column), None, column).tolist() if column.dtype.kind == 'f' else column.tolist()
+              for column in columns.values()]
+    return (config + list(row) for row in zip(*values))
+
+# Function to bring the index up to date with a formatted tree: new and modified files (mtime or size changed)
+# are (re)loaded, deleted files are removed, the others are not read
+def update(formatted_dir, db_path=None, workers=None):
+    db_path = db_path or os.path.join(formatted_dir, INDEX_NAME)
+    db = connect(db_path)
+    known = {path: (file_id, mtime_ns, size) for file_id, path, mtime_ns, size in
+             db.execute('SELECT file_id, path, mtime_ns, size FROM files')}
+    found = discover_files(formatted_dir)
+    changed = [entry for entry in found if known.get(entry['path'], (None,))[1:] != (entry['mtime_ns'], entry['size'])]
+    removed = set(known) - {entry['path'] for entry in found}
+
+    with stage('index_update') as timer:
+        # Only the files under formatted_dir are considered removed, an index can describe several trees
+        root = os.path.abspath(formatted_dir) + os.sep
+        stale = [known[path][0] for path in removed if path.startswith(root)]
+        stale += [known[entry['path']][0] for entry in changed if entry['path'] in known]
+        with db:
+            for file_id in stale:
+                for table in ('perf', 'energy', 'files'):
+                    db.execute(f'DELETE FROM {table} WHERE file_id = ?', (file_id,))
+
+        rows = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for entry, columns in zip(changed, pool.map(parse_file, changed, chunksize=8)):
+                count = len(next(iter(columns.values()))) if columns else 0
+                with db:
+                    file_id = db.execute(
+                        'INSERT INTO files (path, kind, mtime_ns, size, rows, storage, node, mode, pattern, sz_bloc, sz_bytes, filesize, filesize_bytes) '
+                        'VALUES (:path, :kind, :mtime_ns, :size, :rows, :storage, :node, :mode, :pattern, :sz_bloc, :sz_bytes, :filesize, :filesize_bytes)',
+                        dict(entry, rows=count)).lastrowid
+                    if count:
+                        placeholders = ', '.join('?' * (9 + len(columns)))
+                        db.executemany(f"INSERT INTO {entry['kind']} VALUES ({placeholders})", to_rows(entry, file_id, columns))
+                rows += count
+        timer.rows = rows
+
+    db.close()
+    removed_count = sum(path.startswith(root) for path in removed)
+    print(f"Index {db_path}: {len(changed)} file(s) loaded ({rows} rows), {removed_count} removed, {len(found) - len(changed)} unchanged")
+    return rows
+
+# Function to build the WHERE clause of the dimension filters (each filter is a list of accepted values),
+# optionally without the IOs flagged by anomaly.py (perf table)
+def where_clause(filters, exclude_outliers=False):
+    clauses, params = [], []
+    for dimension in DIMENSIONS:
+        values = filters.get(dimension)
+        if values:
+            clauses.append(f"{dimension} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if exclude_outliers:
+        clauses.append('outlier = 0')
+    return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+# Function to summarize the perf or energy rows of the filtered configurations, grouped by some dimensions
+def query(db_path, table='perf', filters=None, group_by=DIMENSIONS, exclude_outliers=False):
+    where, params = where_clause(filters or {}, exclude_outliers and table == 'perf')
+    keys = ', '.join(group_by)
+    order = ', '.join({'sz_bloc': 'sz_bytes', 'filesize': 'filesize_bytes'}.get(key, key) for key in group_by)
+    if table == 'perf':
+        metrics = ('COUNT(*) AS ios, COUNT(DISTINCT iteration) AS iterations, AVG(duration_s) AS mean_duration_s, '
+                   'AVG((begin_power_w + end_power_w) / 2) AS mean_power_w, AVG(energy_j) AS mean_energy_j, '
+                   'MIN(energy_j) AS min_energy_j, MAX(energy_j) AS max_energy_j, SUM(energy_j) AS total_energy_j, '
+                   'SUM(outlier) AS outliers')
+    else:
+        metrics = ('COUNT(*) AS samples, AVG(watts) AS mean_power_w, MIN(watts) AS min_power_w, MAX(watts) AS max_power_w, '
+                   '(MAX(ts_ns) - MIN(ts_ns)) / 1e9 AS span_s')
+    sql = f'SELECT {keys + ", " if keys else ""}{metrics} FROM {table}{where}'
+    if keys:
+        sql += f' GROUP BY {keys} ORDER BY {order}'
+    summary = run_sql(db_path, sql, params)
+    if table == 'perf':
+        summary = add_medians(summary, db_path, group_by, where, params)
+    return summary
+
+# Function to add the median duration and energy of an IO to a perf summary. SQLite has no median aggregate:
+# only the grouping columns, the duration and the energy of the rows are read, and reduced by pandas.
+def add_medians(summary, db_path, group_by, where, params):
+    keys = ', '.join(group_by)
+    values = run_sql(db_path, f'SELECT {keys + ", " if keys else ""}duration_s, energy_j FROM perf{where}', params)
+    columns = {'duration_s': 'median_duration_s', 'energy_j': 'median_energy_j'}
+    if group_by:
+        medians = values.groupby(list(group_by), sort=False, dropna=False)[list(columns)].median().rename(columns=columns)
+        summary = summary.merge(medians, left_on=list(group_by), right_index=True, how='left')
+    else:
+        for column, median in columns.items():
+            summary[median] = values[column].median()
+    order = list(summary.columns.drop(list(columns.values())))
+    order.insert(order.index('mean_duration_s') + 1, 'median_duration_s')
+    order.insert(order.index('mean_energy_j') + 1, 'median_energy_j')
+    return summary[order]
+
+# Function to run any SQL statement on the index and return the result as a DataFrame
+def run_sql(db_path, sql, params=()):
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"No index at {db_path}, run the update command first")
+    with sqlite3.connect(db_path) as db:
+        return pd.read_sql_query(sql, db, params=list(params))
+
+# Function to print a query result as a table or as CSV
+def show(df, csv=False):
+    if csv:
+        df.to_csv(sys.stdout, index=False)
+    elif df.empty:
+        print("No rows")
+    else:
+        print(df.to_string(index=False))
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(description="Index the perf and energy tables of formatted_data in SQLite and query them")
+    commands = parser.add_subparsers(dest='command', required=True)
+    sub = commands.add_parser('update', help="Load the new and modified tables of a formatted tree")
+    sub.add_argument('formatted_dir', help="logs/formatted_data directory")
+    sub.add_argument('--db', help=f"Index file (default: <formatted_dir>/{INDEX_NAME})")
+    sub.add_argument('--workers', type=int, help="Worker processes parsing the CSV files (default: one per CPU)")
+    sub = commands.add_parser('query', help="Summarize the indexed perf or energy rows")
+    sub.add_argument('--db', default=os.path.join('logs', 'formatted_data', INDEX_NAME), help="Index file (default: logs/formatted_data/index.sqlite)")
+    sub.add_argument('--table', choices=['perf', 'energy'], default='perf', help="perf: per-IO rows, energy: wattmeter samples (default: perf)")
+    for dimension in DIMENSIONS:
+        sub.add_argument(f"--{dimension.replace('_', '-')}", dest=dimension, action='append', help=f"Keep this {dimension} (repeatable)")
+    sub.add_argument('--by', default=','.join(DIMENSIONS), help=f"Comma-separated grouping dimensions, empty for a single row (default: {','.join(DIMENSIONS)})")
+    sub.add_argument('--exclude-outliers', action='store_true', help="Leave out the IOs flagged by anomaly.py (perf table)")
+    sub.add_argument('--sql', help="Run this SQL statement instead (tables: files, perf, energy)")
+    sub.add_argument('--csv', action='store_true', help="Print CSV instead of a table")
+    return parser
+
+# Function to run a parsed command line
+def main(args, parser=None):
+    if args.command == 'update':
+        return update(args.formatted_dir, args.db, args.workers)
+    if args.sql:
+        df = run_sql(args.db, args.sql)
+    else:
+        group_by = [key for key in args.by.split(',') if key]
+        unknown = set(group_by) - set(DIMENSIONS)
+        if unknown:
+            (parser or build_parser()).error(f"unknown dimension(s): {', '.join(sorted(unknown))} (choose from {', '.join(DIMENSIONS)})")
+        df = query(args.db, args.table, {dimension: getattr(args, dimension) for dimension in DIMENSIONS}, group_by, args.exclude_outliers)
+    show(df, args.csv)
+    return len(df)
+
+# Entry point of the script
+if __name__ == "__main__":
+    parser = build_parser()
+    main(parser.parse_args(), parser)
@@ -0,0 +1,250 @@
+import os  # Import os for the campaign and index paths
+import sys  # Import sys to locate the shared modules and for the exit code
+import math  # Import math for the normal tail of the Mann-Whitney test
+import zlib  # Import zlib for a stable seed per configuration
+import argparse  # Import argparse for the comparison options
+import numpy as np  # Import numpy for the vectorized tests
+import pandas as pd  # Import pandas for the per-IO columns and the report
+from concurrent.futures import ProcessPoolExecutor  # Process pool, both campaigns and the configurations are processed independently
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+from common.layout import split_run  # <storage>@<node> run names
+from campaign_index import INDEX_NAME, DIMENSIONS, update, discover_files, where_clause, run_sql  # SQLite index of the campaigns
+
+# Comparison of two campaigns (e.g. before and after a kernel, firmware or file system change), read from their
+# SQLite index, which is brought up to date first (only the new and modified tables are parsed).
+# The configurations are aligned on KEYS; the nodes of a multi-node campaign are pooled. When both sides are single
+# runs of different names (formatted_data/hddk5 against formatted_data/hddk6), the storage is not part of the
+# alignment and is reported as "<run A> vs <run B>". For every configuration:
+#   latency:    mean duration of an IO (s)
+#   throughput: block size / mean latency (MiB/s), so its test is the latency test
+#   energy:     mean energy of an IO (J)
+# The change is relative to campaign A. The p-values of every test are adjusted for the number of tests
+# (Benjamini-Hochberg), and a change is a regression or an improvement when its adjusted p-value is below alpha
+# and it exceeds min_change.
+KEYS = ['storage', 'mode', 'pattern', 'sz_bloc', 'filesize']
+
+# Metrics: column of the perf table, sign of a worse change (+1: higher is worse)
+METRICS = {'latency': ('duration_s', 1), 'throughput': ('duration_s', -1), 'energy': ('energy_j', 1)}
+
+TESTS = ['mannwhitney', 'permutation']
+
+# Defaults of the tests
+ALPHA = 0.05
+MIN_CHANGE = 0.02  # Relative change below which a significant difference is not reported
+PERMUTATIONS = 2000
+MAX_PERMUTATION_IOS = 2000  # IOs drawn at random from each campaign for the permutation test
+CHUNK_VALUES = 1 << 22  # Values shuffled at once by the permutation test (32 MiB of float64)
+
+VERDICTS = ['regression', 'improvement', 'unchanged', 'untested']
+
+# Function to find the formatted_data directory of a campaign and the filters of its run: a formatted_data
+# directory compares all its runs, a formatted_data/<storage>[@<node>] directory only this run
+def locate(path):
+    path = os.path.normpath(path)
+    if os.path.exists(os.path.join(path, INDEX_NAME)) or discover_files(path):
+        return path, {}
+    storage, node = split_run(os.path.basename(path))
+    return os.path.dirname(path), {'storage': [storage], 'node': [node or '']}
+
+# Function to give both campaigns the same storage label when they are two single runs of different names, so that
+# their configurations align on mode, pattern, block size and file size
+def pair_runs(tables, located):
+    storages = [run_filters.get('storage', [None])[0] for _, run_filters in located]
+    if None in storages or storages[0] == storages[1]:
+        return tables
+    label = f"{storages[0]} vs {storages[1]}"
+    return [table.assign(storage=label) for table in tables]
+
+# Function to read the per-IO latency and energy of the filtered configurations of an index (run in a worker process)
+def load_campaign(db_path, filters, exclude_outliers=False):
+    where, params = where_clause(filters, exclude_outliers)
+    sql = f"SELECT {', '.join(KEYS)}, sz_bytes, duration_s, energy_j FROM perf{where}"
+    return run_sql(db_path, sql, params)
+
+# Function to split the rows of a campaign by configuration: {key: (block size in bytes, {column: values})}
+def split_configs(table):
+    configs = {}
+    for key, rows in table.groupby(KEYS, sort=False).indices.items():
+        configs[key] = (int(table['sz_bytes'].iat[rows[0]]),
+                        {column: table[column].to_numpy(dtype=np.float64)[rows] for column in ('duration_s', 'energy_j')})
+    return configs
+
+# Function to run the two-sided Mann-Whitney U test of b against a (normal approximation with tie and continuity
+# corrections, accurate for the hundreds of IOs of a configuration). Returns the p-value and P(b > a) + P(tie) / 2.
+def mann_whitney(a, b):
+    n_a, n_b = len(a), len(b)
+    n = n_a + n_b
+    pooled = np.concatenate([a, b])
+    order = np.argsort(pooled, kind='stable')
+    _, first, counts = np.unique(pooled[order], return_index=True, return_counts=True)
+    ranks = np.repeat(first + (counts + 1) / 2, counts)  # Average rank of the ties, in sorted order
+    u = ranks[order >= n_a].sum() - n_b * (n_b + 1) / 2
+    center = n_a * n_b / 2
+    ties = (counts.astype(np.float64) ** 3 - counts).sum()
+    variance = n_a * n_b / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0, 0.5
+    z = (abs(u - center) - 0.5) / math.sqrt(variance)
+    return min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2))), u / (n_a * n_b)
+
+# Function to run the two-sided permutation test of the difference of means, vectorized over chunks of
+# permutations. Large samples are subsampled to max_ios IOs per campaign. Returns the p-value and P(b > a).
+def permutation(a, b, rng, permutations=PERMUTATIONS, max_ios=MAX_PERMUTATION_IOS):
+    if len(a) > max_ios:
+        a = rng.choice(a, max_ios, replace=False)
+    if len(b) > max_ios:
+        b = rng.choice(b, max_ios, replace=False)
+    n_a, n_b = len(a), len(b)
+    pooled = np.concatenate([a, b])
+    total = pooled.sum()
+    observed = abs(b.mean() - a.mean())
+    tolerance = 1e-12 * max(abs(total), 1.0)
+    chunk = max(1, CHUNK_VALUES // len(pooled))
+    extreme = done = 0
+    while done < permutations:
+        rows = min(chunk, permutations - done)
+        sums = rng.permuted(np.broadcast_to(pooled, (rows, len(pooled))), axis=1)[:, n_a:].sum(axis=1)
+        extreme += int((np.abs(sums / n_b - (total - sums) / n_a) >= observed - tolerance).sum())
+        done += rows
+    _, effect = mann_whitney(a, b)
+    return (extreme + 1) / (permutations + 1), effect
+
+# Function to compare one configuration of both campaigns (run in a worker process). Returns a row per metric.
+def compare_config(key, sz_bytes, columns_a, columns_b, test='mannwhitney', permutations=PERMUTATIONS, seed=0):
+    rng = np.random.default_rng([seed, zlib.crc32('/'.join(key).encode())])
+    rows, tested = [], {}
+    for metric, (column, worse) in METRICS.items():
+        a, b = columns_a[column], columns_b[column]
+        a, b = a[np.isfinite(a)], b[np.isfinite(b)]
+        row = dict(zip(KEYS, key), metric=metric, ios_a=len(a), ios_b=len(b))
+        if len(a) == 0 or len(b) == 0:
+            rows.append(dict(row, verdict='untested'))
+            continue
+        mean_a, mean_b = a.mean(), b.mean()
+        if metric == 'throughput':
+            mean_a, mean_b = sz_bytes / mean_a / (1 << 20), sz_bytes / mean_b / (1 << 20)
+        if column not in tested:
+            if len(a) < 2 or len(b) < 2:
+                tested[column] = (np.nan, np.nan)
+            elif test == 'permutation':
+                tested[column] = permutation(a, b, rng, permutations)
+            else:
+                tested[column] = mann_whitney(a, b)
+        p_value, effect = tested[column]
+        change = mean_b / mean_a - 1 if mean_a else np.nan
+        # P(an IO of B is better than an IO of A): shorter, or cheaper in energy
+        rows.append(dict(row, mean_a=mean_a, mean_b=mean_b, change=change, worse=worse * change,
+                         p_value=p_value, p_better=1 - effect))
+    return rows
+
+# Function to adjust p-values for multiple tests (Benjamini-Hochberg false discovery rate); NaN stays NaN
+def benjamini_hochberg(p_values):
+    p_values = np.asarray(p_values, dtype=np.float64)
+    adjusted = np.full(len(p_values), np.nan)
+    tested = np.flatnonzero(np.isfinite(p_values))
+    if len(tested):
+        order = tested[np.argsort(p_values[tested])]
+        scaled = p_values[order] * len(tested) / np.arange(1, len(tested) + 1)
+        adjusted[order] = np.minimum(np.minimum.accumulate(scaled[::-1])[::-1], 1.0)
+    return adjusted
+
+# Function to rank the comparisons: regressions first (the worst first), then improvements, then the others
+def rank(report, alpha=ALPHA, min_change=MIN_CHANGE):
+    if report.empty:
+        return report
+    columns = KEYS + ['metric', 'verdict', 'ios_a', 'ios_b', 'mean_a', 'mean_b', 'change', 'p_value', 'q_value', 'p_better']
+    report = report.reindex(columns=list(dict.fromkeys(columns + ['worse'])))
+    report['q_value'] = benjamini_hochberg(report['p_value'])
+    significant = report['q_value'] < alpha
+    report['verdict'] = report['verdict'].astype(object).fillna('unchanged')
+    report.loc[significant & (report['worse'] > min_change), 'verdict'] = 'regression'
+    report.loc[significant & (report['worse'] < -min_change), 'verdict'] = 'improvement'
+    report['_order'] = report['verdict'].map(VERDICTS.index)
+    report['_severity'] = np.where(report['verdict'] == 'improvement', report['worse'], -report['worse'])
+    report = report.sort_values(['_order', '_severity'], na_position='last', kind='stable')
+    return report[columns].reset_index(drop=True)
+
+# Function to compare two campaigns. Returns the ranked report and the configurations found in one campaign only.
+def compare(campaign_a, campaign_b, filters=None, exclude_outliers=False, test='mannwhitney', permutations=PERMUTATIONS,
+            alpha=ALPHA, min_change=MIN_CHANGE, refresh=True, workers=None, seed=0):
+    located = [locate(campaign_a), locate(campaign_b)]
+    if refresh:
+        for formatted_dir in dict.fromkeys(formatted_dir for formatted_dir, _ in located):
+            update(formatted_dir, workers=workers)
+
+    with stage('compare') as timer, ProcessPoolExecutor(max_workers=workers) as pool:
+        # Both campaigns are read at the same time
+        tables = pool.map(load_campaign, [os.path.join(formatted_dir, INDEX_NAME) for formatted_dir, _ in located],
+                          [dict(filters or {}, **run_filters) for _, run_filters in located], [exclude_outliers] * 2)
+        configs_a, configs_b = (split_configs(table) for table in pair_runs(list(tables), located))
+        common = sorted(set(configs_a) & set(configs_b))
+        only = {'A': sorted(set(configs_a) - set(configs_b)), 'B': sorted(set(configs_b) - set(configs_a))}
+
+        results = pool.map(compare_config, common, [configs_a[key][0] for key in common],
+                           [configs_a[key][1] for key in common], [configs_b[key][1] for key in common],
+                           [test] * len(common), [permutations] * len(common), [seed] * len(common))
+        report = pd.DataFrame([row for rows in results for row in rows])
+        timer.rows = sum(len(columns['duration_s']) for configs in (configs_a, configs_b) for _, columns in configs.values())
+    return rank(report, alpha, min_change), only
+
+# Function to print the ranked report
+def show(report, only, alpha=ALPHA, min_change=MIN_CHANGE, top=None):
+    for side, keys in only.items():
+        for key in keys:
+            print(f"Only in campaign {side}: {'/'.join(key)}")
+    if report.empty:
+        print("No configuration in common")
+        return
+    counts = report['verdict'].value_counts()
+    print(f"{report[KEYS].drop_duplicates().shape[0]} configuration(s), {len(report)} comparison(s): "
+          + ', '.join(f"{counts.get(verdict, 0)} {verdict}" for verdict in VERDICTS if counts.get(verdict, 0))
+          + f" (adjusted p < {alpha:g}, change > {100 * min_change:g}%)")
+    formatters = {'change': '{:+.1%}'.format, 'p_value': '{:.2g}'.format, 'q_value': '{:.2g}'.format, 'p_better': '{:.2f}'.format,
+                  'mean_a': '{:.6g}'.format, 'mean_b': '{:.6g}'.format}
+    for verdict in ('regression', 'improvement'):
+        rows = report[report['verdict'] == verdict]
+        if not rows.empty:
+            print(f"\n{verdict.capitalize()}s:")
+            print(rows.head(top).drop(columns='verdict').to_string(index=False, formatters=formatters))
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(description="Compare two campaigns configuration by configuration and rank the regressions")
+    parser.add_argument('campaign_a', help="Reference: formatted_data or formatted_data/<run> directory")
+    parser.add_argument('campaign_b', help="Compared campaign: formatted_data or formatted_data/<run> directory")
+    for dimension in DIMENSIONS:
+        if dimension != 'node':
+            parser.add_argument(f"--{dimension.replace('_', '-')}", dest=dimension, action='append', help=f"Keep this {dimension} (repeatable)")
+    parser.add_argument('--test', choices=TESTS, default='mannwhitney', help="Significance test of the per-IO values (default: mannwhitney)")
+    parser.add_argument('--permutations', type=int, default=PERMUTATIONS, help=f"Permutations of the permutation test (default: {PERMUTATIONS})")
+    parser.add_argument('--alpha', type=float, default=ALPHA, help=f"False discovery rate of the reported changes (default: {ALPHA})")
+    parser.add_argument('--min-change', type=float, default=MIN_CHANGE, help=f"Relative change below which a difference is ignored (default: {MIN_CHANGE})")
+    parser.add_argument('--exclude-outliers', action='store_true', help="Leave out the IOs flagged by anomaly.py")
+    parser.add_argument('--no-update', dest='refresh', action='store_false', help="Use the indexes as they are, without looking for new tables")
+    parser.add_argument('--top', type=int, help="Rows printed per section (default: all)")
+    parser.add_argument('--output', help="Write the full report to this CSV file")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Exit with status 1 when a configuration regressed")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the permutation test (default: 0)")
+    return parser
+
+# Function to run a parsed command line. Returns the number of regressions.
+def main(args, parser=None):
+    filters = {dimension: getattr(args, dimension) for dimension in DIMENSIONS if dimension != 'node'}
+    report, only = compare(args.campaign_a, args.campaign_b, filters, args.exclude_outliers, args.test, args.permutations,
+                           args.alpha, args.min_change, args.refresh, args.workers, args.seed)
+    show(report, only, args.alpha, args.min_change, args.top)
+    if args.output:
+        report.to_csv(args.output, index=False)
+        print(f"\nReport written to {args.output}")
+    regressions = int((report['verdict'] == 'regression').sum()) if not report.empty else 0
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+    return regressions
+
+# Entry point of the script
+if __name__ == "__main__":
+    parser = build_parser()
+    main(parser.parse_args(), parser)
@@ -1,6 +1,10 @@
+import os  # Import os to locate the shared modules
 import pandas as pd  # Import the pandas library for data manipulation
 import sys  # Import the sys library to handle command-line arguments
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+
 # Function to calculate the mean energy between 'begin_energy (J)' and 'end_energy (J)'
 def calculate_energy_mean(perf_filepath):
     # Read the performance CSV file into a DataFrame
@@ -13,6 +17,9 @@ def calculate_energy_mean(perf_filepath):
     perf_data.to_csv(perf_filepath, index=False)
     print(f"Energy mean added to {perf_filepath}")
 
+    # Return the number of rows for the stage report
+    return len(perf_data)
+
 # Main entry point of the script
 if __name__ == "__main__":
     # Check if the script is called with the correct number of arguments
@@ -24,5 +31,6 @@ if __name__ == "__main__":
     perf_filepath = sys.argv[1]
 
     # Call the function to calculate and add the energy mean to the CSV file
-    calculate_energy_mean(perf_filepath)
+    with stage('calculate_energy_mean') as timer:
+        timer.rows = calculate_energy_mean(perf_filepath)
 
@@ -0,0 +1,225 @@
+import os  # Import os for the default index path
+import sys  # Import sys to locate the shared modules
+import json  # Import json to save and load the fitted models
+import argparse  # Import argparse for the fit and predict subcommands
+import itertools  # Import itertools for the configurations to predict
+import numpy as np  # Import numpy for the least squares
+import pandas as pd  # Import pandas for the configuration and result tables
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.layout import parse_size  # Size suffixes of tools.h
+from campaign_index import INDEX_NAME, DIMENSIONS, where_clause, run_sql  # SQLite index of the campaign
+from stream_stats import t_quantile  # Quantiles of the confidence intervals
+
+# Linear models of the energy of one IO (J) fitted on the campaign index, one model per group of
+# configurations (by default per storage, mode and pattern):
+#   energy = per_io + bytes * (block size) + filesize * (file size)
+# per_io holds the fixed cost of an IO (the idle power of the node over a minimal IO and the request overhead),
+# bytes the cost of each MiB transferred and filesize the effect of the file size (cache, seek distance).
+# The block and file sizes are constant within a configuration, so the least squares over every IO are computed
+# from the per-configuration count, mean and sum of squares returned by SQLite: the rows are never loaded.
+# For the same reason the configurations, not the IOs, are the independent observations of the coefficients: their
+# confidence intervals have configs - rank degrees of freedom, and a saturated group (configs <= rank) has none.
+
+# Regressors: column of the index, unit of the coefficient (divisor, label)
+TERMS = {
+    'bytes': ('sz_bytes', 1 << 20, 'J/MiB'),
+    'filesize': ('filesize_bytes', 1 << 30, 'J/GiB'),
+}
+
+# Default grouping: a model per device, mode and access pattern
+GROUP_BY = ['storage', 'mode', 'pattern']
+
+# Function to read the count, mean and sum of squared deviations of the IO energy of every configuration
+def config_table(db_path, filters=None, exclude_outliers=False):
+    where, params = where_clause(filters or {}, exclude_outliers)
+    where = (where + ' AND' if where else ' WHERE') + ' energy_j IS NOT NULL'
+    keys = ', '.join(dimension for dimension in DIMENSIONS) + ', sz_bytes, filesize_bytes'
+    sql = (f'SELECT {keys}, COUNT(*) AS ios, AVG(energy_j) AS mean_j, '
+           f'SUM(energy_j * energy_j) - COUNT(*) * AVG(energy_j) * AVG(energy_j) AS ss_j '
+           f'FROM perf{where} GROUP BY {keys} ORDER BY {keys}')
+    table = run_sql(db_path, sql, params)
+    table['ss_j'] = table['ss_j'].clip(lower=0)  # Rounding of the one-pass formula
+    return table
+
+# Function to build the design matrix of configurations (intercept first, then the terms)
+def design(table, terms):
+    columns = [np.ones(len(table))]
+    columns += [table[TERMS[term][0]].to_numpy(dtype=np.float64) / TERMS[term][1] for term in terms]
+    return np.column_stack(columns)
+
+# Function to fit one model on the configurations of a group, weighted by their number of IOs.
+# A term that does not vary in the group (a single file size) cannot be told from per_io and is left out.
+def fit_group(table, terms):
+    terms = [term for term in terms if table[TERMS[term][0]].nunique() > 1]
+    x = design(table, terms)
+    weights = table['ios'].to_numpy(dtype=np.float64)
+    y = table['mean_j'].to_numpy(dtype=np.float64)
+    root = np.sqrt(weights)[:, None]
+    coef, _, rank, _ = np.linalg.lstsq(x * root, y * root[:, 0], rcond=None)
+
+    # Residuals of every IO: within the configurations (ss_j) and between the configuration means and the model
+    ios = weights.sum()
+    between = (weights * (y - x @ coef) ** 2).sum()
+    residual = table['ss_j'].sum() + between
+    total = table['ss_j'].sum() + (weights * (y - np.average(y, weights=weights)) ** 2).sum()
+    sigma2 = residual / (ios - rank) if ios > rank else float('nan')  # Variance of a single IO, for the prediction intervals
+
+    # Covariance of the coefficients scaled by the residual of the configuration means
+    dof = len(table) - rank
+    scale = between / dof if dof > 0 else float('nan')
+    cov = scale * np.linalg.pinv((x * weights[:, None]).T @ x)
+    predicted = x @ coef
+    return {
+        'terms': terms,
+        'coef': coef.tolist(),
+        'cov': cov.tolist(),
+        'sigma2': sigma2,
+        'dof': dof,
+        'rank': int(rank),
+        'ios': int(ios),
+        'configs': len(table),
+        'r2': 1 - residual / total if total > 0 else float('nan'),
+        'rmse_j': float(np.sqrt(residual / ios)),
+        'mean_rel_error': float(np.mean(np.abs(predicted - y) / np.abs(y))),
+        'range': {term: [int(table[column].min()), int(table[column].max())] for term, (column, _, _) in TERMS.items()},
+    }
+
+# Function to fit a model per group of configurations
+def fit(db_path, filters=None, by=GROUP_BY, terms=tuple(TERMS), exclude_outliers=False):
+    table = config_table(db_path, filters, exclude_outliers)
+    models = []
+    for keys, group in (table.groupby(by, sort=True) if by else [((), table)]):
+        keys = keys if isinstance(keys, tuple) else (keys,)
+        model = fit_group(group, list(terms))
+        dropped = [term for term in terms if term not in model['terms']]
+        if dropped:
+            print(f"Note: {dict(zip(by, keys))}: {', '.join(dropped)} constant in the campaign, left out of the model")
+        if model['rank'] < len(model['terms']) + 1:
+            print(f"Warning: {dict(zip(by, keys))} has {model['configs']} configuration(s), too few to separate "
+                  f"{', '.join(model['terms'])}: the coefficients are not unique")
+        elif model['dof'] <= 0:
+            print(f"Warning: {dict(zip(by, keys))} has {model['configs']} configuration(s) for {model['rank']} coefficient(s): "
+                  f"the model goes through every configuration and has no confidence interval")
+        models.append(dict(group=dict(zip(by, keys)), **model))
+    return {'by': list(by), 'models': models}
+
+# Function to list the coefficients of the models with their confidence intervals
+def coefficients(fitted, level=0.95):
+    rows = []
+    for model in fitted['models']:
+        se = np.sqrt(np.diag(model['cov']))
+        t = t_quantile(level, model['dof'])
+        names = [('per_io', 'J')] + [(term, TERMS[term][2]) for term in model['terms']]
+        for (name, unit), estimate, error in zip(names, model['coef'], se):
+            rows.append(dict(model['group'], term=name, unit=unit, estimate=estimate, std_error=error,
+                             ci_low=estimate - t * error, ci_high=estimate + t * error))
+    return pd.DataFrame(rows)
+
+# Function to list the fit quality of the models
+def quality(fitted):
+    return pd.DataFrame([dict(model['group'], configs=model['configs'], ios=model['ios'], r2=model['r2'],
+                              rmse_j=model['rmse_j'], mean_rel_error=model['mean_rel_error'])
+                         for model in fitted['models']])
+
+# Function to predict the energy of one IO of configurations (dicts with the group dimensions, sz_bloc and
+# filesize), with the confidence interval of the mean and the prediction interval of a single IO
+def predict(fitted, configs, level=0.95):
+    by = fitted['by']
+    models = {tuple(model['group'][key] for key in by): model for model in fitted['models']}
+    rows = []
+    for config in configs:
+        model = models.get(tuple(config.get(key) for key in by))
+        row = dict(config)
+        if model is None:
+            rows.append(dict(row, energy_j=np.nan, note='no model for this group'))
+            continue
+        sizes = {'bytes': parse_size(config['sz_bloc']), 'filesize': parse_size(config['filesize'])}
+        x = np.array([1.0] + [sizes[term] / TERMS[term][1] for term in model['terms']])
+        mean = float(x @ np.array(model['coef']))
+        se_mean = float(np.sqrt(x @ np.array(model['cov']) @ x))
+        spread = t_quantile(level, model['dof'])
+        se_io = float(np.sqrt(model['sigma2'] + se_mean ** 2))
+        outside = [term for term, (low, high) in model['range'].items() if not low <= sizes[term] <= high]
+        rows.append(dict(row, energy_j=mean, ci_low=mean - spread * se_mean, ci_high=mean + spread * se_mean,
+                         pi_low=mean - spread * se_io, pi_high=mean + spread * se_io,
+                         note=f"extrapolated ({', '.join(outside)})" if outside else ''))
+    return pd.DataFrame(rows)
+
+# Function to save fitted models as JSON
+def save(fitted, path):
+    with open(path, 'w') as f:
+        json.dump(fitted, f, indent=2)
+
+# Function to load models saved by save()
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+# Function to print a table as text or CSV
+def show(df, csv=False):
+    if csv:
+        df.to_csv(sys.stdout, index=False)
+    elif df.empty:
+        print("No rows")
+    else:
+        print(df.to_string(index=False))
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(description="Fit energy models of the IOs on the campaign index and predict unseen configurations")
+    commands = parser.add_subparsers(dest='command', required=True)
+    sub = commands.add_parser('fit', help="Fit a model per group of configurations")
+    sub.add_argument('--db', default=os.path.join('logs', 'formatted_data', INDEX_NAME), help="Index file (default: logs/formatted_data/index.sqlite)")
+    for dimension in DIMENSIONS:
+        sub.add_argument(f"--{dimension.replace('_', '-')}", dest=dimension, action='append', help=f"Keep this {dimension} (repeatable)")
+    sub.add_argument('--by', default=','.join(GROUP_BY), help=f"Comma-separated dimensions, one model per group (default: {','.join(GROUP_BY)})")
+    sub.add_argument('--terms', default=','.join(TERMS), help=f"Comma-separated regressors besides the per-IO constant (default: {','.join(TERMS)})")
+    sub.add_argument('--level', type=float, default=0.95, help="Confidence level of the intervals (default: 0.95)")
+    sub.add_argument('--exclude-outliers', action='store_true', help="Leave out the IOs flagged by anomaly.py")
+    sub.add_argument('--output', help="Save the models to this JSON file, for the predict command")
+    sub.add_argument('--csv', action='store_true', help="Print CSV instead of tables")
+    sub = commands.add_parser('predict', help="Predict the energy of an IO for configurations")
+    sub.add_argument('model', help="JSON file written by fit --output")
+    sub.add_argument('--storage', action='append', help="Storage (repeatable)")
+    sub.add_argument('--node', action='append', help="Node (repeatable, when the models are per node)")
+    sub.add_argument('--mode', action='append', help="Mode (repeatable)")
+    sub.add_argument('--pattern', action='append', help="Access pattern (repeatable)")
+    sub.add_argument('--sz-bloc', dest='sz_bloc', action='append', required=True, help="Block size, e.g. 64k (repeatable)")
+    sub.add_argument('--filesize', action='append', required=True, help="File size, e.g. 2G (repeatable)")
+    sub.add_argument('--level', type=float, default=0.95, help="Level of the confidence and prediction intervals (default: 0.95)")
+    sub.add_argument('--csv', action='store_true', help="Print CSV instead of a table")
+    return parser
+
+# Function to run a parsed command line
+def main(args, parser=None):
+    parser = parser or build_parser()
+    if args.command == 'fit':
+        by = [key for key in args.by.split(',') if key]
+        terms = [term for term in args.terms.split(',') if term]
+        unknown = (set(by) - set(DIMENSIONS)) | (set(terms) - set(TERMS))
+        if unknown or {'sz_bloc', 'filesize'} & set(by):
+            parser.error(f"--by takes {', '.join(d for d in DIMENSIONS if d not in ('sz_bloc', 'filesize'))}; --terms takes {', '.join(TERMS)}")
+        fitted = fit(args.db, {dimension: getattr(args, dimension) for dimension in DIMENSIONS}, by, terms, args.exclude_outliers)
+        if args.output:
+            save(fitted, args.output)
+            print(f"Models saved to {args.output}")
+        show(quality(fitted), args.csv)
+        print()
+        show(coefficients(fitted, args.level), args.csv)
+        return len(fitted['models'])
+
+    fitted = load(args.model)
+    missing = [key for key in fitted['by'] if not getattr(args, key)]
+    if missing:
+        parser.error(f"the models are per {', '.join(fitted['by'])}: give --{' --'.join(key.replace('_', '-') for key in missing)}")
+    keys = fitted['by'] + ['sz_bloc', 'filesize']
+    configs = [dict(zip(keys, values)) for values in itertools.product(*(getattr(args, key) for key in keys))]
+    df = predict(fitted, configs, args.level)
+    show(df, args.csv)
+    return len(df)
+
+# Entry point of the script
+if __name__ == "__main__":
+    parser = build_parser()
+    main(parser.parse_args(), parser)
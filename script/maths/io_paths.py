@@ -0,0 +1,91 @@
+import os  # Import os for the index path
+import sys  # Import sys to locate the shared modules
+import argparse  # Import argparse for the report options
+import numpy as np  # Import numpy for the confidence intervals
+import pandas as pd  # Import pandas for the per-configuration table
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.layout import split_mode  # READ-MMAP-SEQUENTIAL -> READ, mmap, sequential
+from campaign_index import INDEX_NAME, DIMENSIONS, where_clause, run_sql  # SQLite index of the campaigns
+from stream_stats import t_quantile  # Student quantile of the confidence intervals
+
+# Energy per byte of the IO paths (IO_PATH and ADVICE of benchmark.sh): O_DIRECT, buffered through the page cache
+# and mmap, with or without a posix_fadvise / madvise hint. The IO path is recorded in the mode (READ-BUFFERED,
+# READ-MMAP-SEQUENTIAL), so the variants of a configuration are the modes sharing its operation. For every
+# configuration (nodes pooled):
+#   j_per_mib:  mean energy of an IO / block size (J/MiB), with the half-width of its confidence interval
+#   mib_per_s:  block size / mean latency of an IO
+#   saving:     1 - j_per_mib / j_per_mib of the O_DIRECT variant (positive: the page cache saves energy)
+#   speedup:    mean latency of the O_DIRECT variant / mean latency
+KEYS = ['storage', 'operation', 'pattern', 'sz_bloc', 'filesize']
+
+IO_PATHS = ['direct', 'buffered', 'mmap']
+MIB = 1 << 20
+
+# Function to read the per-configuration energy and latency of the filtered modes of an index
+def load(db_path, filters=None, exclude_outliers=False):
+    where, params = where_clause(filters or {}, exclude_outliers)
+    where += (' AND ' if where else ' WHERE ') + 'energy_j IS NOT NULL'
+    sql = ('SELECT storage, mode, pattern, sz_bloc, filesize, MIN(sz_bytes) AS sz_bytes, MIN(filesize_bytes) AS filesize_bytes, '
+           'COUNT(*) AS ios, AVG(duration_s) AS mean_duration_s, AVG(energy_j) AS mean_energy_j, '
+           'AVG(energy_j * energy_j) AS mean_square_j '
+           f'FROM perf{where} GROUP BY storage, mode, pattern, sz_bloc, filesize')
+    return run_sql(db_path, sql, params)
+
+# Function to compute the energy per byte of every IO path and its saving against the O_DIRECT variant
+def report(table, level=0.95):
+    variants = pd.DataFrame([split_mode(mode) for mode in table['mode']], index=table.index, columns=['operation', 'io_path', 'advice'])
+    table = table.join(variants)
+    mib = table['sz_bytes'] / MIB
+    ios = table['ios'].to_numpy(dtype=np.float64)
+    variance = np.maximum(table['mean_square_j'] - table['mean_energy_j'] ** 2, 0) * ios / np.maximum(ios - 1, 1)
+    half_width = np.array([t_quantile(level, n - 1) if n > 1 else np.nan for n in ios]) * np.sqrt(variance / ios)
+    table['j_per_mib'] = table['mean_energy_j'] / mib
+    table['ci_j_per_mib'] = half_width / mib
+    table['mib_per_s'] = mib / table['mean_duration_s']
+
+    # Reference of every configuration: its O_DIRECT variant without hint
+    direct = table[(table['io_path'] == 'direct') & (table['advice'] == 'none')]
+    direct = direct.set_index(KEYS)[['j_per_mib', 'mean_duration_s']].add_prefix('direct_')
+    table = table.join(direct, on=KEYS)
+    table['saving'] = 1 - table['j_per_mib'] / table['direct_j_per_mib']
+    table['speedup'] = table['direct_mean_duration_s'] / table['mean_duration_s']
+
+    table['path_order'] = table['io_path'].map({io_path: i for i, io_path in enumerate(IO_PATHS)}).fillna(len(IO_PATHS))
+    table = table.sort_values(['storage', 'operation', 'pattern', 'sz_bytes', 'filesize_bytes', 'path_order', 'advice'])
+    return table[KEYS + ['io_path', 'advice', 'ios', 'j_per_mib', 'ci_j_per_mib', 'mib_per_s', 'saving', 'speedup']].reset_index(drop=True)
+
+# Function to summarize the saving of every IO path over the configurations of a storage, operation and pattern
+def summarize(table):
+    groups = table.dropna(subset=['saving']).groupby(['storage', 'operation', 'pattern', 'io_path', 'advice'], sort=False)
+    return groups.agg(configs=('saving', 'size'), median_saving=('saving', 'median'), min_saving=('saving', 'min'),
+                      max_saving=('saving', 'max'), median_speedup=('speedup', 'median')).reset_index()
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(description="Energy per byte of the direct, buffered and mmap IO paths of a campaign")
+    parser.add_argument('--db', default=os.path.join('logs', 'formatted_data', INDEX_NAME), help="Index file (default: logs/formatted_data/index.sqlite)")
+    for dimension in DIMENSIONS:
+        parser.add_argument(f"--{dimension.replace('_', '-')}", dest=dimension, action='append', help=f"Keep this {dimension} (repeatable)")
+    parser.add_argument('--exclude-outliers', action='store_true', help="Leave out the IOs flagged by anomaly.py")
+    parser.add_argument('--level', type=float, default=0.95, help="Confidence level of the energy per byte (default: 0.95)")
+    parser.add_argument('--summary', action='store_true', help="Print the saving of every IO path over the configurations instead")
+    parser.add_argument('--csv', action='store_true', help="Print CSV instead of a table")
+    return parser
+
+# Function to run a parsed command line
+def main(args):
+    table = report(load(args.db, {dimension: getattr(args, dimension) for dimension in DIMENSIONS}, args.exclude_outliers), args.level)
+    if args.summary:
+        table = summarize(table)
+    if args.csv:
+        table.to_csv(sys.stdout, index=False)
+    elif table.empty:
+        print("No rows")
+    else:
+        print(table.to_string(index=False, float_format=lambda value: f"{value:.4g}"))
+    return len(table)
+
+# Entry point of the script
+if __name__ == "__main__":
+    main(build_parser().parse_args())
@@ -0,0 +1,207 @@
+import os  # Import os for the file paths
+import re  # Import re to parse the IOR file names
+import sys  # Import sys to locate the shared modules
+import argparse  # Import argparse for the command-line options
+import numpy as np  # Import numpy for the per-IO reductions
+import pandas as pd  # Import pandas for the result tables
+from concurrent.futures import ProcessPoolExecutor  # Process pool, every IOR configuration is independent
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+from common.energy import to_epoch_ns, window_energy  # Vectorized energy engine
+from common.trace import Trace  # Array-backed power trace
+from common.layout import parse_size, block_category  # Size suffixes of tools.h
+
+# Transfer size and number of segments used by ior_bench.sh (-t 512 -s 16)
+IOR_IO_SIZE = 512
+IOR_SEGMENTS = 16
+# Same transfer size in the benchmark.sh naming (1 sector)
+IOTEST_BLOCK = '1s'
+
+# <read>:<write>_<file_size>_iter_<n>.json written by ior_bench.sh
+TRACE_PATTERN = re.compile(r'^(\d+):(\d+)_([^_]+)_iter_(\d+)\.json$')
+
+# Function to read the single timestamp of an ior_bench.sh start_/end_ file
+def read_timestamp(filepath):
+    with open(filepath, 'r') as f:
+        return f.read().strip()
+
+# Function to list the IOR runs of a log directory (logs/<storage>/IOR)
+def discover_runs(ior_dir):
+    runs = []
+    for name in sorted(os.listdir(ior_dir)):
+        match = TRACE_PATTERN.match(name)
+        if not match:
+            continue
+        read_ratio, write_ratio, file_size, iteration = match.groups()
+        config = f'{read_ratio}:{write_ratio}'
+        start_file = os.path.join(ior_dir, 'io_timestamp', f'start_{config}_{file_size}_iter_{iteration}.json')
+        end_file = os.path.join(ior_dir, 'io_timestamp', f'end_{config}_{file_size}_iter_{iteration}.json')
+        if not (os.path.exists(start_file) and os.path.exists(end_file)):
+            print(f"Timestamps not found for {name}, skipped")
+            continue
+        runs.append({
+            'config': config,
+            'read_ratio': int(read_ratio),
+            'write_ratio': int(write_ratio),
+            'file_size': file_size,
+            'iteration': int(iteration),
+            'trace': os.path.join(ior_dir, name),
+            'start': start_file,
+            'end': end_file,
+        })
+    return runs
+
+# Function to compute the energy of one IOR run (executed in a worker process)
+def analyse_run(run):
+    trace = Trace.from_json(run['trace'])
+    begin, end = to_epoch_ns([read_timestamp(run['start']), read_timestamp(run['end'])])
+    duration = (end - begin) / 1e9
+
+    # ior_bench.sh repeats each phase ratio/25 times on a file of 16 segments of <file_size>
+    file_bytes = parse_size(run['file_size']) * IOR_SEGMENTS
+    read_bytes = file_bytes * (run['read_ratio'] // 25)
+    write_bytes = file_bytes * (run['write_ratio'] // 25)
+
+    energy = float(window_energy(trace.timestamps, trace.watts, [begin], [end])[0]) if len(trace) > 1 else np.nan
+
+    result = {key: run[key] for key in ('config', 'read_ratio', 'write_ratio', 'file_size', 'iteration')}
+    result.update({
+        'duration (s)': duration,
+        'samples': len(trace.between(begin, end)),
+        'energy (J)': energy,
+        'mean_power (W)': energy / duration if duration > 0 else np.nan,
+        'read_bytes': read_bytes,
+        'write_bytes': write_bytes,
+        'ops': (read_bytes + write_bytes) // IOR_IO_SIZE,
+    })
+    return result
+
+# Function to compute the per-byte energy of one pure READ or WRITE iotest configuration (executed in a worker process)
+def analyse_iotest(mode, perf_file, sz_bloc, file_size):
+    perf_data = pd.read_csv(perf_file)
+    if 'begin_energy (J)' not in perf_data.columns:
+        return None
+
+    # calcul_*.py projects the power on both ends of the IO: the energy of the IO is the mean power over its duration
+    io_energy = (perf_data['begin_energy (J)'] + perf_data['end_energy (J)']) / 2 * perf_data['duration (s)']
+    io_energy = io_energy.dropna()
+    if io_energy.empty:
+        return None
+
+    return {
+        'mode': mode,
+        'file_size': file_size,
+        'ios': len(io_energy),
+        'energy_per_op (J)': io_energy.mean(),
+        'energy_per_byte (J/B)': io_energy.mean() / parse_size(sz_bloc),
+    }
+
+# Function to list the perf files of the pure READ and WRITE campaigns for the IOR transfer size
+def discover_iotest(formatted_dir, pattern):
+    sz_bloc = IOTEST_BLOCK
+    jobs = []
+    for mode in ('READ', 'WRITE'):
+        size_dir = os.path.join(formatted_dir, mode, block_category(sz_bloc), sz_bloc, pattern)
+        if not os.path.isdir(size_dir):
+            print(f"No {mode} iotest campaign in {size_dir}")
+            continue
+        for file_size in sorted(os.listdir(size_dir)):
+            perf_file = os.path.join(size_dir, file_size, 'perf', f'perf_{pattern}_buffer{file_size}_io{sz_bloc}.csv')
+            if os.path.exists(perf_file):
+                jobs.append((mode, perf_file, sz_bloc, file_size))
+    return jobs
+
+# Function to average the iterations of every configuration and derive the per-byte and per-operation energy
+def summarize(runs, baseline_power=None):
+    df = pd.DataFrame(runs)
+    summary = df.groupby(['config', 'read_ratio', 'write_ratio', 'file_size'], sort=False).agg(
+        iterations=('iteration', 'count'),
+        duration_s=('duration (s)', 'mean'),
+        energy_j=('energy (J)', 'mean'),
+        energy_std_j=('energy (J)', 'std'),
+        mean_power_w=('mean_power (W)', 'mean'),
+        read_bytes=('read_bytes', 'first'),
+        write_bytes=('write_bytes', 'first'),
+        ops=('ops', 'first'),
+    ).reset_index()
+    summary = summary.rename(columns={'duration_s': 'duration (s)', 'energy_j': 'energy (J)', 'energy_std_j': 'energy_std (J)', 'mean_power_w': 'mean_power (W)'})
+
+    total_bytes = summary['read_bytes'] + summary['write_bytes']
+    summary['energy_per_byte (J/B)'] = summary['energy (J)'] / total_bytes
+    summary['energy_per_op (J)'] = summary['energy (J)'] / summary['ops']
+
+    # Without the idle power of the node, the energy of mpirun and sync is part of the total
+    if baseline_power is not None:
+        summary['dynamic_energy (J)'] = summary['energy (J)'] - baseline_power * summary['duration (s)']
+        summary['dynamic_energy_per_op (J)'] = summary['dynamic_energy (J)'] / summary['ops']
+
+    # Keep the ior_bench.sh order: ratios, then file sizes from the smallest
+    summary['_bytes'] = summary['file_size'].map(parse_size)
+    return summary.sort_values(['read_ratio', '_bytes']).drop(columns='_bytes').reset_index(drop=True)
+
+# Function to add the pure READ/WRITE references and the energy expected from the read:write mix
+def compare(summary, references):
+    if not references:
+        return summary
+    ref = pd.DataFrame(references).pivot_table(index='file_size', columns='mode', values='energy_per_op (J)')
+    summary = summary.copy()
+    for mode in ('READ', 'WRITE'):
+        column = f'{mode.lower()}_energy_per_op (J)'
+        summary[column] = summary['file_size'].map(ref[mode]) if mode in ref.columns else np.nan
+
+    # Per-operation energy of the mix if read and write cost what they cost alone
+    read_share = summary['read_bytes'] / (summary['read_bytes'] + summary['write_bytes'])
+    summary['expected_energy_per_op (J)'] = read_share * summary['read_energy_per_op (J)'] + (1 - read_share) * summary['write_energy_per_op (J)']
+    summary['measured/expected'] = summary['energy_per_op (J)'] / summary['expected_energy_per_op (J)']
+    return summary
+
+# Function to read the mean idle power of a baseline.json file (same format as the wattmeter traces)
+def read_baseline_power(baseline_file):
+    trace = Trace.from_json(baseline_file)
+    return float(trace.watts.mean(dtype=np.float64)) if len(trace) else None
+
+# Main function: analyse every IOR configuration in one parallel pass and write ior_summary.csv
+def main(ior_dir, iotest_dir=None, pattern='SEQ', baseline_file=None, output=None, workers=None):
+    runs = discover_runs(ior_dir)
+    if not runs:
+        print(f"No IOR trace found in {ior_dir}")
+        return 0
+    iotest_jobs = discover_iotest(iotest_dir, pattern) if iotest_dir else []
+
+    # The IOR runs and the iotest references are submitted to the same pool
+    with stage('ior_analysis') as timer, ProcessPoolExecutor(max_workers=workers) as pool:
+        run_futures = [pool.submit(analyse_run, run) for run in runs]
+        ref_futures = [pool.submit(analyse_iotest, *job) for job in iotest_jobs]
+        results = [future.result() for future in run_futures]
+        references = [ref for ref in (future.result() for future in ref_futures) if ref is not None]
+        timer.rows = len(results)
+
+    baseline_file = baseline_file or os.path.join(ior_dir, 'baseline', 'baseline.json')
+    baseline_power = read_baseline_power(baseline_file) if os.path.exists(baseline_file) else None
+
+    summary = compare(summarize(results, baseline_power), references)
+
+    output = output or os.path.join(ior_dir, 'ior_summary.csv')
+    summary.to_csv(output, index=False)
+    pd.DataFrame(results).to_csv(os.path.join(os.path.dirname(output), 'ior_runs.csv'), index=False)
+
+    columns = ['config', 'file_size', 'iterations', 'energy (J)', 'energy_per_byte (J/B)', 'energy_per_op (J)']
+    if references:
+        columns += ['expected_energy_per_op (J)', 'measured/expected']
+    print(summary[columns].to_string(index=False, float_format=lambda value: f'{value:.4g}'))
+    print(f"IOR summary saved to {output}")
+    return len(results)
+
+# Entry point of the script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Energy per byte and per operation of the ior_bench.sh read:write mixes")
+    parser.add_argument('ior_dir', help="logs/<storage>/IOR directory written by ior_bench.sh")
+    parser.add_argument('--iotest', dest='iotest_dir', help="formatted_data/<run> directory with the READ and WRITE iotest campaigns to compare with")
+    parser.add_argument('--pattern', default='SEQ', help="Access pattern of the iotest reference (default: SEQ, as IOR)")
+    parser.add_argument('--baseline', dest='baseline_file', help="baseline.json giving the idle power (default: <ior_dir>/baseline/baseline.json if present)")
+    parser.add_argument('--output', help="Summary CSV (default: <ior_dir>/ior_summary.csv)")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    main(args.ior_dir, args.iotest_dir, args.pattern, args.baseline_file, args.output, args.workers)
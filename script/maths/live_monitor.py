@@ -0,0 +1,231 @@
+import os  # Import the os module for file paths and directory listing
+import re  # Import re to parse the configuration out of the timestamp file names
+import sys  # Import sys to handle command-line arguments
+import json  # Import json to parse JSON power samples and write summaries
+import time  # Import time for the polling loop
+import argparse  # Import argparse for the optional arguments
+from bisect import bisect_left, bisect_right  # Binary search in the power buffer
+from datetime import datetime  # Import datetime to parse ISO8601 timestamps
+
+from stream_stats import MetricSummary  # Streaming mean/variance/quantiles
+
+# io_begin_<sz_bloc>_<filesize>_iteration_<rep>.json, as moved by benchmark.sh
+TIMESTAMP_FILE = re.compile(r'^io_(begin|end)_([^_]+)_([^_]+)_iteration_(\d+)\.json$')
+
+# Function to parse an ISO8601 timestamp to seconds since epoch
+def parse_timestamp(timestamp):
+    return datetime.fromisoformat(timestamp.strip()).timestamp()
+
+# Follow a file that is still being written and return only the complete new lines
+class FileTail:
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.partial = ''
+
+    def read_lines(self):
+        try:
+            with open(self.path, 'r') as f:
+                f.seek(self.offset)
+                chunk = f.read()
+                self.offset = f.tell()
+        except FileNotFoundError:
+            return []
+
+        # Keep an unterminated last line until the writer completes it
+        lines = (self.partial + chunk).split('\n')
+        self.partial = lines.pop()
+        return [line for line in lines if line.strip()]
+
+# Per configuration (sz_bloc, filesize) accumulators
+class ConfigStats:
+    def __init__(self):
+        self.latency = MetricSummary()  # Seconds
+        self.energy = MetricSummary()  # Joules per IO
+        self.iterations = set()
+
+# Power history kept behind the last sample (s). benchmark.sh only moves the timestamp files of an iteration into
+# io_timestamp/ once it has ended, so the power covering its IOs must outlive one iteration plus the 90 s pause.
+RETENTION_S = 900.0
+
+# Live analysis of a campaign: pairs the IO timestamps, attributes power and keeps running statistics
+class LiveMonitor:
+    def __init__(self, log_dir, power_feed, max_power_samples=200000, retention_s=RETENTION_S):
+        self.timestamp_dir = os.path.join(log_dir, 'io_timestamp')
+        self.power_tail = FileTail(power_feed)
+        self.max_power_samples = max_power_samples
+        self.retention_s = retention_s
+
+        self.tails = {}  # (kind, sz_bloc, filesize, rep) -> FileTail
+        self.unpaired = {}  # (sz_bloc, filesize, rep) -> ([begins], [ends]) waiting for their counterpart
+        self.pending = []  # IOs waiting for power samples after their end: (config, rep, begin, end)
+
+        self.power_ts = []  # Sorted power timestamps (s), bounded by max_power_samples
+        self.power_values = []
+        self.last_power_growth = time.monotonic()
+
+        self.configs = {}
+        self.dropped = 0  # IOs older than the retained power samples
+
+    # Read the new power samples (CSV 'timestamp,value' as written by wattmeter_format.py, or JSON lines)
+    def poll_power(self):
+        lines = self.power_tail.read_lines()
+        for line in lines:
+            try:
+                if line.lstrip().startswith('{'):
+                    entry = json.loads(line)
+                    timestamp, value = entry['timestamp'], entry['value']
+                else:
+                    timestamp, value = line.split(',')[:2]
+                ts, value = parse_timestamp(timestamp), float(value)
+            except (ValueError, KeyError):
+                continue  # Header line or truncated sample
+
+            if self.power_ts and ts < self.power_ts[-1]:
+                continue  # The feed is expected to be chronological
+            self.power_ts.append(ts)
+            self.power_values.append(value)
+
+        if lines:
+            self.last_power_growth = time.monotonic()
+
+    # Read the new lines of every timestamp file and pair begins with ends
+    def poll_timestamps(self):
+        if not os.path.isdir(self.timestamp_dir):
+            return
+
+        for name in os.listdir(self.timestamp_dir):
+            match = TIMESTAMP_FILE.match(name)
+            if match is None:
+                continue
+            kind, sz_bloc, filesize, rep = match.groups()
+            key = (kind, sz_bloc, filesize, rep)
+            if key not in self.tails:
+                self.tails[key] = FileTail(os.path.join(self.timestamp_dir, name))
+
+            lines = self.tails[key].read_lines()
+            if not lines:
+                continue
+            begins, ends = self.unpaired.setdefault((sz_bloc, filesize, rep), ([], []))
+            (begins if kind == 'begin' else ends).extend(parse_timestamp(line) for line in lines)
+
+        # The n-th begin goes with the n-th end of the same iteration
+        for (sz_bloc, filesize, rep), (begins, ends) in self.unpaired.items():
+            nb_pairs = min(len(begins), len(ends))
+            for begin, end in zip(begins[:nb_pairs], ends[:nb_pairs]):
+                self.pending.append(((sz_bloc, filesize), rep, begin, end))
+            del begins[:nb_pairs], ends[:nb_pairs]
+
+    # Attribute power to the IOs already covered by the feed, same projection as calcul_*.py
+    def process_pending(self):
+        if not self.power_ts:
+            return
+
+        last_power = self.power_ts[-1]
+        still_pending = []
+        for config, rep, begin, end in self.pending:
+            if end > last_power:
+                still_pending.append((config, rep, begin, end))
+                continue
+
+            a = bisect_right(self.power_ts, begin) - 1  # Last sample before the begin
+            b = bisect_left(self.power_ts, end)  # First sample after the end
+            if a < 0:
+                self.dropped += 1
+                continue
+
+            ta, tb = self.power_ts[a], self.power_ts[b]
+            wa, wb = self.power_values[a], self.power_values[b]
+            slope = (wb - wa) / (tb - ta) if tb > ta else 0.0
+            begin_power = wa + slope * (begin - ta)
+            end_power = wa + slope * (end - ta)
+
+            duration = end - begin
+            stats = self.configs.setdefault(config, ConfigStats())
+            stats.latency.add(duration)
+            stats.energy.add((begin_power + end_power) / 2 * duration)
+            stats.iterations.add(rep)
+
+        self.pending = still_pending
+        self.trim_power()
+
+    # Forget the power samples older than the retention window, except those a pending IO still needs, within
+    # a fixed memory budget (the IOs of an iteration are only read once the iteration has ended)
+    def trim_power(self):
+        keep_from = max(bisect_left(self.power_ts, self.power_ts[-1] - self.retention_s) - 1, 0)
+        if self.pending:
+            oldest = min(begin for _, _, begin, _ in self.pending)
+            keep_from = min(keep_from, max(bisect_right(self.power_ts, oldest) - 1, 0))
+        keep_from = max(keep_from, len(self.power_ts) - self.max_power_samples)
+        if keep_from > 0:
+            del self.power_ts[:keep_from], self.power_values[:keep_from]
+
+    def poll(self):
+        self.poll_power()
+        self.poll_timestamps()
+        self.process_pending()
+
+    # Build the periodic summary of every configuration seen so far
+    def summary(self):
+        return {
+            'time': datetime.now().astimezone().isoformat(),
+            'pending_io': len(self.pending),
+            'dropped_io': self.dropped,
+            'configs': {
+                f'{sz_bloc}_{filesize}': {
+                    'iterations': len(stats.iterations),
+                    'latency (s)': stats.latency.as_dict(),
+                    'energy (J)': stats.energy.as_dict(),
+                }
+                for (sz_bloc, filesize), stats in sorted(self.configs.items())
+            },
+        }
+
+# Function to print a summary as one line per configuration
+def print_summary(summary):
+    print(f"[{summary['time']}] pending IO: {summary['pending_io']} - dropped IO: {summary['dropped_io']}")
+    for config, values in summary['configs'].items():
+        latency, energy = values['latency (s)'], values['energy (J)']
+        print(f"  {config:>12}  it={values['iterations']:<3} n={latency['count']:<6} "
+              f"lat mean={latency['mean'] * 1e3:.4f} ms ±{latency['ci95'] * 1e3:.4f} p95={latency['p95'] * 1e3:.4f} ms  "
+              f"energy mean={energy['mean']:.6f} J ±{energy['ci95']:.6f} p95={energy['p95']:.6f} J")
+    sys.stdout.flush()
+
+# Main loop: poll the files, emit a summary every interval
+def main(args):
+    monitor = LiveMonitor(args.log_dir, args.power_feed, args.max_power_samples, args.retention)
+
+    while True:
+        monitor.poll()
+        summary = monitor.summary()
+        print_summary(summary)
+
+        if args.summary_file:
+            with open(args.summary_file, 'a') as f:
+                f.write(json.dumps(summary) + '\n')
+
+        if args.once:
+            break
+
+        # A silent power feed while IOs wait for it usually means the collector died
+        if monitor.pending and time.monotonic() - monitor.last_power_growth > 3 * args.interval:
+            print(f"Warning: no new power sample in {args.power_feed} for {3 * args.interval:.0f} s")
+
+        time.sleep(args.interval)
+
+# Entry point of the script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live latency/energy statistics of a running campaign")
+    parser.add_argument('log_dir', help="Campaign directory written by benchmark.sh (logs/<storage>/<mode>/<pattern>)")
+    parser.add_argument('power_feed', help="Growing power file, CSV 'timestamp,value' or JSON lines")
+    parser.add_argument('--interval', type=float, default=10.0, help="Seconds between two summaries (default: 10)")
+    parser.add_argument('--summary-file', help="Append every summary as a JSON line to this file")
+    parser.add_argument('--max-power-samples', type=int, default=200000, help="Power samples kept in memory (default: 200000)")
+    parser.add_argument('--retention', type=float, default=RETENTION_S,
+                        help=f"Seconds of power history kept, at least one iteration plus the pause between iterations (default: {RETENTION_S:g})")
+    parser.add_argument('--once', action='store_true', help="Process what is already written and exit")
+
+    try:
+        main(parser.parse_args())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,278 @@
+import io  # Import io to capture the output of the per-node workers
+import os  # Import os to walk the campaign trees
+import sys  # Import sys to locate the shared modules
+import glob  # Import glob to find the baseline traces of the nodes
+import argparse  # Import argparse for the subcommands
+import subprocess  # Import subprocess to run format.sh for each node
+import contextlib  # Import contextlib to redirect the output of the calcul scripts
+import importlib  # Import importlib to load calcul_hdd / calcul_ssd in the workers
+import numpy as np  # Import numpy for the per-IO energy
+import pandas as pd  # Import pandas for the per-node and cross-node tables
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor  # One worker per node
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+from common.layout import NODE_SEPARATOR, parse_size, split_run  # Campaign layout
+from common.resample import METHODS, align, parse_duration  # Common time grid of the node traces
+from common.trace import Trace  # Array-backed power trace
+
+# Multi-node campaigns: every node writes its own run directory logs/<storage>@<node> (benchmark.sh with
+# MULTI_NODE=1), formatted to formatted_data/<storage>@<node>. The runs are independent, so each node is
+# processed by its own worker and only the small per-configuration statistics are gathered.
+
+# Dimensions of a configuration, the node excepted
+CONFIG = ['storage', 'mode', 'pattern', 'sz_bloc', 'filesize']
+
+# Function to list the runs of a directory (logs/ or logs/formatted_data) as (run, storage, node) tuples,
+# optionally restricted to one storage. Single-node runs have no node and are kept as their own node.
+def discover_runs(root, storage=None):
+    runs = []
+    for run in sorted(os.listdir(root)):
+        if not os.path.isdir(os.path.join(root, run)) or run in ('formatted_data', 'brute_data'):
+            continue
+        run_storage, node = split_run(run)
+        if storage is None or run_storage == storage:
+            runs.append((run, run_storage, node or run_storage))
+    return runs
+
+# Function to run format.sh for one run (executed in a worker thread, the work is done by the child process)
+def format_run(run, format_script='format.sh'):
+    env = dict(os.environ, IOPROTOCOL_SKIP_INDEX='1')  # A single index update is done once every node is formatted
+    result = subprocess.run(['bash', format_script, run], env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return result.returncode, result.stdout
+
+# Function to run the calcul script of a device on every mode of one formatted run (executed in a worker process)
+def calcul_run(run_dir, device):
+    maths_dir = os.path.dirname(os.path.abspath(__file__))
+    if maths_dir not in sys.path:
+        sys.path.insert(0, maths_dir)
+    module = importlib.import_module(f'calcul_{device}')
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        for mode in sorted(os.listdir(run_dir)):
+            if os.path.isdir(os.path.join(run_dir, mode)):
+                module.main(os.path.join(run_dir, mode))
+    return output.getvalue()
+
+# Function to compute the statistics of every configuration of one formatted run (executed in a worker process).
+# The energy of an IO is the mean of the power projected on its begin and end times its duration.
+# exclude_outliers leaves out the IOs flagged by anomaly.py.
+def node_stats(run_dir, storage, node, exclude_outliers=False):
+    rows = []
+    for root, dirs, files in os.walk(run_dir):
+        dirs.sort()
+        parts = os.path.relpath(root, run_dir).split(os.sep)
+        if len(parts) != 6 or parts[5] != 'perf':
+            continue
+        mode, category, sz_bloc, pattern, filesize, _ = parts
+        for name in sorted(f for f in files if f.startswith('perf_') and f.endswith('.csv')):
+            perf_data = pd.read_csv(os.path.join(root, name))
+            if exclude_outliers and 'outlier' in perf_data:
+                perf_data = perf_data[perf_data['outlier'] == 0]
+            if perf_data.empty:
+                continue
+            duration = perf_data['duration (s)'].to_numpy(dtype=np.float64)
+            if 'begin_energy (J)' in perf_data and 'end_energy (J)' in perf_data:
+                power = (perf_data['begin_energy (J)'].to_numpy(dtype=np.float64) + perf_data['end_energy (J)'].to_numpy(dtype=np.float64)) / 2
+            else:
+                power = np.full(len(perf_data), np.nan)
+            energy = power * duration
+            rows.append({
+                'storage': storage, 'node': node, 'mode': mode, 'pattern': pattern, 'sz_bloc': sz_bloc, 'filesize': filesize,
+                'ios': len(perf_data),
+                'iterations': perf_data['iteration'].nunique(),
+                'mean_duration (s)': duration.mean(),
+                'mean_power (W)': np.nanmean(power) if np.isfinite(power).any() else np.nan,
+                'mean_energy (J)': np.nanmean(energy) if np.isfinite(energy).any() else np.nan,
+                'median_energy (J)': np.nanmedian(energy) if np.isfinite(energy).any() else np.nan,
+                'total_energy (J)': np.nansum(energy),
+            })
+    return pd.DataFrame(rows)
+
+# Function to order the configurations like benchmark.sh (block sizes and file sizes by size)
+def sort_configs(df, extra=()):
+    order = df.assign(_sz=df['sz_bloc'].map(parse_size), _fs=df['filesize'].map(parse_size))
+    return order.sort_values(['storage', 'mode', 'pattern', '_sz', '_fs', *extra]).drop(columns=['_sz', '_fs']).reset_index(drop=True)
+
+# Function to aggregate the per-node statistics across nodes: spread of the per-node means of each configuration,
+# and deviation of every node from the cross-node mean
+def cross_node(per_node):
+    grouped = per_node.groupby(CONFIG, sort=False)
+    summary = grouped.agg(
+        nodes=('node', 'nunique'),
+        ios=('ios', 'sum'),
+        mean_duration_s=('mean_duration (s)', 'mean'),
+        std_duration_s=('mean_duration (s)', 'std'),
+        mean_energy_j=('mean_energy (J)', 'mean'),
+        std_energy_j=('mean_energy (J)', 'std'),
+        min_energy_j=('mean_energy (J)', 'min'),
+        max_energy_j=('mean_energy (J)', 'max'),
+    ).reset_index()
+    summary['cv_duration'] = summary['std_duration_s'] / summary['mean_duration_s']
+    summary['cv_energy'] = summary['std_energy_j'] / summary['mean_energy_j']
+
+    # Nodes with the lowest and highest mean energy per IO of each configuration
+    energies = per_node.dropna(subset=['mean_energy (J)'])
+    if not energies.empty:
+        extremes = energies.groupby(CONFIG, sort=False)['mean_energy (J)']
+        summary = summary.merge(energies.loc[extremes.idxmin(), CONFIG + ['node']].rename(columns={'node': 'min_node'}), on=CONFIG, how='left')
+        summary = summary.merge(energies.loc[extremes.idxmax(), CONFIG + ['node']].rename(columns={'node': 'max_node'}), on=CONFIG, how='left')
+
+    deviations = per_node.merge(summary[CONFIG + ['mean_energy_j', 'std_energy_j', 'mean_duration_s']], on=CONFIG)
+    deviations['energy_deviation (%)'] = 100 * (deviations['mean_energy (J)'] / deviations['mean_energy_j'] - 1)
+    deviations['energy_z'] = (deviations['mean_energy (J)'] - deviations['mean_energy_j']) / deviations['std_energy_j']
+    deviations['duration_deviation (%)'] = 100 * (deviations['mean_duration (s)'] / deviations['mean_duration_s'] - 1)
+    deviations = deviations.drop(columns=['mean_energy_j', 'std_energy_j', 'mean_duration_s'])
+    return sort_configs(summary), sort_configs(deviations, ['node'])
+
+# Function to format every node run of a storage in parallel (one format.sh per node)
+def format_nodes(storage, log_dir='logs', jobs=None, format_script='format.sh'):
+    runs = [run for run, _, node in discover_runs(log_dir, storage) if NODE_SEPARATOR in run]
+    if not runs:
+        print(f"No {storage}{NODE_SEPARATOR}<node> run in {log_dir}")
+        return 1
+    failed = 0
+    with stage('format_nodes') as timer, ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        for run, (returncode, output) in zip(runs, pool.map(lambda run: format_run(run, format_script), runs)):
+            last = output.strip().splitlines()[-1] if output.strip() else ''
+            print(f"[{run}] {'ok' if returncode == 0 else f'failed ({returncode})'}: {last}")
+            failed += returncode != 0
+        timer.rows = len(runs)
+
+    # One index update for all the nodes
+    from campaign_index import update
+    update(os.path.join(log_dir, 'formatted_data'))
+    return 1 if failed else 0
+
+# Function to run the calcul script on every node of a storage in parallel
+def calcul_nodes(formatted_dir, storage, device, workers=None):
+    runs = discover_runs(formatted_dir, storage)
+    with stage('calcul_nodes') as timer, ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(calcul_run, os.path.join(formatted_dir, run), device) for run, _, _ in runs]
+        for (run, _, _), future in zip(runs, futures):
+            lines = future.result().splitlines()
+            # The formatted tree has a directory for every configuration of benchmark.sh, measured or not
+            missing = sum(line.startswith('Energy file not found') for line in lines)
+            print(f"[{run}] {sum(line.startswith('Updated') for line in lines)} perf file(s) updated, {missing} configuration(s) without energy file")
+            for line in lines:
+                if not line.startswith(('Processing', 'Updated', 'Energy file not found')):
+                    print(f"[{run}] {line}")
+        timer.rows = len(runs)
+
+    # Index the projected power of every node
+    from campaign_index import update
+    update(formatted_dir, workers=workers)
+    return len(runs)
+
+# Function to compute the per-node statistics in parallel and write the cross-node reports
+def report(formatted_dir, storage=None, output_dir=None, workers=None, exclude_outliers=False):
+    runs = discover_runs(formatted_dir, storage)
+    if not runs:
+        print(f"No run found in {formatted_dir}")
+        return 0
+    with stage('node_stats') as timer, ProcessPoolExecutor(max_workers=workers) as pool:
+        frames = list(pool.map(node_stats, [os.path.join(formatted_dir, run) for run, _, _ in runs],
+                               [s for _, s, _ in runs], [node for _, _, node in runs], [exclude_outliers] * len(runs)))
+        per_node = pd.concat([frame for frame in frames if not frame.empty], ignore_index=True) if any(not f.empty for f in frames) else pd.DataFrame()
+        timer.rows = len(per_node)
+    if per_node.empty:
+        print(f"No perf file found in {formatted_dir}")
+        return 0
+
+    with stage('cross_node', rows=len(per_node)):
+        summary, deviations = cross_node(per_node)
+
+    output_dir = output_dir or formatted_dir
+    os.makedirs(output_dir, exist_ok=True)
+    summary.to_csv(os.path.join(output_dir, 'nodes_summary.csv'), index=False)
+    deviations.to_csv(os.path.join(output_dir, 'nodes_per_node.csv'), index=False)
+    print(summary[CONFIG + ['nodes', 'mean_energy_j', 'cv_energy', 'min_node', 'max_node']
+                  if 'min_node' in summary else CONFIG + ['nodes', 'mean_duration_s', 'cv_duration']].to_string(index=False))
+    print(f"{len(runs)} node(s), reports written to {output_dir}/nodes_summary.csv and nodes_per_node.csv")
+    return len(summary)
+
+# Function to align the baseline power of the nodes of a storage on a common grid, per mode and access pattern.
+# The nodes of a multi-node campaign record their baseline at the same time: the aligned traces give the idle power
+# offset of every node and whether it follows the fluctuations of the others (correlation with the cross-node mean).
+def power(log_dir, storage=None, step='1s', method='area', output_dir=None):
+    baselines = {}
+    for run, run_storage, node in discover_runs(log_dir, storage):
+        for baseline in sorted(glob.glob(os.path.join(log_dir, run, '*', '*', 'baseline', 'baseline.json'))):
+            mode, pattern = baseline.split(os.sep)[-4:-2]
+            baselines.setdefault((run_storage, mode, pattern), []).append((node, baseline))
+
+    output_dir = output_dir or log_dir
+    os.makedirs(output_dir, exist_ok=True)
+    rows = []
+    with stage('nodes_power') as timer:
+        for (run_storage, mode, pattern), nodes in sorted(baselines.items()):
+            if len(nodes) < 2:
+                continue
+            grid, values = align([Trace.from_json(path) for _, path in nodes], parse_duration(step), method)
+            if len(grid) == 0:
+                print(f"{run_storage}/{mode}/{pattern}: the baselines of the nodes do not overlap")
+                continue
+            names = [node for node, _ in nodes]
+            aligned = pd.DataFrame(values.T, columns=names)
+            aligned.insert(0, 'timestamp', np.datetime_as_string(grid.astype('datetime64[ns]'), unit='us', timezone='UTC'))
+            aligned.to_csv(os.path.join(output_dir, f'nodes_power_{run_storage}_{mode}_{pattern}.csv'), index=False)
+
+            mean = values.mean(axis=0, dtype=np.float64)
+            for node, watts in zip(names, values.astype(np.float64)):
+                rows.append({'storage': run_storage, 'mode': mode, 'pattern': pattern, 'node': node, 'points': len(grid),
+                             'mean_power_w': watts.mean(), 'offset_w': watts.mean() - mean.mean(),
+                             'rms_deviation_w': np.sqrt(np.mean((watts - mean) ** 2)),
+                             'correlation': np.corrcoef(watts, mean)[0, 1] if watts.std() > 0 and mean.std() > 0 else np.nan})
+            timer.rows += values.size
+
+    if not rows:
+        print(f"No baseline recorded by two nodes or more in {log_dir}")
+        return 0
+    summary = pd.DataFrame(rows)
+    summary.to_csv(os.path.join(output_dir, 'nodes_power.csv'), index=False)
+    print(summary.to_string(index=False))
+    print(f"Aligned baselines written to {output_dir}/nodes_power_<storage>_<mode>_<pattern>.csv and nodes_power.csv")
+    return len(summary)
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(description="Process the runs of a multi-node campaign (<storage>@<node>) in parallel")
+    commands = parser.add_subparsers(dest='command', required=True)
+    sub = commands.add_parser('format', help="Run format.sh on every <storage>@<node> run of logs/")
+    sub.add_argument('storage')
+    sub.add_argument('--jobs', type=int, help="Runs formatted at the same time (default: one per CPU)")
+    sub = commands.add_parser('calcul', help="Project the power on the IOs of every node")
+    sub.add_argument('--device', choices=['hdd', 'ssd'], required=True, help="File naming of the formatted tree")
+    sub.add_argument('formatted_dir', help="logs/formatted_data directory")
+    sub.add_argument('storage')
+    sub.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    sub = commands.add_parser('report', help="Cross-node aggregate and variance reports")
+    sub.add_argument('formatted_dir', help="logs/formatted_data directory")
+    sub.add_argument('--storage', help="Only the runs of this storage")
+    sub.add_argument('--output-dir', help="Where nodes_summary.csv and nodes_per_node.csv are written (default: formatted_dir)")
+    sub.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    sub.add_argument('--exclude-outliers', action='store_true', help="Leave out the IOs flagged by anomaly.py")
+    sub = commands.add_parser('power', help="Align the baseline power of the nodes on a common time grid")
+    sub.add_argument('log_dir', help="logs or logs/brute_data directory holding the <storage>@<node> runs")
+    sub.add_argument('--storage', help="Only the runs of this storage")
+    sub.add_argument('--step', default='1s', help="Grid step: 20ms, 1s... (default: 1s)")
+    sub.add_argument('--method', choices=METHODS, default='area', help="Interpolation (default: area, the mean power of each step)")
+    sub.add_argument('--output-dir', help="Where the aligned traces and nodes_power.csv are written (default: log_dir)")
+    return parser
+
+# Function to run a parsed command line
+def main(args):
+    if args.command == 'format':
+        return format_nodes(args.storage, jobs=args.jobs)
+    if args.command == 'calcul':
+        return calcul_nodes(args.formatted_dir, args.storage, args.device, args.workers)
+    if args.command == 'power':
+        return power(args.log_dir, args.storage, args.step, args.method, args.output_dir)
+    return report(args.formatted_dir, args.storage, args.output_dir, args.workers, args.exclude_outliers)
+
+# Entry point of the script
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    result = main(args)
+    if args.command == 'format' and result:
+        sys.exit(result)
@@ -1,27 +1,32 @@
 import pandas as pd  # Import the pandas library for data manipulation and analysis
 import matplotlib.pyplot as plt  # Import the matplotlib library for plotting graphs
 import numpy as np  # Import the numpy library for numerical operations
+import os  # Import the os library to locate the shared modules
 import sys  # Import the sys library to handle command-line arguments
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.energy import to_epoch_ns  # Timestamp parsing of the energy engine
+from common.trace import Trace  # Array-backed power trace
+from common.windows import Windows  # Binary-search windows over a trace
+
+# Margin displayed around the encapsulating measurements (0.001 minute)
+MARGIN_NS = 60_000_000
+
 # Function to calculate the mean energy between 'begin_energy (J)' and 'end_energy (J)'
 def calculate_mean_energy(begin_energy, end_energy):
     return (begin_energy + end_energy) / 2
 
 # Function to plot energy differences based on the provided energy and performance data
 def plot_energy_difference(energy_filepath, perf_filepath, output_prefix):
-    # Load energy data and performance data from their respective CSV files
-    energy_data = pd.read_csv(energy_filepath)
-    energy_data['timestamp'] = pd.to_datetime(energy_data['timestamp'])
-
+    # Load the energy trace and the performance data from their respective CSV files
+    energy = Trace.from_csv(energy_filepath)
     perf_data = pd.read_csv(perf_filepath)
-    perf_data['timestamp_begin'] = pd.to_datetime(perf_data['timestamp_begin'])
-    perf_data['timestamp_end'] = pd.to_datetime(perf_data['timestamp_end'])
 
     # Filter rows where 'begin_energy (J)' is less than 'end_energy (J)'
-    perf_data = perf_data[perf_data['begin_energy (J)'] < perf_data['end_energy (J)']]
+    perf_data = perf_data[perf_data['begin_energy (J)'] < perf_data['end_energy (J)']].reset_index(drop=True)
 
     # Calculate the delta for each row based on the difference between the measured energy and the mean energy
-    perf_data['delta'] = perf_data.apply(lambda row: abs(row['begin_energy (J)'] - row['end_energy (J)']) - calculate_mean_energy(row['begin_energy (J)'], row['end_energy (J)']), axis=1)
+    perf_data['delta'] = (perf_data['begin_energy (J)'] - perf_data['end_energy (J)']).abs() - calculate_mean_energy(perf_data['begin_energy (J)'], perf_data['end_energy (J)'])
 
     # Select the row with the largest delta where the mean energy is above the projection
     above_projection = perf_data[perf_data['energy_mean (J)'] > perf_data['end_energy (J)']]
@@ -43,37 +48,48 @@ def plot_energy_difference(energy_filepath, perf_filepath, output_prefix):
     # Filter to ensure the selected rows are distinct
     rows_to_plot = [row for row in [max_delta_above, max_delta_below, zero_delta_row] if row is not None]
 
+    # Find the measurements that encapsulate each IO with a binary search on the trace:
+    # A is the last measurement at or before the begin, B the first at or after the end
+    timestamps, watts = energy.timestamps, energy.watts
+    begins = to_epoch_ns([row['timestamp_begin'] for row in rows_to_plot])
+    ends = to_epoch_ns([row['timestamp_end'] for row in rows_to_plot])
+    a = np.searchsorted(timestamps, begins, side='right') - 1
+    b = np.searchsorted(timestamps, ends, side='left')
+    covered = (a >= 0) & (b < len(timestamps))
+    a, b = np.clip(a, 0, len(timestamps) - 1), np.clip(b, 0, len(timestamps) - 1)
+
+    # Displayed range of each IO: the encapsulating measurements widened by the margin, as views of the trace
+    windows = Windows(energy, timestamps[a] - MARGIN_NS, timestamps[b] + MARGIN_NS)
+
     for index, row in enumerate(rows_to_plot):
-        timestamp_begin = row['timestamp_begin']
-        timestamp_end = row['timestamp_end']
+        if not covered[index]:
+            print(f"IO {row['timestamp_begin']} is not encapsulated by the energy trace, skipped")
+            continue
         begin_energy = row['begin_energy (J)']
         end_energy = row['end_energy (J)']
         mean_energy = calculate_mean_energy(begin_energy, end_energy)
-
-        # Find the timestamps in energy_data that encapsulate the IO operation
-        A = energy_data[energy_data['timestamp'] <= timestamp_begin].iloc[-1]
-        B = energy_data[energy_data['timestamp'] >= timestamp_end].iloc[0]
-
-        # Add a margin around the timestamps to widen the displayed range
-        margin = pd.Timedelta(minutes=0.001)
-        filtered_energy_data = energy_data[(energy_data['timestamp'] >= (A['timestamp'] - margin)) & (energy_data['timestamp'] <= (B['timestamp'] + margin))]
+        A_timestamp, B_timestamp = timestamps[a[index]], timestamps[b[index]]
+        A_value, B_value = float(watts[a[index]]), float(watts[b[index]])
+        window = windows[index]
 
         # Create the plot
         fig, ax = plt.subplots()
 
-        # Plot the energy consumption over time (filtered data) in red
-        ax.plot(filtered_energy_data['timestamp'], filtered_energy_data['value (Watt)'], color='red', alpha=0.5)
+        # Plot the energy consumption over time (displayed range) in red
+        ax.plot(window.datetimes(), window.watts, color='red', alpha=0.5)
 
         # Add vertical lines to encapsulate the IO operation
-        ax.axvline(x=A['timestamp'], color='blue', linestyle='-', linewidth=2, label='Encadrement Begin')
-        ax.axvline(x=B['timestamp'], color='blue', linestyle='-', linewidth=2, label='Encadrement End')
+        A_datetime, B_datetime = np.datetime64(int(A_timestamp), 'ns'), np.datetime64(int(B_timestamp), 'ns')
+        ax.axvline(x=A_datetime, color='blue', linestyle='-', linewidth=2, label='Encadrement Begin')
+        ax.axvline(x=B_datetime, color='blue', linestyle='-', linewidth=2, label='Encadrement End')
 
         # Plot the black line between the encapsulating points
-        ax.plot([A['timestamp'], B['timestamp']], [A['value (Watt)'], B['value (Watt)']], 'o-', color='black', label='Measured Energy between Encadrement')
+        ax.plot([A_datetime, B_datetime], [A_value, B_value], 'o-', color='black', label='Measured Energy between Encadrement')
 
         # Calculate the projection of the IO energy on the black line
-        projection_timestamp = timestamp_end
-        projection_energy = A['value (Watt)'] + (B['value (Watt)']) * (projection_timestamp - A['timestamp']).total_seconds() / (B['timestamp'] - A['timestamp']).total_seconds()
+        projection_timestamp = np.datetime64(int(ends[index]), 'ns')
+        span = B_timestamp - A_timestamp
+        projection_energy = A_value + (B_value - A_value) * ((ends[index] - A_timestamp) / span if span > 0 else 0.0)
 
         # Add the red cross at the projection point
         ax.plot(projection_timestamp, projection_energy, 'x', color='red', label='Projection of IO Energy')
@@ -0,0 +1,164 @@
+import math  # Import math for the square root of the variance
+from statistics import NormalDist  # Normal quantiles, the limit of Student's t distribution
+
+# Function to return the two-sided quantile of Student's t distribution: the q > 0 with P(|T| <= q) = level.
+# The density is integrated from 0 (Simpson's rule) and the bound found by bisection; from 1000 degrees of
+# freedom the normal quantile is within 1e-3 and is returned as is.
+def t_quantile(level, dof):
+    if not dof or dof <= 0:
+        return math.nan
+    if dof >= 1000:
+        return NormalDist().inv_cdf((1 + level) / 2)
+    scale = math.exp(math.lgamma((dof + 1) / 2) - math.lgamma(dof / 2)) / math.sqrt(dof * math.pi)
+
+    def area(q, steps=400):
+        h = q / steps
+        total = 0.0
+        for i in range(steps + 1):
+            weight = 1 if i in (0, steps) else (4 if i % 2 else 2)
+            total += weight * (1 + (i * h) ** 2 / dof) ** (-(dof + 1) / 2)
+        return scale * total * h / 3
+
+    low, high = 0.0, 1.0
+    while area(high) < level / 2:
+        high *= 2
+    for _ in range(50):
+        middle = (low + high) / 2
+        low, high = (middle, high) if area(middle) < level / 2 else (low, middle)
+    return (low + high) / 2
+
+# Running mean/variance accumulator (Welford's algorithm), constant memory whatever the number of samples
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared differences to the current mean
+        self.min = math.inf
+        self.max = -math.inf
+
+    # Add one sample to the accumulator
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    # Merge another accumulator into this one (Chan et al. parallel formula)
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    # Sample variance (n - 1), 0 until two samples have been seen
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def stdev(self):
+        return math.sqrt(self.variance())
+
+    # Half-width of the 95% confidence interval of the mean (normal approximation)
+    def ci95(self):
+        return 1.96 * self.stdev() / math.sqrt(self.count) if self.count > 1 else math.inf
+
+    # Half-width of the confidence interval of the mean with Student's t, for a few samples (iterations)
+    def ci(self, level=0.95):
+        return t_quantile(level, self.count - 1) * self.stdev() / math.sqrt(self.count) if self.count > 1 else math.inf
+
+# Streaming quantile estimator (P-square algorithm, Jain & Chlamtac 1985), five markers per quantile
+class P2Quantile:
+    def __init__(self, q):
+        self.q = q
+        self.heights = []  # Marker heights, the first five samples are stored as-is
+        self.positions = [1, 2, 3, 4, 5]  # Actual marker positions
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]  # Desired marker positions
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    # Add one sample to the estimator
+    def add(self, value):
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # Find the cell k containing the sample and update the extreme markers
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= heights[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Adjust the three middle markers if they drifted from their desired position
+        for i in range(1, 4):
+            d = self.desired[i] - self.positions[i]
+            if (d >= 1 and self.positions[i + 1] - self.positions[i] > 1) or (d <= -1 and self.positions[i - 1] - self.positions[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, d)
+                heights[i] = height
+                self.positions[i] += d
+
+    def _parabolic(self, i, d):
+        n, h = self.positions, self.heights
+        return h[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+
+    def _linear(self, i, d):
+        n, h = self.positions, self.heights
+        return h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+
+    # Current estimate of the quantile (exact while less than five samples have been seen)
+    def value(self):
+        if not self.heights:
+            return math.nan
+        if len(self.heights) < 5:
+            return self.heights[min(int(self.q * len(self.heights)), len(self.heights) - 1)]
+        return self.heights[2]
+
+# Summary of one metric: running mean/variance plus a few streaming quantiles
+class MetricSummary:
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self):
+        self.stats = RunningStats()
+        self.quantiles = [P2Quantile(q) for q in self.QUANTILES]
+
+    def add(self, value):
+        self.stats.add(value)
+        for quantile in self.quantiles:
+            quantile.add(value)
+
+    # Return the summary as a flat dictionary, ready to be printed or dumped as JSON
+    def as_dict(self):
+        summary = {
+            'count': self.stats.count,
+            'mean': self.stats.mean,
+            'stdev': self.stats.stdev(),
+            'ci95': self.stats.ci95(),
+            'min': self.stats.min,
+            'max': self.stats.max,
+        }
+        for quantile in self.quantiles:
+            summary[f'p{int(quantile.q * 100)}'] = quantile.value()
+        return summary
@@ -1,63 +1,149 @@
 import os  # Import the os module for interacting with the operating system, such as file paths
 import sys  # Import the sys module to handle command-line arguments
-import json  # Import the json module to parse JSON files
 import pandas as pd  # Import the pandas library for data manipulation and analysis
-import matplotlib.pyplot as plt  # Import the matplotlib library for creating plots
-
-# Check if the correct number of command-line arguments is provided
-if len(sys.argv) != 2:
-    print("Usage: python box_plot_baseline.py <log_dir>")  # Display usage instructions
-    sys.exit(1)  # Exit the program if the wrong number of arguments is provided
-
-# Retrieve the path to the log directory from the command-line argument
-log_dir = sys.argv[1]
-
-# Define the path to the baseline JSON file within the log directory
-json_file = os.path.join(log_dir, 'baseline', 'baseline.json')
-
-# Define the directory where the boxplot will be saved
-boxplot_dir = os.path.join(log_dir, 'box_plot')
-os.makedirs(boxplot_dir, exist_ok=True)  # Create the directory if it doesn't exist
-
-# Load the JSON data from the baseline file
-with open(json_file, 'r') as f:
-    data = json.load(f)
-
-# Convert the JSON data into a pandas DataFrame for easier manipulation
-df = pd.json_normalize(data)
-
-# Filter the DataFrame to include only the baseline measurements
-df_baseline = df[df['metric_id'] == 'wattmetre_power_watt']
-
-# Add a new column to the DataFrame for labeling the boxplot
-df_baseline['label'] = 'baseline'
-
-# Create the boxplot using the filtered baseline data
-plt.figure(figsize=(10, 6))
-boxplot = df_baseline.boxplot(column='value', by='label', grid=True, showfliers=False, patch_artist=True)
-
-# Customize the appearance of the boxplot
-for patch in boxplot.artists:
-    patch.set_facecolor('purple')  # Set the fill color of the boxplot to purple
-    patch.set_edgecolor('black')   # Set the edge color of the boxplot to black
-
-# Add labels and a title to the boxplot
-plt.title('Boxplot of wattmeter measurement during 15 minutes before IO')
-plt.suptitle('')  # Remove the automatic subtitle generated by pandas
-plt.xlabel('')  # Remove the x-axis label
-plt.ylabel('Watt')  # Label the y-axis as "Watt"
-plt.xticks(rotation=0)  # Keep the x-axis labels horizontal
-
-# Add a grid to the boxplot for better readability
-plt.grid(True, linestyle='--', linewidth=0.7, alpha=0.7)
-
-# Save the boxplot as a PNG image in the specified directory
-output_file = os.path.join(boxplot_dir, 'boxplot_baseline.png')
-plt.savefig(output_file)
-
-# Close the plot to prevent additional empty plots from being displayed
-plt.close()
-
-# Print a message indicating that the boxplot has been saved
-print(f"Boxplot saved to {output_file}")
-
+import matplotlib  # Import the matplotlib library for creating plots
+
+matplotlib.use('Agg')  # Non-interactive backend, the figures are only written to disk
+import matplotlib.pyplot as plt  # Import the pyplot module from matplotlib for creating plots
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+from common.energy import to_epoch_ns  # Vectorized energy engine
+from common.trace import Trace  # Array-backed power trace
+from common.windows import Windows  # Binary-search windows over a trace
+from common.layout import parse_size, power_file  # Size parsing for the plotting order, power traces
+from common.manifest import block_sizes as measured_block_sizes, file_sizes  # Configurations of the campaign
+
+# Function to read the first and last timestamp from an iotest timestamp file
+def read_first_and_last_timestamp(filepath):
+    with open(filepath, 'r') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return lines[0], lines[-1]
+
+# Function to build the idle windows [end of iteration k, begin of iteration k+1] of one configuration
+def read_idle_windows(timestamp_dir, sz_bloc, filesize):
+    begin_files = sorted(f for f in os.listdir(timestamp_dir) if f.startswith(f'io_begin_{sz_bloc}_{filesize}_iteration_'))
+    end_files = sorted(f for f in os.listdir(timestamp_dir) if f.startswith(f'io_end_{sz_bloc}_{filesize}_iteration_'))
+
+    if len(begin_files) != len(end_files):
+        print(f"Warning: Mismatch in number of begin and end files for {sz_bloc} {filesize}")
+        return None
+
+    # Only the last IO of an iteration and the first IO of the next one bound a cool-down window
+    iteration_begins = [read_first_and_last_timestamp(os.path.join(timestamp_dir, f))[0] for f in begin_files]
+    iteration_ends = [read_first_and_last_timestamp(os.path.join(timestamp_dir, f))[1] for f in end_files]
+
+    if len(iteration_begins) < 2:
+        return None
+
+    window_begins = to_epoch_ns(iteration_ends[:-1])
+    window_ends = to_epoch_ns(iteration_begins[1:])
+    return window_begins, window_ends
+
+# Function to collect the idle-window samples of every (sz_bloc, filesize) of a log directory
+def collect_idle_samples(log_dir, block_sizes):
+    timestamp_dir = os.path.join(log_dir, 'io_timestamp')
+    frames = []
+
+    for sz_bloc in block_sizes:
+        for filesize in file_sizes(log_dir, sz_bloc):
+            # Power trace of the configuration, named after the mode of log_dir
+            read_file = power_file(log_dir, sz_bloc, filesize)
+            if read_file is None:
+                print(f"Warning: No power trace found for {sz_bloc} {filesize}")
+                continue
+
+            windows = read_idle_windows(timestamp_dir, sz_bloc, filesize)
+            if windows is None:
+                print(f"Warning: Less than two iterations found for {sz_bloc} {filesize}")
+                continue
+
+            # Samples strictly after the end of iteration k and strictly before the begin of iteration k+1
+            samples, window_ids = Windows(Trace.from_json(read_file), *windows, inclusive=False).samples()
+
+            frames.append(pd.DataFrame({
+                'sz_bloc': sz_bloc,
+                'filesize': filesize,
+                'window': window_ids + 1,  # Numbered after the iteration that precedes them (01 -> between 01 and 02)
+                'value': samples,
+            }))
+
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+# Function to draw the boxes of one block size (one box per file size) on an axis
+def draw_block_size(ax, df_sz, sz_bloc):
+    colors = ['purple', 'orange', 'green']  # Define colors for the boxplot
+    sizes = sorted(set(df_sz['filesize']), key=parse_size)
+    data = [df_sz.loc[df_sz['filesize'] == size, 'value'].to_numpy() for size in sizes]
+
+    boxplot = ax.boxplot(data, patch_artist=True, showfliers=False)
+    ax.set_xticks(range(1, len(sizes) + 1), sizes)
+    for patch, color in zip(boxplot['boxes'], colors):
+        patch.set_facecolor(color)  # Set the fill color of the boxplot
+        patch.set_edgecolor('black')  # Set the edge color of the boxplot
+
+    # Report how many windows contributed to each box
+    nb_windows = df_sz.groupby('filesize')['window'].nunique()
+    ax.set_title(f'IO size {sz_bloc} ({", ".join(f"{size}: {nb_windows[size]} windows" for size in sizes)})', fontsize=9)
+    ax.set_xlabel('File Size')
+    ax.set_ylabel('Watt')
+    ax.grid(True, linestyle='--', linewidth=0.7, alpha=0.7)
+
+# Function to save one boxplot per block size plus a grid with all block sizes
+def plot_idle_windows(df_all, boxplot_dir):
+    block_sizes = sorted(set(df_all['sz_bloc']), key=parse_size)
+
+    # Per block size figure, kept for format.sh which copies boxplot_<sz_bloc>.png
+    for sz_bloc in block_sizes:
+        fig, ax = plt.subplots(figsize=(12, 8))
+        draw_block_size(ax, df_all[df_all['sz_bloc'] == sz_bloc], sz_bloc)
+        fig.suptitle(f'Boxplot of wattmeter measurement between IO iterations of size {sz_bloc}')
+        output_file = os.path.join(boxplot_dir, f'boxplot_{sz_bloc}.png')
+        fig.savefig(output_file)
+        plt.close(fig)
+        print(f"Boxplot saved to {output_file}")
+
+    # Grid with every block size, three columns (one row per group of block sizes)
+    ncols = min(3, len(block_sizes))
+    nrows = (len(block_sizes) + ncols - 1) // ncols
+    fig, axes = plt.subplots(nrows, ncols, figsize=(6 * ncols, 4.5 * nrows), sharey=True, squeeze=False)
+    for ax, sz_bloc in zip(axes.flat, block_sizes):
+        draw_block_size(ax, df_all[df_all['sz_bloc'] == sz_bloc], sz_bloc)
+    for ax in axes.flat[len(block_sizes):]:
+        ax.set_visible(False)  # Hide the unused cells of the grid
+
+    fig.suptitle('Boxplot of wattmeter measurement between IO iterations')
+    fig.tight_layout()
+    output_file = os.path.join(boxplot_dir, 'boxplot_io_all.png')
+    fig.savefig(output_file)
+    plt.close(fig)
+    print(f"Boxplot saved to {output_file}")
+
+# Main function: extract the idle windows of the requested block sizes and plot them
+def main(log_dir, block_sizes):
+    # Define the output directory for the boxplots
+    boxplot_dir = os.path.join(log_dir, 'box_plot')
+    os.makedirs(boxplot_dir, exist_ok=True)
+
+    with stage('collect_idle_samples') as timer:
+        df_all = collect_idle_samples(log_dir, block_sizes)
+        timer.rows = 0 if df_all is None else len(df_all)
+    if df_all is None:
+        print(f"Error: No idle window found in {log_dir}")
+        sys.exit(1)
+
+    with stage('plot_idle_windows', rows=len(df_all)):
+        plot_idle_windows(df_all, boxplot_dir)
+
+# Entry point of the script
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python box_plot_io.py <log_dir> [<sz_bloc> ...]")
+        sys.exit(1)
+
+    log_dir = sys.argv[1]
+    # Without explicit block sizes, every block size of the campaign is processed
+    block_sizes = sys.argv[2:] or measured_block_sizes(log_dir)
+    main(log_dir, block_sizes)
@@ -0,0 +1,323 @@
+import os  # Import os to walk the formatted tree
+import sys  # Import sys to locate the shared modules
+import json  # Import json to embed the tiles in the page
+import base64  # Import base64 to embed the binary tiles as text
+import argparse  # Import argparse for the exporter options
+import numpy as np  # Import numpy for the aggregation pyramids
+import pandas as pd  # Import pandas to read the perf tables
+from concurrent.futures import ProcessPoolExecutor  # Process pool, the configurations are aggregated independently
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+from common.energy import to_epoch_ns, NS_PER_S  # Timestamp parsing of the energy engine
+from common.trace import Trace  # Array-backed power trace
+from common.layout import parse_size  # Size suffixes of tools.h
+from common.resample import parse_duration  # Duration arguments (20ms, 1s...)
+
+# Self-contained HTML dashboard of a formatted campaign. The power trace of every configuration is aggregated into
+# a pyramid of levels: level 0 has bins of the finest step, each following level merges pairs of bins, until the
+# whole trace fits in one tile. A bin holds the min, max and mean power and the number of IOs starting in it, and
+# each level is cut in tiles of TILE_BINS bins stored as base64 float32. The page only decodes the tiles of the
+# level matching the zoom and the visible range, so the cost of a redraw does not depend on the campaign size.
+# At the finest levels the IOs themselves are drawn from the IO tiles (begin, duration and energy of each IO).
+TILE_BINS = 512
+
+# Finest step of the pyramid (the 50 Hz of the wattmeters)
+MIN_STEP = '20ms'
+
+# Levels at which the IO windows are drawn one by one (IO counts per bin above)
+IO_LEVELS = 3
+
+# Function to encode a float32 array as base64
+def encode(array):
+    return base64.b64encode(np.ascontiguousarray(array, dtype='<f4').tobytes()).decode('ascii')
+
+# Function to aggregate samples into bins of step ns from t0: min, max, sum and count of every bin (NaN when empty)
+def bin_samples(timestamps, values, t0, step, nb_bins):
+    index = (timestamps - t0) // step
+    minimum, maximum = np.full(nb_bins, np.nan), np.full(nb_bins, np.nan)
+    total, count = np.zeros(nb_bins), np.zeros(nb_bins)
+    if len(index):
+        bins, starts = np.unique(index, return_index=True)
+        values = values.astype(np.float64)
+        minimum[bins] = np.minimum.reduceat(values, starts)
+        maximum[bins] = np.maximum.reduceat(values, starts)
+        total[bins] = np.add.reduceat(values, starts)
+        count[bins] = np.diff(np.append(starts, len(values)))
+    return minimum, maximum, total, count
+
+# Function to build the pyramid of a trace and of its IO begins: list of (min, max, mean, io_count) per level
+def pyramid(trace, io_begins, t0, step, tile_bins=TILE_BINS):
+    nb_bins = int((trace.timestamps[-1] - t0) // step) + 1
+    minimum, maximum, total, count = bin_samples(trace.timestamps, trace.watts, t0, step, nb_bins)
+    io_index = (io_begins - t0) // step
+    ios = np.bincount(io_index[(io_index >= 0) & (io_index < nb_bins)], minlength=nb_bins).astype(np.float64)
+
+    levels = []
+    while True:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            levels.append((minimum, maximum, total / count, ios))
+        if len(minimum) <= tile_bins:
+            return levels
+        # Merge the pairs of bins (an odd last bin is merged with an empty one)
+        if len(minimum) % 2:
+            minimum, maximum = np.append(minimum, np.nan), np.append(maximum, np.nan)
+            total, count, ios = np.append(total, 0), np.append(count, 0), np.append(ios, 0)
+        minimum = np.fmin(minimum[0::2], minimum[1::2])
+        maximum = np.fmax(maximum[0::2], maximum[1::2])
+        total, count, ios = total[0::2] + total[1::2], count[0::2] + count[1::2], ios[0::2] + ios[1::2]
+
+# Function to read the IOs of a perf file: begin and end (ns) and energy (J, NaN before calcul)
+def read_ios(perf_filepath):
+    perf_data = pd.read_csv(perf_filepath)
+    begins = to_epoch_ns(perf_data['timestamp_begin'].astype(str))
+    ends = to_epoch_ns(perf_data['timestamp_end'].astype(str))
+    if 'begin_energy (J)' in perf_data and 'end_energy (J)' in perf_data:
+        power = (perf_data['begin_energy (J)'].to_numpy(dtype=np.float64) + perf_data['end_energy (J)'].to_numpy(dtype=np.float64)) / 2
+    else:
+        power = np.full(len(perf_data), np.nan)
+    order = np.argsort(begins, kind='stable')
+    return begins[order], ends[order], (power * perf_data['duration (s)'].to_numpy(dtype=np.float64))[order]
+
+# Function to aggregate one configuration into its tiles (executed in a worker process)
+def build_config(config, step, tile_bins=TILE_BINS):
+    trace = Trace.from_csv(config['energy'])
+    if len(trace) < 2:
+        return None
+    begins, ends, energies = read_ios(config['perf']) if config['perf'] else (np.empty(0, np.int64),) * 2 + (np.empty(0),)
+    t0 = int(trace.timestamps[0])
+
+    tiles = {}
+    levels = pyramid(trace, begins, t0, step, tile_bins)
+    for level, arrays in enumerate(levels):
+        for tile in range(-(-len(arrays[0]) // tile_bins)):
+            chunk = [array[tile * tile_bins:(tile + 1) * tile_bins] for array in arrays]
+            if np.isnan(chunk[0]).all() and not chunk[3].any():
+                continue  # Nothing in this tile, the page draws a gap
+            tiles[f'{level}:{tile}'] = encode(np.concatenate([np.pad(a, (0, tile_bins - len(a)), constant_values=np.nan) for a in chunk]))
+
+    # IO tiles: the IOs starting in each tile of level 0, as ms offsets from the tile start, durations (ms), energies (J)
+    io_tiles = {}
+    tile_span = tile_bins * step
+    tile_of = (begins - t0) // tile_span
+    for tile in np.unique(tile_of):
+        selected = tile_of == tile
+        offsets = (begins[selected] - t0 - tile * tile_span) / 1e6
+        io_tiles[str(int(tile))] = encode(np.concatenate([offsets, (ends[selected] - begins[selected]) / 1e6, energies[selected]]))
+
+    finite = energies[np.isfinite(energies)]
+    return dict(config['dims'],
+                label=config['label'],
+                t0_ms=t0 / 1e6,
+                step_ms=step / 1e6,
+                levels=len(levels),
+                tiles=tiles,
+                io_tiles=io_tiles,
+                summary={'samples': len(trace), 'span_s': round((trace.timestamps[-1] - t0) / NS_PER_S, 1),
+                         'ios': int(len(begins)), 'mean_duration_ms': round(float(((ends - begins) / 1e6).mean()), 4) if len(begins) else None,
+                         'mean_energy_j': round(float(finite.mean()), 6) if len(finite) else None,
+                         'mean_power_w': round(float(np.mean(trace.watts)), 2)})
+
+# Function to list the configurations of a formatted tree (formatted_data, a run or a mode): energy and perf files
+def discover_configs(root):
+    configs = []
+    for directory, dirs, files in os.walk(root):
+        dirs.sort()
+        if os.path.basename(directory) != 'energy':
+            continue
+        energy_files = sorted(name for name in files if name.endswith('.csv'))
+        if not energy_files:
+            continue
+        config_dir = os.path.dirname(directory)
+        perf_dir = os.path.join(config_dir, 'perf')
+        perf_files = sorted(name for name in os.listdir(perf_dir) if name.startswith('perf_') and name.endswith('.csv')) if os.path.isdir(perf_dir) else []
+        parts = os.path.relpath(config_dir, root).split(os.sep)
+        # The last four levels are <category>/<sz_bloc>/<pattern>/<filesize>, preceded by <run>/<mode> when present
+        sz_bloc, pattern, filesize = (parts[-3], parts[-2], parts[-1]) if len(parts) >= 4 else (None, None, parts[-1])
+        configs.append({
+            'label': '/'.join(part for part in parts if not part.endswith('_size_io')),
+            'dims': {'sz_bloc': sz_bloc, 'pattern': pattern, 'filesize': filesize},
+            'energy': os.path.join(directory, energy_files[0]),
+            'perf': os.path.join(perf_dir, perf_files[0]) if perf_files else None,
+        })
+    # Campaign order: by pattern, then block size and file size
+    return sorted(configs, key=lambda c: (c['label'].split('/')[:-3], c['dims']['pattern'] or '',
+                                          parse_size(c['dims']['sz_bloc'] or 0), parse_size(c['dims']['filesize'] or 0)))
+
+# Function to write the dashboard of a formatted tree
+def main(formatted_dir, output=None, min_step=MIN_STEP, tile_bins=TILE_BINS, workers=None):
+    configs = discover_configs(formatted_dir)
+    if not configs:
+        print(f"No energy data found in {formatted_dir}")
+        return 0
+    step = parse_duration(min_step)
+    with stage('dashboard_tiles') as timer, ProcessPoolExecutor(max_workers=workers) as pool:
+        built = [config for config in pool.map(build_config, configs, [step] * len(configs), [tile_bins] * len(configs)) if config]
+        timer.rows = sum(config['summary']['samples'] for config in built)
+
+    output = output or os.path.join(formatted_dir, 'dashboard.html')
+    data = {'title': os.path.abspath(formatted_dir), 'tile_bins': tile_bins, 'io_levels': IO_LEVELS, 'configs': built}
+    with open(output, 'w') as f:
+        # '</' cannot appear inside the script element
+        f.write(PAGE.replace('__DATA__', json.dumps(data, separators=(',', ':')).replace('</', '<\\/')))
+    size = os.path.getsize(output)
+    print(f"Dashboard of {len(built)} configuration(s) written to {output} ({size / 1e6:.1f} MB)")
+    return len(built)
+
+# Page of the dashboard: the data, a configuration list and a canvas drawn from the tiles of the current zoom
+PAGE = r"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>IO energy campaign</title>
+<style>
+body { font-family: sans-serif; margin: 0; display: flex; height: 100vh; }
+#side { width: 300px; overflow-y: auto; border-right: 1px solid #ccc; font-size: 12px; }
+#side div { padding: 4px 8px; cursor: pointer; border-bottom: 1px solid #eee; }
+#side div.active { background: #dde8ff; }
+#main { flex: 1; display: flex; flex-direction: column; }
+#info { padding: 6px 10px; font-size: 13px; border-bottom: 1px solid #ccc; }
+#plot { flex: 1; width: 100%; cursor: grab; }
+</style>
+</head>
+<body>
+<div id="side"></div>
+<div id="main"><div id="info"></div><canvas id="plot"></canvas></div>
+<script id="data" type="application/json">__DATA__</script>
+<script>
+const DATA = JSON.parse(document.getElementById('data').textContent);
+const canvas = document.getElementById('plot'), ctx = canvas.getContext('2d');
+const cache = new Map();  // Decoded tiles, keyed by configuration, kind and tile
+let config = null, view = null;
+
+// Decode a base64 float32 tile once
+function decode(key, text) {
+  if (!cache.has(key)) {
+    const bytes = Uint8Array.from(atob(text), c => c.charCodeAt(0));
+    cache.set(key, new Float32Array(bytes.buffer));
+  }
+  return cache.get(key);
+}
+
+function select(index) {
+  config = DATA.configs[index];
+  view = [0, config.summary.span_s * 1000 || config.step_ms * DATA.tile_bins];
+  document.querySelectorAll('#side div').forEach((d, i) => d.classList.toggle('active', i === index));
+  draw();
+}
+
+// Level whose bins are about one pixel wide over the visible range
+function level() {
+  const perPixel = (view[1] - view[0]) / canvas.width;
+  const wanted = Math.ceil(Math.log2(Math.max(perPixel / config.step_ms, 1)));
+  return Math.min(Math.max(wanted, 0), config.levels - 1);
+}
+
+function draw() {
+  canvas.width = canvas.clientWidth; canvas.height = canvas.clientHeight;
+  ctx.clearRect(0, 0, canvas.width, canvas.height);
+  if (!config) return;
+  const L = level(), bin = config.step_ms * 2 ** L, n = DATA.tile_bins, span = bin * n;
+  const bins = [];
+  for (let t = Math.floor(view[0] / span); t <= Math.floor(view[1] / span); t++) {
+    const text = config.tiles[L + ':' + t];
+    if (!text) continue;
+    const tile = decode(config.label + '|' + L + ':' + t, text);
+    for (let i = 0; i < n; i++) {
+      const start = (t * n + i) * bin;
+      if (start + bin < view[0] || start > view[1]) continue;
+      bins.push([start, tile[i], tile[n + i], tile[2 * n + i], tile[3 * n + i]]);
+    }
+  }
+  const power = bins.filter(b => !isNaN(b[1]));
+  const low = Math.min(...power.map(b => b[1])), high = Math.max(...power.map(b => b[2]));
+  const top = 20, bottom = canvas.height - 60, left = 50;
+  const x = t => left + (t - view[0]) / (view[1] - view[0]) * (canvas.width - left - 10);
+  const y = w => bottom - (w - low) / ((high - low) || 1) * (bottom - top);
+
+  // IOs: one by one at the finest levels, as the number of IOs per bin above
+  if (L < DATA.io_levels) {
+    const tileSpan = config.step_ms * n;
+    ctx.fillStyle = 'rgba(0, 120, 255, 0.25)';
+    for (let t = Math.floor(view[0] / tileSpan) - 1; t <= Math.floor(view[1] / tileSpan); t++) {
+      const text = config.io_tiles[t];
+      if (!text) continue;
+      const ios = decode(config.label + '|io' + t, text), m = ios.length / 3;
+      for (let i = 0; i < m; i++) {
+        const begin = t * tileSpan + ios[i], end = begin + ios[m + i];
+        if (end < view[0] || begin > view[1]) continue;
+        ctx.fillRect(x(begin), top, Math.max(x(end) - x(begin), 1), bottom - top);
+      }
+    }
+  } else {
+    const most = Math.max(1, ...bins.map(b => b[4]));
+    ctx.fillStyle = 'rgba(0, 120, 255, 0.6)';
+    for (const b of bins) if (b[4] > 0) ctx.fillRect(x(b[0]), canvas.height - 40, Math.max(x(b[0] + bin) - x(b[0]), 1), -20 * b[4] / most);
+  }
+
+  // Power: min/max band and mean line
+  ctx.fillStyle = 'rgba(220, 0, 0, 0.2)';
+  for (const b of power) ctx.fillRect(x(b[0]), y(b[2]), Math.max(x(b[0] + bin) - x(b[0]), 1), Math.max(y(b[1]) - y(b[2]), 1));
+  ctx.strokeStyle = 'red'; ctx.beginPath();
+  power.forEach((b, i) => (i ? ctx.lineTo : ctx.moveTo).call(ctx, x(b[0] + bin / 2), y(b[3])));
+  ctx.stroke();
+
+  // Axes
+  ctx.fillStyle = 'black'; ctx.font = '11px sans-serif';
+  if (power.length) { ctx.fillText(high.toFixed(1) + ' W', 2, top + 4); ctx.fillText(low.toFixed(1) + ' W', 2, bottom); }
+  const date = ms => new Date(config.t0_ms + ms).toISOString().replace('T', ' ').slice(0, 23);
+  ctx.fillText(date(view[0]), left, canvas.height - 5);
+  const end = date(view[1]);
+  ctx.fillText(end, canvas.width - ctx.measureText(end).width - 10, canvas.height - 5);
+  const s = config.summary;
+  document.getElementById('info').textContent = config.label + ' | ' + s.samples + ' samples over ' + s.span_s + ' s, mean ' + s.mean_power_w +
+    ' W | ' + s.ios + ' IOs, mean ' + s.mean_duration_ms + ' ms, ' + s.mean_energy_j + ' J/IO | level ' + L + ' (' + bin.toFixed(0) + ' ms bins)';
+}
+
+// Zoom around the cursor with the wheel, pan by dragging, reset with a double click
+canvas.addEventListener('wheel', e => {
+  e.preventDefault();
+  const f = e.deltaY > 0 ? 1.25 : 0.8, at = view[0] + (e.offsetX - 50) / (canvas.width - 60) * (view[1] - view[0]);
+  view = [at - (at - view[0]) * f, at + (view[1] - at) * f];
+  draw();
+}, { passive: false });
+let drag = null;
+canvas.addEventListener('mousedown', e => drag = [e.clientX, view.slice()]);
+window.addEventListener('mouseup', () => drag = null);
+window.addEventListener('mousemove', e => {
+  if (!drag) return;
+  const shift = (drag[0] - e.clientX) / (canvas.width - 60) * (drag[1][1] - drag[1][0]);
+  view = [drag[1][0] + shift, drag[1][1] + shift];
+  draw();
+});
+canvas.addEventListener('dblclick', () => select(DATA.configs.indexOf(config)));
+window.addEventListener('resize', draw);
+
+const side = document.getElementById('side');
+DATA.configs.forEach((c, i) => {
+  const item = document.createElement('div');
+  item.textContent = c.label + (c.summary.mean_energy_j != null ? ' - ' + c.summary.mean_energy_j.toPrecision(3) + ' J/IO' : '');
+  item.onclick = () => select(i);
+  side.appendChild(item);
+});
+document.title = 'IO energy - ' + DATA.title;
+if (DATA.configs.length) select(0);
+</script>
+</body>
+</html>
+"""
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(description="Export a formatted campaign as a self-contained HTML dashboard")
+    parser.add_argument('formatted_dir', help="formatted_data, formatted_data/<run> or formatted_data/<run>/<mode> directory")
+    parser.add_argument('--output', help="HTML file (default: <formatted_dir>/dashboard.html)")
+    parser.add_argument('--min-step', default=MIN_STEP, help=f"Bins of the finest level: 20ms, 100ms, 1s... (default: {MIN_STEP})")
+    parser.add_argument('--tile-bins', type=int, default=TILE_BINS, help=f"Bins per tile (default: {TILE_BINS})")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    return parser
+
+# Entry point of the script
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    main(args.formatted_dir, args.output, args.min_step, args.tile_bins, args.workers)
@@ -1,23 +1,22 @@
 import sys  # Import the sys module for handling command-line arguments
 import os  # Import the os module for interacting with the operating system, such as handling file paths
-import json  # Import the json module to parse JSON files
-import matplotlib  # Import the matplotlib library for creating plots
 
-matplotlib.use('Qt5Agg')  # Set the backend for matplotlib to 'Qt5Agg', suitable for non-interactive script usage
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.backend import use_backend  # Qt5Agg when a display is available, Agg on headless nodes
+from common.trace import Trace  # Array-backed power trace
+
+use_backend(interactive=True)
 import matplotlib.pyplot as plt  # Import the pyplot module from matplotlib for easy plotting
-from dateutil.parser import parse as parse_date  # Import the parse function from dateutil.parser to convert strings into datetime objects
 
-# Function to load data from a JSON file
+# Function to load the wattmeter trace of a JSON file
 def load_data(file_path):
-    with open(file_path, 'r') as file:  # Open the file in read mode
-        data = json.load(file)  # Load the JSON data from the file
-    return data  # Return the loaded data
+    return Trace.from_json(file_path)
 
 # Function to plot the baseline energy consumption over time
-def plot_baseline(baseline_data, log_dir):
-    # Convert timestamps from string to datetime objects for plotting
-    baseline_timestamps = [parse_date(entry['timestamp']) for entry in baseline_data]
-    baseline_watt_values = [entry['value'] for entry in baseline_data]
+def plot_baseline(baseline_trace, log_dir):
+    # Datetime view of the int64 timestamps, no per-sample object is created
+    baseline_timestamps = baseline_trace.datetimes()
+    baseline_watt_values = baseline_trace.watts
 
     # Set up the plot with a specific size (10 inches by 6 inches)
     plt.figure(figsize=(10, 6))
@@ -69,10 +68,10 @@ def main(log_dir):
         return
 
     # Load the baseline data from the JSON file
-    baseline_data = load_data(baseline_file)
+    baseline_trace = load_data(baseline_file)
     
     # Plot the baseline data
-    plot_baseline(baseline_data, log_dir)
+    plot_baseline(baseline_trace, log_dir)
 
 # Entry point of the script
 if __name__ == "__main__":
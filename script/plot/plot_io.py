@@ -1,25 +1,28 @@
 import sys
 import os
-import json
-import matplotlib
-matplotlib.use('Qt5Agg')  # Use non-interactive backend suitable for scripts
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.backend import use_backend  # Qt5Agg when a display is available, Agg on headless nodes
+from common.trace import Trace  # Array-backed power trace
+from common.layout import power_file  # Power trace of a configuration of a raw log directory
+from common.manifest import file_sizes  # File sizes measured in a raw log directory
+
+use_backend(interactive=True)
 import matplotlib.pyplot as plt
 from dateutil.parser import parse as parse_date
 
 def load_data(file_path):
-    with open(file_path, 'r') as file:
-        data = json.load(file)
-    return data
+    return Trace.from_json(file_path)
 
 def read_all_timestamps(filepath):
     with open(filepath, 'r') as f:
         lines = f.readlines()
     return [line.strip() for line in lines]
 
-def plot_io(io_data, io_timestamps, log_dir, sz_bloc, filesize):
-    # Convert timestamps from string to datetime objects for plotting
-    io_timestamps_dt = [parse_date(entry['timestamp']) for entry in io_data]
-    io_watt_values = [entry['value'] for entry in io_data]
+def plot_io(io_trace, io_timestamps, log_dir, sz_bloc, filesize):
+    # Datetime view of the int64 timestamps, no per-sample object is created
+    io_timestamps_dt = io_trace.datetimes()
+    io_watt_values = io_trace.watts
 
     # Setup the plot with a specific size
     plt.figure(figsize=(12, 8))
@@ -62,20 +65,15 @@ def plot_io(io_data, io_timestamps, log_dir, sz_bloc, filesize):
     print(f"Plot saved to {output_path}")
 
 def main(log_dir, sz_bloc):
-    io_sizes = ['256M', '1G', '4G']
+    io_sizes = file_sizes(log_dir, sz_bloc)
     for filesize in io_sizes:
-        read_file_small = os.path.join(log_dir, f'small_size_io/READ_{sz_bloc}/READ_{filesize}.json')
-        read_file_big = os.path.join(log_dir, f'big_size_io/READ_{sz_bloc}/READ_{filesize}.json')
-        
-        if os.path.exists(read_file_small):
-            read_file = read_file_small
-        elif os.path.exists(read_file_big):
-            read_file = read_file_big
-        else:
-            print(f"Error: Neither {read_file_small} nor {read_file_big} exists.")
+        # Power trace of the configuration, named after the mode of log_dir
+        read_file = power_file(log_dir, sz_bloc, filesize)
+        if read_file is None:
+            print(f"Error: No power trace of {sz_bloc} {filesize} in {log_dir}.")
             continue
 
-        io_data = load_data(read_file)
+        io_trace = load_data(read_file)
 
         # Lister tous les fichiers io_begin et io_end disponibles
         timestamp_dir = os.path.join(log_dir, 'io_timestamp')
@@ -103,7 +101,7 @@ def main(log_dir, sz_bloc):
         # Convertir les timestamps en objets datetime
         io_timestamps = [(parse_date(begin), parse_date(end)) for begin, end in io_timestamps]
 
-        plot_io(io_data, io_timestamps, log_dir, sz_bloc, filesize)
+        plot_io(io_trace, io_timestamps, log_dir, sz_bloc, filesize)
 
 if __name__ == "__main__":
     if len(sys.argv) != 3:
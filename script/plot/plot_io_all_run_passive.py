@@ -1,17 +1,20 @@
 import sys  # Import the sys module to handle command-line arguments
 import os  # Import the os module for interacting with the file system
-import json  # Import the json module for parsing JSON files
 import matplotlib  # Import the matplotlib library for creating plots
 
 matplotlib.use('Agg')  # Set the backend for matplotlib to 'Agg', which is suitable for generating plots in non-interactive environments
 import matplotlib.pyplot as plt  # Import the pyplot module from matplotlib for creating plots
 from dateutil.parser import parse as parse_date  # Import the parse function from dateutil.parser to convert strings into datetime objects
 
-# Function to load data from a JSON file
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.instrument import stage  # Stage timer, enabled by IOPROTOCOL_PROFILE
+from common.trace import Trace  # Array-backed power trace
+from common.layout import power_file  # Power trace of a configuration of a raw log directory
+from common.manifest import file_sizes  # File sizes measured in a raw log directory
+
+# Function to load the wattmeter trace of a JSON file
 def load_data(file_path):
-    with open(file_path, 'r') as file:  # Open the file in read mode
-        data = json.load(file)  # Load the JSON data from the file
-    return data  # Return the loaded data
+    return Trace.from_json(file_path)
 
 # Function to read all timestamps from a file
 def read_all_timestamps(filepath):
@@ -20,10 +23,10 @@ def read_all_timestamps(filepath):
     return [line.strip() for line in lines]  # Return the lines as a list, with each line stripped of leading/trailing whitespace
 
 # Function to plot the IO energy consumption data
-def plot_io(io_data, io_timestamps, log_dir, sz_bloc, filesize):
-    # Convert timestamps from string to datetime objects for plotting
-    io_timestamps_dt = [parse_date(entry['timestamp']) for entry in io_data]
-    io_watt_values = [entry['value'] for entry in io_data]
+def plot_io(io_trace, io_timestamps, log_dir, sz_bloc, filesize):
+    # Datetime view of the int64 timestamps, no per-sample object is created
+    io_timestamps_dt = io_trace.datetimes()
+    io_watt_values = io_trace.watts
 
     # Set up the plot with a specific size (12 inches by 8 inches)
     plt.figure(figsize=(12, 8))
@@ -71,21 +74,15 @@ def plot_io(io_data, io_timestamps, log_dir, sz_bloc, filesize):
 
 # Main function to load data, process timestamps, and plot the IO energy consumption
 def main(log_dir, sz_bloc):
-    io_sizes = ['256M', '1G', '4G']  # List of file sizes to process
+    io_sizes = file_sizes(log_dir, sz_bloc)  # File sizes measured for this block size
     for filesize in io_sizes:
-        # Construct file paths for small and big IO sizes
-        read_file_small = os.path.join(log_dir, f'small_size_io/READ_{sz_bloc}/READ_{filesize}.json')
-        read_file_big = os.path.join(log_dir, f'big_size_io/READ_{sz_bloc}/READ_{filesize}.json')
-        
-        if os.path.exists(read_file_small):
-            read_file = read_file_small  # Use the small IO size file if it exists
-        elif os.path.exists(read_file_big):
-            read_file = read_file_big  # Use the big IO size file if it exists
-        else:
-            print(f"Error: Neither {read_file_small} nor {read_file_big} exists.")  # Error if neither file exists
+        # Power trace of the configuration, named after the mode of log_dir
+        read_file = power_file(log_dir, sz_bloc, filesize)
+        if read_file is None:
+            print(f"Error: No power trace of {sz_bloc} {filesize} in {log_dir}.")
             continue
 
-        io_data = load_data(read_file)  # Load the IO data from the selected file
+        io_trace = load_data(read_file)  # Load the IO data from the selected file
 
         # List all available io_begin and io_end files
         timestamp_dir = os.path.join(log_dir, 'io_timestamp')
@@ -114,7 +111,8 @@ def main(log_dir, sz_bloc):
         io_timestamps = [(parse_date(begin), parse_date(end)) for begin, end in io_timestamps]
 
         # Plot the energy consumption data
-        plot_io(io_data, io_timestamps, log_dir, sz_bloc, filesize)
+        with stage('plot_io', rows=len(io_trace)):
+            plot_io(io_trace, io_timestamps, log_dir, sz_bloc, filesize)
 
 # Entry point of the script
 if __name__ == "__main__":
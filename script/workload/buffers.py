@@ -0,0 +1,83 @@
+import os  # Import os for the random content of the write buffers
+import mmap  # Import mmap for page-aligned anonymous buffers
+import threading  # Import threading, the pool is shared by the worker threads
+from contextlib import contextmanager  # Import contextmanager for the acquire/release helper
+
+# Pool of page-aligned mmap buffers handed out as memoryviews.
+# A buffer is allocated once and reused by the following requests of the same size class,
+# so os.preadv fills it in place and os.pwritev sends it without any intermediate bytes object.
+class BufferPool:
+    def __init__(self, fill=False):
+        self.fill = fill  # Write buffers are filled with random data once, at allocation
+        self.free = {}  # Size class (multiple of the page size) -> free mmap buffers
+        self.lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.allocations = 0
+        self.bytes_allocated = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    # Function to round a request size up to its size class
+    @staticmethod
+    def size_class(size):
+        return -(-size // mmap.PAGESIZE) * mmap.PAGESIZE
+
+    # Function to pre-allocate buffers, e.g. one per request in flight
+    def reserve(self, size, count):
+        buffers = [self._allocate(self.size_class(size)) for _ in range(count)]
+        with self.lock:
+            self.free.setdefault(self.size_class(size), []).extend(buffers)
+
+    # Function to allocate a new buffer of a size class
+    def _allocate(self, size_class):
+        buffer = mmap.mmap(-1, size_class)
+        if self.fill:
+            buffer.write(os.urandom(size_class))
+        with self.lock:
+            self.allocations += 1
+            self.bytes_allocated += size_class
+        return buffer
+
+    # Function to take a buffer of at least size bytes, returned as a memoryview of exactly size bytes
+    def acquire(self, size):
+        size_class = self.size_class(size)
+        with self.lock:
+            free = self.free.get(size_class)
+            buffer = free.pop() if free else None
+            if buffer is not None:
+                self.hits += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+        if buffer is None:
+            buffer = self._allocate(size_class)
+        return memoryview(buffer)[:size]
+
+    # Function to give a buffer back to the pool (the view must not be used afterwards)
+    def release(self, view):
+        buffer = view.obj
+        view.release()
+        with self.lock:
+            self.free.setdefault(len(buffer), []).append(buffer)
+            self.in_use -= 1
+
+    # Context manager around acquire/release
+    @contextmanager
+    def buffer(self, size):
+        view = self.acquire(size)
+        try:
+            yield view
+        finally:
+            self.release(view)
+
+    # Function to return the counters
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'allocations': self.allocations,
+                'bytes_allocated': self.bytes_allocated,
+                'peak_in_use': self.peak_in_use,
+                'free': sum(len(buffers) for buffers in self.free.values()),
+            }
@@ -0,0 +1,268 @@
+import os  # Import os for preadv/pwritev and the open flags
+import sys  # Import sys to locate the shared modules
+import mmap  # Import mmap for the mmap IO path
+import asyncio  # Import asyncio for the event-loop submission mode
+import collections  # Import collections for the thread-safe deque of completed requests
+import argparse  # Import argparse for the iotest-like options
+import threading  # Import threading for the queue depth semaphore
+import time  # Import time for the epoch timestamps of each IO
+from datetime import datetime  # Import datetime to format the timestamps like iotest
+from concurrent.futures import ThreadPoolExecutor  # Worker threads, os.preadv/os.pwritev release the GIL
+import numpy as np  # Import numpy for the offsets and the statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.layout import parse_size  # Size suffixes of tools.h
+from workload.buffers import BufferPool  # Page-aligned buffers reused across requests
+from workload.patterns import PATTERNS, parse_pattern, make_offsets  # Offset streams of the access patterns
+
+# Submission modes: one request at a time like iotest, a thread pool, or asyncio offloading to a thread pool
+ENGINES = ['sync', 'threads', 'asyncio']
+
+# IO paths: O_DIRECT|O_SYNC like iotest, the page cache (pread/pwrite without O_DIRECT), or a shared mapping of the
+# file (each IO copies between the mapping and the request buffer, so the page faults do the reads)
+IO_PATHS = ['direct', 'buffered', 'mmap']
+
+# Readahead hints on the whole file, posix_fadvise for buffered and madvise for mmap (none: no call, kernel default)
+ADVICE = ['none', 'normal', 'sequential', 'random', 'willneed']
+
+# Function to create a file with random content if it does not exist or is too small (make_file_if_necessary in tools.h)
+def make_file_if_necessary(path, filesize, chunk=1 << 22):
+    if os.path.exists(path) and os.path.getsize(path) >= filesize:
+        return
+    with open(path, 'wb') as f:
+        written = 0
+        while written < filesize:
+            written += f.write(os.urandom(min(chunk, filesize - written)))
+        f.flush()
+        os.fsync(f.fileno())
+
+# Function to open the test file with O_DIRECT|O_SYNC like iotest, falling back to O_SYNC where O_DIRECT is refused
+# (tmpfs, some containers). write=None opens it for both (mixed traces). Returns the descriptor and whether O_DIRECT is in use.
+def open_file(path, write, direct=True):
+    flags = {True: os.O_WRONLY, False: os.O_RDONLY, None: os.O_RDWR}[write] | os.O_SYNC
+    if direct and hasattr(os, 'O_DIRECT'):
+        try:
+            return os.open(path, flags | os.O_DIRECT), True
+        except OSError as e:
+            print(f"O_DIRECT unavailable on {path} ({e.strerror}), using the page cache", file=sys.stderr)
+    return os.open(path, flags), False
+
+# Function to evict a range from the page cache, the unprivileged replacement of drop_caches when O_DIRECT is off
+def drop_cache(fd, offset, length):
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_DONTNEED)
+
+# Function to open the test file for an IO path. Returns the descriptor, the mapping of the file (mmap path, else None)
+# and whether O_DIRECT is in use. The buffered and mmap paths start from a cold cache: the pages of the file are
+# evicted once, then the IOs go through the page cache and are not evicted, so the hits of the run count.
+def open_io_path(path, write, io_path='direct', advice='none', direct=True):
+    if io_path == 'direct':
+        fd, direct = open_file(path, write, direct)
+        return fd, None, direct
+    # A writable mapping needs the file open for reading as well
+    flags = {True: os.O_RDWR if io_path == 'mmap' else os.O_WRONLY, False: os.O_RDONLY, None: os.O_RDWR}[write]
+    fd = os.open(path, flags)
+    drop_cache(fd, 0, 0)
+    mapping = None
+    if io_path == 'mmap':
+        mapping = mmap.mmap(fd, 0, access=mmap.ACCESS_READ if write is False else mmap.ACCESS_WRITE)
+        if advice != 'none':
+            mapping.madvise(getattr(mmap, f'MADV_{advice.upper()}'))
+    elif advice != 'none' and hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(fd, 0, 0, getattr(os, f'POSIX_FADV_{advice.upper()}'))
+    return fd, mapping, False
+
+# Function to format epoch nanoseconds like format_timestamp in tools.h (local time, microseconds, +HH:00)
+def format_timestamp(timestamp_ns):
+    local = datetime.fromtimestamp(timestamp_ns // 1000 / 1e6).astimezone()
+    hours = int(local.utcoffset().total_seconds() // 3600)
+    return f"{local.strftime('%Y-%m-%dT%H:%M:%S.%f')}{hours:+03d}:00"
+
+# Function to write log.txt, log_epoch_start.txt and log_epoch_end.txt as iotest does
+def write_logs(output_dir, begins, ends):
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'log.txt'), 'w') as f:
+        f.writelines(f'{us}\n' for us in (ends - begins) // 1000)
+    for name, timestamps in (('log_epoch_start.txt', begins), ('log_epoch_end.txt', ends)):
+        with open(os.path.join(output_dir, name), 'w') as f:
+            f.writelines(f'{format_timestamp(int(ts))}\n' for ts in timestamps)
+
+# Function to print the statistics line of print_mean_stdev in tools.h (times in microseconds)
+def print_mean_stdev(times):
+    times = np.sort(np.asarray(times, dtype=np.int64))
+    n = len(times)
+    mean = times.mean()
+    stdev = np.sqrt(max((times.astype(np.float64) ** 2).mean() - mean * mean, 0.0))
+    interval95 = 2 * stdev / np.sqrt(n)
+    print(f"Mean: {mean / 1e3:.7f} ms     95% CI: ±{interval95 / 1e3:.7f} ms     Q1: {times[n // 4] / 1e3:.7f} ms     "
+          f"Median: {times[n // 2] / 1e3:.7f} ms     Q3: {times[3 * n // 4] / 1e3:.7f} ms")
+
+# IO workload on one file: every request is an (offset, size) tuple, or (offset, size, write) when the workload
+# mixes reads and writes (write=None), submitted by one of the ENGINES. With a mapping (memoryview of the mmap of
+# the file), the requests are copies from or to the mapping instead of preadv/pwritev. Without O_DIRECT, each
+# request is evicted from the page cache after it completes unless evict is False (buffered and mmap paths).
+class Workload:
+    def __init__(self, fd, sz_bloc, write=False, direct=True, workers=1, queue_depth=1, mapping=None, evict=None):
+        self.fd = fd
+        self.sz_bloc = sz_bloc
+        self.write = write
+        self.direct = direct
+        self.mapping = mapping
+        self.evict = not direct if evict is None else evict
+        self.workers = max(1, workers)
+        self.queue_depth = max(1, queue_depth)
+        self.records = collections.deque()  # (index, begin_ns, end_ns, offset, size, write), appended by the workers
+
+        # Page-aligned buffers reused across requests, one reserved per request in flight
+        self.pool = BufferPool(fill=write is not False)
+        self.pool.reserve(sz_bloc, self.queue_depth)
+
+    # Function to perform and time one request, reading into or writing from a pooled buffer without copies
+    def _io(self, index, offset, size, write=None):
+        write = self.write if write is None else write
+        with self.pool.buffer(size) as view:
+            begin = time.time_ns()
+            if self.mapping is not None:
+                if write:
+                    self.mapping[offset:offset + size] = view
+                else:
+                    view[:] = self.mapping[offset:offset + size]
+            elif write:
+                os.pwritev(self.fd, [view], offset)
+            else:
+                os.preadv(self.fd, [view], offset)
+            end = time.time_ns()
+
+        self.records.append((index, begin, end, offset, size, write))
+        if self.evict:
+            drop_cache(self.fd, offset, size)
+
+    # Function to submit the requests one at a time (queue depth 1, as iotest)
+    def run_sync(self, requests):
+        for index, request in enumerate(requests):
+            self._io(index, *request)
+
+    # Function to submit the requests to a thread pool with at most queue_depth requests in flight
+    def run_threads(self, requests):
+        in_flight = threading.BoundedSemaphore(self.queue_depth)
+        errors = []
+
+        def task(index, request):
+            try:
+                self._io(index, *request)
+            except OSError as e:
+                errors.append(e)
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for index, request in enumerate(requests):
+                in_flight.acquire()
+                if errors:
+                    break
+                pool.submit(task, index, request)
+        if errors:
+            raise errors[0]
+
+    # Function to submit the requests from queue_depth coroutines offloading the blocking calls to a thread pool
+    def run_asyncio(self, requests):
+        async def submit():
+            loop = asyncio.get_running_loop()
+            source = enumerate(requests)
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                async def slot():
+                    for index, request in source:  # Shared iterator: each request is taken once
+                        await loop.run_in_executor(pool, self._io, index, *request)
+                await asyncio.gather(*(slot() for _ in range(self.queue_depth)))
+
+        asyncio.run(submit())
+
+    # Function to take the requests completed so far, in completion order (used to stream long runs to disk)
+    def drain(self):
+        completed = []
+        while True:
+            try:
+                completed.append(self.records.popleft())
+            except IndexError:
+                return completed
+
+    # Function to run the requests with an engine and return the begin/end timestamps (ns) in request order
+    def run(self, requests, engine='sync'):
+        self.records.clear()
+        getattr(self, f'run_{engine}')(requests)
+        records = np.array(sorted(self.drain()), dtype=np.int64).reshape(-1, 6)
+        return records[:, 1], records[:, 2]
+
+# Function to draw the offsets of nb_run * nb_bloc requests. Without a pattern, as benchmark.sh:
+# SEQ (runs of nb_bloc contiguous blocks) when nb_bloc > 1, RAND otherwise
+def pattern_offsets(spec, nb_run, nb_bloc, sz_bloc, filesize, rng):
+    return make_offsets(spec or ('SEQ' if nb_bloc > 1 else 'RAND'), nb_run * nb_bloc, sz_bloc, filesize, rng, run_length=nb_bloc)
+
+# Function to run one iotest-like measurement and write its logs in output_dir
+def main(args):
+    sz_bloc = parse_size(args.sz_bloc)
+    filesize = parse_size(args.filesize)
+    write = args.mode.lower().startswith('w')
+
+    make_file_if_necessary(args.file, filesize)
+    fd, mapping, direct = open_io_path(args.file, write, args.io_path, args.advice, direct=not args.no_direct)
+    view = memoryview(mapping) if mapping is not None else None
+    try:
+        workload = Workload(fd, sz_bloc, write, direct, args.workers, args.queue_depth, view, evict=False if args.io_path != 'direct' else None)
+        offsets = pattern_offsets(args.pattern, args.nb_run, args.nb_bloc, sz_bloc, filesize, np.random.default_rng(args.seed))
+        begins, ends = workload.run(((int(offset), sz_bloc) for offset in offsets), args.engine)
+
+        # Writes through the page cache reach the device after the run: the flush is timed apart from the IOs
+        if write and args.io_path != 'direct':
+            flush_start = time.perf_counter()
+            if mapping is not None:
+                mapping.flush()
+            else:
+                os.fsync(fd)
+            print(f"Final flush of the {args.io_path} writes: {time.perf_counter() - flush_start:.6f} s", file=sys.stderr)
+    finally:
+        if view is not None:
+            view.release()
+            mapping.close()
+        os.close(fd)
+
+    # Same statistics and log files as iotest, so benchmark.sh and generate_perf_csv.py can use them unchanged
+    times = (ends - begins) // 1000
+    print_mean_stdev(times[args.skip:args.nb_run])
+    write_logs(args.output_dir, begins, ends)
+
+    # On stderr, so the statistics line stays the only output captured by benchmark.sh
+    stats = workload.pool.stats()
+    print(f"Buffer pool: {stats['hits']} hits, {stats['allocations']} allocations ({stats['bytes_allocated']} bytes)", file=sys.stderr)
+    return len(begins)
+
+# Function to build the command-line parser (iotest options plus the concurrency ones)
+def build_parser():
+    parser = argparse.ArgumentParser(description="iotest-like IO workload with configurable concurrency")
+    parser.add_argument('--mode', default='r', help="r or w (default: r)")
+    parser.add_argument('--nb_run', type=int, default=1, help="Number of random starts (default: 1)")
+    parser.add_argument('--nb_bloc', type=int, default=1, help="Contiguous blocks per start (default: 1)")
+    parser.add_argument('--sz_bloc', default='1s', help="Block size, 's' = 512o, 'k', 'M', 'G' (default: 1s)")
+    parser.add_argument('--filesize', default='1G', help="Size of the test file (default: 1G)")
+    parser.add_argument('--skip', type=int, default=0, help="IOs left out of the statistics (default: 0)")
+    parser.add_argument('--file', default='/tmp/test.file', help="Test file (default: /tmp/test.file)")
+    parser.add_argument('--pattern', help=f"Access pattern NAME[:key=value,...], NAME in {', '.join(PATTERNS)} (default: SEQ if nb_bloc > 1, else RAND)")
+    parser.add_argument('--engine', choices=ENGINES, default='sync', help="Submission mode (default: sync)")
+    parser.add_argument('--workers', type=int, default=1, help="Worker threads of the threads and asyncio engines")
+    parser.add_argument('--queue-depth', type=int, default=1, help="Requests in flight (default: 1)")
+    parser.add_argument('--io-path', choices=IO_PATHS, default='direct', help="O_DIRECT like iotest, the page cache, or an mmap of the file (default: direct)")
+    parser.add_argument('--advice', choices=ADVICE, default='none', help="Readahead hint of the buffered (posix_fadvise) and mmap (madvise) paths, ignored by direct (default: none)")
+    parser.add_argument('--no-direct', action='store_true', help="Do not try O_DIRECT")
+    parser.add_argument('--seed', type=int, help="Seed of the offsets")
+    parser.add_argument('--output-dir', default='.', help="Where log.txt and log_epoch_*.txt are written (default: .)")
+    return parser
+
+# Entry point of the script
+if __name__ == "__main__":
+    parser = build_parser()
+    args = parser.parse_args()
+    try:
+        parse_pattern(args.pattern or 'RAND')
+    except ValueError as error:
+        parser.error(str(error))
+    main(args)
@@ -0,0 +1,148 @@
+import os  # Import os to check the replay trace
+import re  # Import re to keep the directory names of the patterns to safe characters
+import sys  # Import sys to locate the shared modules
+import hashlib  # Import hashlib to name the directory of a replayed trace
+import inspect  # Import inspect to check the parameters of a pattern against its generator
+import numpy as np  # Import numpy, every pattern returns its offsets as an int64 array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.layout import SECTOR_SIZE  # O_DIRECT needs sector-aligned offsets
+
+# Access patterns: each function returns nb_io sector-aligned byte offsets of sz_bloc requests inside a file of
+# filesize bytes. Parameters are given after a colon: ZIPF:theta=1.2, HOTSET:hot_fraction=0.05,hot_probability=0.95.
+# The campaign directory (logs/<storage>/<mode>/<pattern>) is named by pattern_dir(), parameters included.
+
+# Function to return the number of sector-aligned start positions of a request of sz_bloc bytes
+def _positions(sz_bloc, filesize, run=1):
+    positions = filesize // SECTOR_SIZE + 1 - run * sz_bloc // SECTOR_SIZE
+    if positions <= 0:
+        raise ValueError(f"{run} block(s) of {sz_bloc} bytes do not fit in a file of {filesize} bytes")
+    return positions
+
+# Sequential: runs of run_length contiguous blocks, each run starting at a random offset (SEQ of benchmark.sh, run_length=16)
+def sequential(nb_io, sz_bloc, filesize, rng, run_length=16):
+    run_length = int(run_length)
+    nb_run = -(-nb_io // run_length)
+    starts = SECTOR_SIZE * rng.integers(0, _positions(sz_bloc, filesize, run_length), nb_run, dtype=np.int64)
+    return (starts[:, None] + np.arange(run_length, dtype=np.int64) * sz_bloc).ravel()[:nb_io]
+
+# Uniform random: independent sector-aligned offsets (RAND of benchmark.sh)
+def uniform(nb_io, sz_bloc, filesize, rng):
+    return SECTOR_SIZE * rng.integers(0, _positions(sz_bloc, filesize), nb_io, dtype=np.int64)
+
+# Strided: each request starts stride bytes after the previous one (default: two blocks, one skipped), wrapping around the file
+def strided(nb_io, sz_bloc, filesize, rng, stride=None):
+    stride = int(stride) if stride else 2 * sz_bloc
+    span = _positions(sz_bloc, filesize) * SECTOR_SIZE
+    start = SECTOR_SIZE * int(rng.integers(0, span // SECTOR_SIZE))
+    offsets = (start + np.arange(nb_io, dtype=np.int64) * stride) % span
+    return offsets - offsets % SECTOR_SIZE
+
+# Zipfian hot spot: block k is accessed with a probability proportional to 1 / rank(k)^theta.
+# The ranks are scattered over the file with an odd multiplicative hash, so the hot blocks are not contiguous.
+def zipfian(nb_io, sz_bloc, filesize, rng, theta=0.99):
+    nb_blocks = filesize // sz_bloc
+    if nb_blocks <= 0:
+        raise ValueError(f"A block of {sz_bloc} bytes does not fit in a file of {filesize} bytes")
+    cdf = np.cumsum(1.0 / np.arange(1, nb_blocks + 1, dtype=np.float64) ** float(theta))
+    ranks = np.searchsorted(cdf, rng.random(nb_io) * cdf[-1]).astype(np.int64)
+    return (ranks * 2654435761 % nb_blocks) * sz_bloc  # 2654435761 is prime, the hash is a permutation unless it divides nb_blocks
+
+# Hot set: a fraction hot_probability of the requests fall uniformly in a contiguous region covering hot_fraction of the file
+def hot_set(nb_io, sz_bloc, filesize, rng, hot_fraction=0.1, hot_probability=0.9):
+    positions = _positions(sz_bloc, filesize)
+    hot_positions = max(1, int(positions * float(hot_fraction)))
+    hot_start = int(rng.integers(0, positions - hot_positions + 1))
+    hot = rng.random(nb_io) < float(hot_probability)
+    offsets = np.where(hot,
+                       hot_start + rng.integers(0, hot_positions, nb_io, dtype=np.int64),
+                       rng.integers(0, positions, nb_io, dtype=np.int64))
+    return SECTOR_SIZE * offsets
+
+# Replay: byte offsets of a recorded block trace (first column of a text or CSV file, optional header), cycled to nb_io
+def replay(nb_io, sz_bloc, filesize, rng, path=None):
+    if not path or not os.path.exists(path):
+        raise ValueError(f"REPLAY needs an existing trace: REPLAY:path=<file> (got {path})")
+    # Skip the comment lines and the header, if any, before the first offset
+    skiprows = 0
+    with open(path, 'r') as f:
+        for line in f:
+            fields = line.replace(',', ' ').split()
+            if fields and not line.startswith('#'):
+                try:
+                    float(fields[0])
+                    break
+                except ValueError:
+                    pass
+            skiprows += 1
+        else:
+            raise ValueError(f"No offset in {path}")
+    delimiter = ',' if ',' in line else None
+    recorded = np.atleast_1d(np.loadtxt(path, delimiter=delimiter, usecols=0, comments='#', skiprows=skiprows, dtype=np.float64)).astype(np.int64)
+    if recorded.size == 0:
+        raise ValueError(f"No offset in {path}")
+
+    # Keep the recorded order, align on sectors and fold the offsets into the test file
+    span = _positions(sz_bloc, filesize) * SECTOR_SIZE
+    offsets = np.resize(recorded, nb_io) % span
+    return offsets - offsets % SECTOR_SIZE
+
+PATTERNS = {
+    'SEQ': sequential,
+    'RAND': uniform,
+    'STRIDED': strided,
+    'ZIPF': zipfian,
+    'HOTSET': hot_set,
+    'REPLAY': replay,
+}
+
+# Function to split a pattern specification NAME[:key=value,...] into its name and parameters
+def parse_pattern(spec):
+    name, _, arguments = spec.partition(':')
+    name = name.upper()
+    if name not in PATTERNS:
+        raise ValueError(f"Unknown access pattern {name} (choose from {', '.join(PATTERNS)})")
+    params = {}
+    for argument in filter(None, arguments.split(',')):
+        key, _, value = argument.partition('=')
+        params[key.strip()] = value.strip()
+    # Parameters of the generator after nb_io, sz_bloc, filesize and rng
+    valid = list(inspect.signature(PATTERNS[name]).parameters)[4:]
+    unknown = [key for key in params if key not in valid]
+    if unknown:
+        raise ValueError(f"Unknown parameter(s) {', '.join(unknown)} of {name} "
+                         f"(valid: {', '.join(valid) if valid else 'none'})")
+    return name, params
+
+# Function to generate the offsets of a pattern specification. run_length is the default run length of SEQ
+# when the specification does not give one (nb_bloc of benchmark.sh)
+def make_offsets(spec, nb_io, sz_bloc, filesize, rng=None, run_length=None):
+    name, params = parse_pattern(spec)
+    if name == 'SEQ' and run_length:
+        params.setdefault('run_length', run_length)
+    return PATTERNS[name](nb_io, sz_bloc, filesize, rng or np.random.default_rng(), **params)
+
+# Function to name the campaign directory of a pattern specification: the name, then each parameter as -<key><value>
+# in key order (ZIPF:theta=1.2 -> ZIPF-theta1.2), so that campaigns with different parameters do not share a directory.
+# A trace path is replaced by its file name and a hash of the path (REPLAY:path=/traces/db.csv -> REPLAY-db.csv_<hash>)
+def pattern_dir(spec):
+    name, params = parse_pattern(spec)
+    parts = [name]
+    for key, value in sorted(params.items()):
+        if key == 'path':
+            value = f"{os.path.basename(value)}_{hashlib.sha1(value.encode()).hexdigest()[:8]}"
+        else:
+            value = f"{key}{value}"
+        parts.append(re.sub(r'[^A-Za-z0-9._]', '', value))
+    return '-'.join(parts)
+
+# Entry point of the script: print the campaign directory of a pattern specification (used by benchmark.sh)
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python3 patterns.py <pattern>[:key=value,...]", file=sys.stderr)
+        sys.exit(1)
+    try:
+        print(pattern_dir(sys.argv[1]))
+    except ValueError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        sys.exit(1)
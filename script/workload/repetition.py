@@ -0,0 +1,104 @@
+import os  # Import os for the state file
+import sys  # Import sys to locate the shared modules and for the exit code
+import json  # Import json for the state of the controller
+import argparse  # Import argparse for the controller options
+import numpy as np  # Import numpy for the per-IO latencies and energies
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.energy import to_epoch_ns, project_power, NS_PER_S  # Energy engine
+from common.trace import Trace  # Array-backed power trace
+from maths.stream_stats import RunningStats  # Running mean/variance, Student confidence intervals
+
+# Sequential stopping rule of the iterations of a configuration, called by benchmark.sh after each iteration.
+# The iterations are the independent repetitions (the IOs of one iteration share the state of the cache and of the
+# device), so the controller keeps the running mean and variance of the per-iteration mean latency and energy per
+# IO, and stops once the confidence interval of both is narrower than a fraction of their mean:
+#   t(level, k - 1) * stdev / sqrt(k) <= target * |mean|, with min_iterations <= k <= max_iterations
+# Stable configurations stop after min_iterations, noisy ones run up to max_iterations.
+# Exit code: 0 to stop, 1 to run another iteration (an error also lets benchmark.sh run the iteration).
+METRICS = ['latency', 'energy']
+
+# Function to read the IO timestamps of an iteration (one ISO8601 timestamp per line, as written by iotest)
+def read_timestamps(path):
+    with open(path) as f:
+        return to_epoch_ns([line.strip() for line in f if line.strip()])
+
+# Function to compute the mean latency (s) and mean energy per IO (J) of an iteration; the energy is NaN
+# without power trace or when no IO is covered by it
+def iteration_means(begin_file, end_file, power_file=None):
+    begins, ends = read_timestamps(begin_file), read_timestamps(end_file)
+    count = min(len(begins), len(ends))
+    begins, ends = begins[:count], ends[:count]
+    durations = (ends - begins) / NS_PER_S
+    energy = np.nan
+    if power_file and os.path.exists(power_file):
+        trace = Trace.from_json(power_file) if power_file.endswith('.json') else Trace.from_csv(power_file)
+        if len(trace) >= 2:
+            begin_power, end_power = project_power(trace.timestamps, trace.watts, begins, ends)
+            energies = (begin_power + end_power) / 2 * durations
+            if np.isfinite(energies).any():
+                energy = float(np.nanmean(energies))
+    return count, float(durations.mean()) if count else np.nan, energy
+
+# Function to load the state of a configuration (running statistics of every metric and history)
+def load_state(path):
+    stats = {metric: RunningStats() for metric in METRICS}
+    history = []
+    if os.path.exists(path):
+        with open(path) as f:
+            state = json.load(f)
+        for metric in METRICS:
+            stats[metric].__dict__.update(state['stats'][metric])
+        history = state['history']
+    return stats, history
+
+# Function to save the state of a configuration
+def save_state(path, stats, history):
+    with open(path, 'w') as f:
+        json.dump({'stats': {metric: vars(stats[metric]) for metric in METRICS}, 'history': history}, f, indent=2)
+
+# Function to add an iteration to the state and decide whether the configuration needs another one
+def update(state_file, begin_file, end_file, power_file=None, target=0.05, level=0.95, min_iterations=3, max_iterations=10):
+    stats, history = load_state(state_file)
+    ios, latency, energy = iteration_means(begin_file, end_file, power_file)
+    stats['latency'].add(latency)
+    if np.isfinite(energy):
+        stats['energy'].add(energy)
+
+    # Relative half-width of the confidence interval of each metric (energy only when some power was available)
+    widths = {metric: stats[metric].ci(level) / abs(stats[metric].mean) if stats[metric].mean else np.inf
+              for metric in METRICS if stats[metric].count}
+    iterations = stats['latency'].count
+    converged = all(width <= target for width in widths.values())
+    if iterations >= max_iterations:
+        stop, reason = True, 'maximum reached'
+    elif iterations < min_iterations:
+        stop, reason = False, 'minimum not reached'
+    else:
+        stop, reason = converged, 'converged' if converged else 'not converged'
+
+    history.append({'iteration': iterations, 'ios': ios, 'latency': latency, 'energy': energy,
+                    **{f'{metric}_ci': round(width, 6) for metric, width in widths.items()}, 'stop': stop})
+    save_state(state_file, stats, history)
+    text = ', '.join(f"{metric} ±{100 * width:.1f}%" for metric, width in widths.items())
+    print(f"Iteration {iterations}: {text} (target {100 * target:g}%) -> {'stop' if stop else 'continue'}, {reason}")
+    return stop
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(description="Decide after each iteration whether a configuration needs another one")
+    parser.add_argument('state', help="State file of the configuration (created by the first iteration)")
+    parser.add_argument('io_begin', help="IO begin timestamps of the iteration")
+    parser.add_argument('io_end', help="IO end timestamps of the iteration")
+    parser.add_argument('--power', help="Wattmeter trace covering the iteration (Grid5000 JSON or CSV), for the energy per IO")
+    parser.add_argument('--target', type=float, default=0.05, help="Relative half-width of the confidence intervals to reach (default: 0.05)")
+    parser.add_argument('--level', type=float, default=0.95, help="Confidence level (default: 0.95)")
+    parser.add_argument('--min-iterations', type=int, default=3, help="Iterations run whatever the intervals (default: 3)")
+    parser.add_argument('--max-iterations', type=int, default=10, help="Iterations after which the configuration stops (default: 10)")
+    return parser
+
+# Entry point of the script
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    stop = update(args.state, args.io_begin, args.io_end, args.power, args.target, args.level, args.min_iterations, args.max_iterations)
+    sys.exit(0 if stop else 1)
@@ -0,0 +1,173 @@
+import os  # Import os for the output paths
+import sys  # Import sys to locate the shared modules
+import time  # Import time to pace the requests
+import argparse  # Import argparse for the replay options
+import numpy as np  # Import numpy to fold the offsets and sizes of a chunk at once
+import pandas as pd  # Import pandas to read the trace by chunks
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.layout import SECTOR_SIZE, parse_size  # Size suffixes of tools.h
+from maths.stream_stats import RunningStats, P2Quantile  # Constant-memory statistics
+from workload.engine import ENGINES, Workload, make_file_if_necessary, open_file, format_timestamp  # Workload engine
+
+# Columns of a trace and the header names accepted for them (blkparse-like exports use sector and rwbs).
+# Without a header the columns are read in this order.
+COLUMNS = ['time', 'offset', 'size', 'op']
+ALIASES = {
+    'time': {'time', 'timestamp', 'ts', 't', 'relative_time'},
+    'offset': {'offset', 'byte_offset', 'sector', 'lba'},
+    'size': {'size', 'bytes', 'nbytes', 'length', 'len'},
+    'op': {'op', 'rw', 'rwbs', 'type', 'operation'},
+}
+SECTOR_COLUMNS = {'sector', 'lba'}  # Offsets given in 512-byte sectors
+
+# Number of trace lines read at once, and of completed requests between two flushes of the logs
+CHUNK_SIZE = 1 << 16
+
+# Function to read the trace by chunks of CHUNK_SIZE lines, so multi-GB traces are never loaded whole.
+# Yields DataFrames with the columns time (s, NaN if absent), offset (bytes), size (bytes, NaN if absent), write (1, 0, -1 for other ops, NaN if absent)
+def read_trace(path, chunk_size=CHUNK_SIZE):
+    with open(path, 'r') as f:
+        first = next((line for line in f if line.strip() and not line.startswith('#')), '')
+    separator = ',' if ',' in first else r'\s+'
+    fields = [field.strip().lower() for field in first.replace(',', ' ').split()]
+    try:
+        float(fields[0])
+        header, names = None, COLUMNS[:len(fields)]
+    except (ValueError, IndexError):
+        header, names = 0, None
+
+    reader = pd.read_csv(path, sep=separator, header=header, names=names, comment='#', chunksize=chunk_size)
+    for chunk in reader:
+        chunk.columns = [str(column).strip().lower() for column in chunk.columns]
+        columns = {name: next((column for column in chunk.columns if column in ALIASES[name]), None) for name in COLUMNS}
+        if columns['offset'] is None:
+            raise ValueError(f"No offset column in {path} (expected one of {', '.join(sorted(ALIASES['offset']))})")
+
+        offsets = chunk[columns['offset']].to_numpy(dtype=np.int64)
+        if columns['offset'] in SECTOR_COLUMNS:
+            offsets = offsets * SECTOR_SIZE
+        yield pd.DataFrame({
+            'time': chunk[columns['time']].to_numpy(dtype=np.float64) if columns['time'] else np.nan,
+            'offset': offsets,
+            'size': chunk[columns['size']].to_numpy(dtype=np.float64) if columns['size'] else np.nan,
+            'write': parse_ops(chunk[columns['op']]) if columns['op'] else np.nan,
+        })
+
+# Function to convert an op column to write flags: R/W letters (read, write, blkparse RWBS) or 0/1; other ops are -1.
+# An RWBS is classified by its data letter once the flush, FUA, sync, metadata and readahead modifiers (F, S, M, A)
+# are removed, so FN is a flush and FWS a write; a zero-size FWS is an empty flush barrier, dropped by trace_requests
+def parse_ops(ops):
+    if pd.api.types.is_numeric_dtype(ops):
+        return np.where(ops.isin([0, 1]), ops, -1).astype(np.float64)
+    letters = ops.astype(str).str.upper().str.replace(r'[FSMA]', '', regex=True).str[:1]
+    return np.where(letters == 'W', 1.0, np.where(letters == 'R', 0.0, -1.0))
+
+# Function to turn the trace chunks into requests (due time in s, offset, size, write) that fit in the test file:
+# sizes are rounded up to whole sectors (O_DIRECT) and offsets folded into the file and aligned on sectors
+def trace_requests(chunks, filesize, default_size, default_write):
+    for chunk in chunks:
+        empty = (chunk['size'] == 0).to_numpy()  # Zero-size requests (flush barriers) carry no data
+        sizes = chunk['size'].fillna(default_size).to_numpy(dtype=np.int64)
+        sizes = np.clip(-(-sizes // SECTOR_SIZE) * SECTOR_SIZE, SECTOR_SIZE, filesize)
+        offsets = chunk['offset'].to_numpy() % (filesize - sizes + SECTOR_SIZE)
+        offsets -= offsets % SECTOR_SIZE
+        writes = chunk['write'].to_numpy(dtype=np.float64)
+        writes = np.where(np.isnan(writes), float(default_write), writes)
+        writes[empty] = -1
+        keep = writes >= 0  # Unknown ops (flush, discard...) are not replayed
+        yield from zip(chunk['time'].to_numpy()[keep].tolist(), offsets[keep].tolist(), sizes[keep].tolist(), (writes[keep] > 0).tolist())
+
+# Writer of the iotest log files, fed in completion order while the replay is running.
+# log_epoch_start.txt and log_epoch_end.txt stay line-aligned, so generate_perf_csv.py can read them.
+class ReplayLog:
+    def __init__(self, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        self.files = {name: open(os.path.join(output_dir, name), 'w') for name in
+                      ('log.txt', 'log_epoch_start.txt', 'log_epoch_end.txt', 'log_ops.txt')}
+        self.latency = RunningStats()
+        self.quartiles = [P2Quantile(q) for q in (0.25, 0.5, 0.75)]
+
+    # Function to write a batch of completed requests (index, begin_ns, end_ns, offset, size, write)
+    def write(self, records):
+        for index, begin, end, offset, size, write in records:
+            us = (end - begin) // 1000
+            self.files['log.txt'].write(f'{us}\n')
+            self.files['log_epoch_start.txt'].write(f'{format_timestamp(begin)}\n')
+            self.files['log_epoch_end.txt'].write(f'{format_timestamp(end)}\n')
+            self.files['log_ops.txt'].write(f"{index} {'W' if write else 'R'} {offset} {size}\n")
+            self.latency.add(us)
+            for quantile in self.quartiles:
+                quantile.add(us)
+
+    # Function to close the files and print the statistics line of iotest
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        if self.latency.count:
+            q1, median, q3 = (quantile.value() for quantile in self.quartiles)
+            print(f"Mean: {self.latency.mean / 1e3:.7f} ms     95% CI: ±{2 * self.latency.stdev() / np.sqrt(self.latency.count) / 1e3:.7f} ms     "
+                  f"Q1: {q1 / 1e3:.7f} ms     Median: {median / 1e3:.7f} ms     Q3: {q3 / 1e3:.7f} ms")
+
+# Function to issue the requests at their recorded time divided by speed (speed 0: as fast as possible),
+# flushing the completed requests to the log every CHUNK_SIZE requests
+def paced(requests, workload, log, speed, lateness):
+    start = None
+    for count, (due, offset, size, write) in enumerate(requests, 1):
+        if speed > 0 and not np.isnan(due):
+            if start is None:
+                start, first = time.monotonic(), due
+            delay = start + (due - first) / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                lateness.add(-delay)
+        yield offset, size, write
+        if count % CHUNK_SIZE == 0:
+            log.write(workload.drain())
+
+# Function to replay a trace and write its logs in output_dir
+def main(args):
+    filesize = parse_size(args.filesize)
+    default_size = parse_size(args.sz_bloc)
+    default_write = args.mode.lower().startswith('w')
+
+    make_file_if_necessary(args.file, filesize)
+    fd, direct = open_file(args.file, None, direct=not args.no_direct)
+    log = ReplayLog(args.output_dir)
+    lateness = RunningStats()
+    try:
+        workload = Workload(fd, default_size, None, direct, args.workers, args.queue_depth)
+        requests = trace_requests(read_trace(args.trace), filesize, default_size, default_write)
+        getattr(workload, f'run_{args.engine}')(paced(requests, workload, log, args.speed, lateness))
+        log.write(workload.drain())
+    finally:
+        os.close(fd)
+        log.close()
+
+    # On stderr, so the statistics line stays the only output captured by benchmark.sh
+    if lateness.count:
+        print(f"Late requests: {lateness.count}, mean {lateness.mean * 1e3:.3f} ms, max {lateness.max * 1e3:.3f} ms", file=sys.stderr)
+    stats = workload.pool.stats()
+    print(f"Buffer pool: {stats['hits']} hits, {stats['allocations']} allocations ({stats['bytes_allocated']} bytes)", file=sys.stderr)
+    return log.latency.count
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(description="Replay a recorded IO trace (time, offset, size, op) and log each IO like iotest")
+    parser.add_argument('trace', help="CSV or whitespace-separated trace, with a header or in the order time offset size op")
+    parser.add_argument('--speed', type=float, default=1.0, help="Time scale of the replay, 0 = as fast as possible (default: 1)")
+    parser.add_argument('--file', default='/tmp/test.file', help="Test file (default: /tmp/test.file)")
+    parser.add_argument('--filesize', default='1G', help="Size of the test file, offsets are folded into it (default: 1G)")
+    parser.add_argument('--sz_bloc', default='4k', help="Request size when the trace has none (default: 4k)")
+    parser.add_argument('--mode', default='r', help="r or w, when the trace has no op column (default: r)")
+    parser.add_argument('--engine', choices=ENGINES, default='threads', help="Submission mode (default: threads)")
+    parser.add_argument('--workers', type=int, default=4, help="Worker threads (default: 4)")
+    parser.add_argument('--queue-depth', type=int, default=32, help="Requests in flight (default: 32)")
+    parser.add_argument('--no-direct', action='store_true', help="Do not try O_DIRECT")
+    parser.add_argument('--output-dir', default='.', help="Where log.txt, log_epoch_*.txt and log_ops.txt are written (default: .)")
+    return parser
+
+# Entry point of the script
+if __name__ == "__main__":
+    main(build_parser().parse_args())
@@ -0,0 +1,246 @@
+import os  # Import os for the sysfs and procfs paths
+import sys  # Import sys to locate the shared modules
+import glob  # Import glob to find the RAPL domains
+import json  # Import json for the overhead report
+import time  # Import time for the sampling clock
+import signal  # Import signal to stop the sampler from benchmark.sh
+import socket  # Import socket for the default node name
+import argparse  # Import argparse for the sampler options
+import resource  # Import resource for the context switches of the overhead report
+import threading  # Import threading for the flush thread
+import numpy as np  # Import numpy for the batched records
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.tracefile import TraceWriter  # Binary trace file of the samplers
+
+# Local sampler of system counters, run next to the wattmeter during the IO runs of benchmark.sh:
+#   rapl: RAPL energy counters of /sys/class/powercap (package, core, dram... domains)
+#   disk: sectors read and written and time with IOs in flight of /proc/diskstats
+#   cpu:  busy and iowait time of /proc/stat
+# A source that is missing or unreadable (no RAPL, no permission) is skipped with a message on stderr.
+SOURCES = ['rapl', 'disk', 'cpu']
+
+# Highest sampling rate (samples per second)
+MAX_RATE = 1000
+
+# The samples go to a preallocated ring of records split in segments of about FLUSH_INTERVAL seconds.
+# A full segment is written by the flush thread in one write while the sampling goes on in the next one,
+# so the sampling loop never allocates nor writes to the file.
+FLUSH_INTERVAL = 1.0
+SEGMENTS = 4
+
+# Function to read a procfs or sysfs file from an open descriptor (one pread, no open/close per sample)
+def pread_text(fd, size=1 << 16):
+    return os.pread(fd, size, 0).decode()
+
+# RAPL energy counters (cumulative µJ, wrapping at max_energy_range_uj)
+class RaplSource:
+    def __init__(self, root='/sys/class/powercap'):
+        self.files, self.channels = [], []
+        for domain in sorted(glob.glob(os.path.join(root, 'intel-rapl:*'))):
+            try:
+                with open(os.path.join(domain, 'name')) as f:
+                    name = f.read().strip()
+                with open(os.path.join(domain, 'max_energy_range_uj')) as f:
+                    wrap = int(f.read())
+                with open(os.path.join(domain, 'energy_uj')) as f:
+                    int(f.read())  # Readable by this user (root only on recent kernels)
+            except (OSError, ValueError):
+                continue
+            # Sub-domains (intel-rapl:0:0) are prefixed by their package: rapl_package-0, rapl_0_core
+            prefix = os.path.basename(domain)[len('intel-rapl:'):].split(':')
+            label = name if len(prefix) == 1 else f'{prefix[0]}_{name}'
+            self.files.append(os.open(os.path.join(domain, 'energy_uj'), os.O_RDONLY))
+            self.channels.append({'name': f'rapl_{label}', 'kind': 'energy_uj', 'wrap': wrap})
+
+    def read(self):
+        return [float(os.pread(fd, 32, 0)) for fd in self.files]
+
+# Block device counters of /proc/diskstats: sectors read (field 6), sectors written (field 10), io_ticks ms (field 13)
+class DiskSource:
+    def __init__(self, devices=None, path='/proc/diskstats'):
+        self.fd = os.open(path, os.O_RDONLY)
+        present = [line.split()[2] for line in pread_text(self.fd).splitlines()]
+        if devices:
+            self.devices = [device for device in devices if device in present]
+        else:
+            # Whole disks only: partitions (sda1, nvme0n1p1) and virtual devices are left out
+            self.devices = [device for device in present if os.path.exists(f'/sys/block/{device}/device')]
+        self.channels = [{'name': f'disk_{device}_{counter}', 'kind': kind}
+                         for device in self.devices
+                         for counter, kind in (('read_sectors', 'sectors'), ('write_sectors', 'sectors'), ('io_ticks', 'ticks_ms'))]
+
+    def read(self):
+        fields = {}
+        for line in pread_text(self.fd).splitlines():
+            parts = line.split()
+            fields[parts[2]] = parts
+        return [float(fields[device][index]) for device in self.devices for index in (5, 9, 12)]
+
+# CPU time of /proc/stat (all CPUs): busy (neither idle nor iowait), iowait, and the total they are divided by
+class CpuSource:
+    channels = [{'name': 'cpu_busy', 'kind': 'cpu_ticks'}, {'name': 'cpu_iowait', 'kind': 'cpu_ticks'}, {'name': 'cpu_total', 'kind': 'cpu_ticks'}]
+
+    def __init__(self, path='/proc/stat'):
+        self.fd = os.open(path, os.O_RDONLY)
+        self.read()
+
+    def read(self):
+        line = os.pread(self.fd, 256, 0).split(b'\n', 1)[0]  # The first line sums all CPUs
+        ticks = [float(value) for value in line.split()[1:9]]  # user nice system idle iowait irq softirq steal
+        total = sum(ticks)
+        return [total - ticks[3] - ticks[4], ticks[4], total]
+
+# Function to open the requested sources, skipping those that are not available
+def open_sources(names, devices=None):
+    factories = {'rapl': RaplSource, 'disk': lambda: DiskSource(devices), 'cpu': CpuSource}
+    sources = []
+    for name in names:
+        try:
+            source = factories[name]()
+        except OSError as e:
+            print(f"Sampler: {name} unavailable ({e.strerror or e}), skipped", file=sys.stderr)
+            continue
+        if not source.channels:
+            print(f"Sampler: no readable {name} counter, skipped", file=sys.stderr)
+            continue
+        sources.append(source)
+    return sources
+
+# Preallocated ring of records written by the sampling loop and flushed segment by segment by a thread
+class RingBuffer:
+    def __init__(self, writer, segment_size, segments=SEGMENTS):
+        self.writer = writer
+        self.records = np.zeros(segment_size * segments, dtype=writer.dtype)
+        self.timestamps, self.values = self.records['timestamp'], self.records['values']  # Field views
+        self.segment_size = segment_size
+        self.segments = segments
+        self.position = 0  # Next slot, counted since the start (slot = position % capacity)
+        self.flushed = 0   # Records already written to the file
+        self.free = threading.Semaphore(segments - 1)  # Segments the loop may fill ahead of the flush
+        self.full = threading.Condition()
+        self.pending = []  # (begin, end) slots of the segments waiting for the flush
+        self.stalls = 0    # Times the loop waited for the flush thread (the file system is too slow)
+        self.closed = False
+        self.thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self.thread.start()
+
+    # Function to store one sample in the next slot
+    def put(self, timestamp, values):
+        slot = self.position % len(self.records)
+        self.timestamps[slot] = timestamp
+        self.values[slot] = values
+        self.position += 1
+        if self.position % self.segment_size == 0:
+            self._hand_over(slot + 1 - self.segment_size, slot + 1)
+            if not self.free.acquire(blocking=False):
+                self.stalls += 1
+                self.free.acquire()
+
+    # Function to queue the slots begin:end for the flush thread
+    def _hand_over(self, begin, end):
+        with self.full:
+            self.pending.append((begin, end))
+            self.full.notify()
+
+    # Function of the flush thread: one write per segment, then the segment is free again
+    def _flush_loop(self):
+        while True:
+            with self.full:
+                while not self.pending and not self.closed:
+                    self.full.wait()
+                if not self.pending:
+                    return
+                begin, end = self.pending.pop(0)
+            self.writer.write_records(self.records[begin:end])
+            self.flushed += end - begin
+            self.free.release()
+
+    # Function to flush the partial last segment and stop the flush thread
+    def close(self):
+        partial = self.position % self.segment_size
+        if partial:
+            slot = self.position % len(self.records)
+            self._hand_over(slot - partial, slot)
+        with self.full:
+            self.closed = True
+            self.full.notify()
+        self.thread.join()
+        self.writer.close()
+
+# Function to sample the sources at a fixed rate into a trace file until stopped (SIGTERM, SIGINT) or duration elapses.
+# Returns the overhead report of the sampler.
+def run(output, rate, sources, node=None, duration=None):
+    channels = [channel for source in sources for channel in source.channels]
+    writer = TraceWriter(output, channels, node, rate)
+    ring = RingBuffer(writer, max(1, int(rate * FLUSH_INTERVAL)))
+    stop = []
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.append(True))
+
+    period_ns = int(1e9 / rate)
+    late = 0
+    usage_start, cpu_start = resource.getrusage(resource.RUSAGE_SELF), time.process_time()
+    start = next_time = time.monotonic_ns()
+    deadline = start + int(duration * 1e9) if duration is not None else None
+    try:
+        while not stop and (deadline is None or next_time < deadline):
+            ring.put(time.time_ns(), [value for source in sources for value in source.read()])
+            # Absolute schedule, so the rate does not drift with the time spent reading
+            next_time += period_ns
+            delay = next_time - time.monotonic_ns()
+            if delay > 0:
+                time.sleep(delay / 1e9)
+            else:
+                late += 1
+                next_time = time.monotonic_ns()
+    finally:
+        elapsed = (time.monotonic_ns() - start) / 1e9
+        ring.close()
+    cpu = time.process_time() - cpu_start
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    switches = (usage.ru_nvcsw - usage_start.ru_nvcsw) + (usage.ru_nivcsw - usage_start.ru_nivcsw)
+    return {
+        'samples': writer.count,
+        'channels': len(channels),
+        'seconds': round(elapsed, 3),
+        'rate': round(writer.count / elapsed, 1) if elapsed else 0.0,
+        'late': late,
+        'cpu_percent': round(100 * cpu / elapsed, 2) if elapsed else 0.0,
+        'wakeups_per_s': round(switches / elapsed, 1) if elapsed else 0.0,
+        'flush_stalls': ring.stalls,
+        'bytes': writer.count * writer.dtype.itemsize,
+    }
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(description="Sample RAPL, disk and CPU counters into a binary trace file")
+    parser.add_argument('--output', required=True, help="Trace file to write")
+    parser.add_argument('--rate', type=float, default=10.0, help=f"Samples per second, up to {MAX_RATE} (default: 10)")
+    parser.add_argument('--sources', default=','.join(SOURCES), help=f"Comma-separated sources (default: {','.join(SOURCES)})")
+    parser.add_argument('--devices', help="Comma-separated block devices (default: every disk)")
+    parser.add_argument('--duration', type=float, help="Stop after this many seconds (default: until SIGTERM/SIGINT)")
+    parser.add_argument('--node', default=socket.gethostname().split('.')[0], help="Node name stored in the trace (default: short hostname)")
+    parser.add_argument('--report', help="Write the overhead report (CPU %%, wakeups/s, late samples) to this JSON file")
+    return parser
+
+# Entry point of the script
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    if not 0 < args.rate <= MAX_RATE:
+        build_parser().error(f"--rate must be in (0, {MAX_RATE}]")
+    names = [name for name in args.sources.split(',') if name]
+    unknown = set(names) - set(SOURCES)
+    if unknown:
+        build_parser().error(f"unknown source(s): {', '.join(sorted(unknown))} (choose from {', '.join(SOURCES)})")
+    sources = open_sources(names, args.devices.split(',') if args.devices else None)
+    if not sources:
+        print("Sampler: no source available, nothing recorded", file=sys.stderr)
+        sys.exit(0)
+    report = run(args.output, args.rate, sources, args.node, args.duration)
+    print(f"Sampler: {report['samples']} samples of {report['channels']} channels written to {args.output} "
+          f"({report['rate']}/s, {report['late']} late, CPU {report['cpu_percent']}%, {report['wakeups_per_s']} wakeups/s, "
+          f"{report['flush_stalls']} flush stalls)", file=sys.stderr)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)